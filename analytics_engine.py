@@ -0,0 +1,248 @@
+"""
+pandas implementation of the /analytics reports.
+
+Checkout lines are read straight from SQL into a DataFrame and every report is a grouped aggregation over it.
+Ranges spanning more than PARTITION_MIN_MONTHS months are split by month and aggregated in a process pool, then the
+partial aggregates are summed. Checkouts never span months, so the partial sums are exact.
+
+Queries are built on lightweight table() constructs instead of the models in server, so worker processes don't have
+to import the server.
+"""
+import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from sqlalchemy import Engine, column, create_engine, func, select, table
+
+from models.request_schemas import ActionTypeModel, PopularityOrderModel
+from models.response_schemas import ItemPopularityResponse, DayFrequencyResponse, DayQuantityResponse, \
+    ItemReportResponse
+
+# ranges covering more months than this are aggregated month by month in a process pool
+PARTITION_MIN_MONTHS = 12
+
+_items = table('items', column('name'))
+_transactions = table('transactions', column('id'), column('action'), column('timestamp'))
+_transaction_items = table('transaction_items', column('transaction_id'), column('item_name'),
+                           column('item_quantity'))
+
+# (start, end, end inclusive), matching the timestamp >= start_date and timestamp <= end_date filters of /logs
+Partition = tuple[datetime.date | None, datetime.date | None, bool]
+
+
+def popular_items(bind: Engine, start_date: datetime.date | None = None, end_date: datetime.date | None = None,
+                  order_by: PopularityOrderModel = PopularityOrderModel.FREQUENCY, least: bool = False,
+                  limit: int | None = None, workers: int = 1) -> list[ItemPopularityResponse]:
+    """
+    Ranks items in inventory by checkout frequency or quantity, with the same results as /analytics/popular.
+    :param bind: The engine to read from
+    :param start_date: The first day to include, or None for no limit
+    :param end_date: The end of the range, or None for no limit
+    :param order_by: Rank by frequency or by quantity
+    :param least: True to put the least popular items first, including items that were never checked out
+    :param limit: The maximum number of items to return, or None for all of them
+    :param workers: The number of processes used for long ranges
+    :return: The ranked items
+    """
+    counts = _aggregate(bind, 'items', start_date, end_date, workers)
+    with bind.connect() as connection:
+        names = pd.read_sql(select(_items.c.name), connection)['name']
+
+    # starting from items means deleted items are left out, and never checked out items get a row of zeros
+    # reindexing fills the zeros directly, where a left merge would fill NaN into float or object columns
+    ranked = (counts.set_index('item_name')
+              .reindex(pd.Index(names, name='item_name'), fill_value=0)
+              .astype({'frequency': 'int64', 'quantity': 'int64'})
+              .reset_index())
+    if not least:
+        ranked = ranked[ranked['frequency'] > 0]
+    rank = 'frequency' if order_by == PopularityOrderModel.FREQUENCY else 'quantity'
+    ranked = ranked.sort_values([rank, 'item_name'], ascending=[least, True])
+    if limit is not None:
+        ranked = ranked.head(limit)
+
+    return [ItemPopularityResponse(item_name=name, frequency=frequency, quantity=quantity)
+            for name, frequency, quantity in ranked[['item_name', 'frequency', 'quantity']].itertuples(index=False)]
+
+
+def peak_days(bind: Engine, start_date: datetime.date | None = None, end_date: datetime.date | None = None,
+              limit: int | None = None, workers: int = 1) -> list[DayFrequencyResponse]:
+    """
+    Ranks days by the number of checkouts, with the same results as /analytics/peak-days.
+    :param bind: The engine to read from
+    :param start_date: The first day to include, or None for no limit
+    :param end_date: The end of the range, or None for no limit
+    :param limit: The maximum number of days to return, or None for all of them
+    :param workers: The number of processes used for long ranges
+    :return: The ranked days
+    """
+    days = _aggregate(bind, 'days', start_date, end_date, workers)
+    days = days.sort_values(['frequency', 'date'], ascending=[False, True])
+    if limit is not None:
+        days = days.head(limit)
+
+    return [DayFrequencyResponse(date=day, frequency=frequency)
+            for day, frequency in days[['date', 'frequency']].itertuples(index=False)]
+
+
+def item_report(bind: Engine, item_name: str, start_date: datetime.date | None = None,
+                end_date: datetime.date | None = None) -> ItemReportResponse:
+    """
+    Summarizes the checkouts of a single item, with the same results as /analytics/item/{item_name}.
+    A single item is a small enough slice of the logs that it is never partitioned.
+    :param bind: The engine to read from
+    :param item_name: The item to summarize, which must exist
+    :param start_date: The first day to include, or None for no limit
+    :param end_date: The end of the range, or None for no limit
+    :return: The report
+    """
+    with bind.connect() as connection:
+        lines = _read_lines(connection, (start_date, end_date, True), item_name)
+
+    days = (lines.groupby('date')
+            .agg(frequency=('item_quantity', 'size'), quantity=('item_quantity', 'sum'))
+            .reset_index()
+            .sort_values(['quantity', 'date'], ascending=[False, True]))
+
+    return ItemReportResponse(item_name=item_name,
+                              frequency=int(days['frequency'].sum()),
+                              quantity=int(days['quantity'].sum()),
+                              days=[DayQuantityResponse(date=day, quantity=quantity)
+                                    for day, quantity in days[['date', 'quantity']].itertuples(index=False)])
+
+
+def _aggregate(bind: Engine, kind: str, start_date: datetime.date | None, end_date: datetime.date | None,
+               workers: int) -> pd.DataFrame:
+    """
+    Computes the per item or per day checkout counts, month by month in a process pool if the range is long enough.
+    :param bind: The engine to read from
+    :param kind: 'items' for (item_name, frequency, quantity) rows, 'days' for (date, frequency) rows
+    :param start_date: The first day to include, or None for no limit
+    :param end_date: The end of the range, or None for no limit
+    :param workers: The number of processes to use
+    :return: The counts
+    """
+    partitions = _month_partitions(bind, start_date, end_date) \
+        if workers > 1 and bind.url.database not in (None, '', ':memory:') else []
+    if len(partitions) <= PARTITION_MIN_MONTHS:
+        with bind.connect() as connection:
+            return _read_counts(connection, kind, (start_date, end_date, True))
+
+    url = bind.url.render_as_string(hide_password=False)
+    parts = _get_pool(workers).map(_aggregate_partition, [url] * len(partitions), [kind] * len(partitions), partitions)
+
+    key = 'item_name' if kind == 'items' else 'date'
+    return pd.concat(parts, ignore_index=True).groupby(key, as_index=False).sum()
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Returns the process pool, which is kept between reports so workers are only started once."""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown()
+        # the server is multithreaded, so workers are spawned rather than forked
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        _pool_workers = workers
+    return _pool
+
+
+# engines opened by a worker process, by database URL
+_worker_engines: dict[str, Engine] = {}
+
+
+def _aggregate_partition(url: str, kind: str, partition: Partition) -> pd.DataFrame:
+    """Worker process entry point, aggregates a single partition."""
+    if url not in _worker_engines:
+        _worker_engines[url] = create_engine(url)
+    with _worker_engines[url].connect() as connection:
+        return _read_counts(connection, kind, partition)
+
+
+def _read_counts(connection, kind: str, partition: Partition) -> pd.DataFrame:
+    """
+    Reads the checkouts of a partition and counts them per item or per day.
+    Only the columns the report needs are read, since fetching rows is most of the work.
+    :return: (item_name, frequency, quantity) rows for 'items', (date, frequency) rows for 'days'
+    """
+    if kind == 'items':
+        lines = pd.read_sql(_filter(select(_transaction_items.c.item_name, _transaction_items.c.item_quantity)
+                                    .join(_transactions, _transactions.c.id == _transaction_items.c.transaction_id),
+                                    partition), connection)
+        return (lines.groupby('item_name')
+                .agg(frequency=('item_quantity', 'size'), quantity=('item_quantity', 'sum'))
+                .reset_index())
+
+    checkouts = pd.read_sql(_filter(select(func.date(_transactions.c.timestamp).label('date')), partition),
+                            connection)
+    return checkouts.groupby('date').size().reset_index(name='frequency')
+
+
+def _read_lines(connection, partition: Partition, item_name: str) -> pd.DataFrame:
+    """
+    Reads the checkout lines of a single item.
+    :return: A DataFrame of (date, item_quantity) rows
+    """
+    statement = (select(func.date(_transactions.c.timestamp).label('date'), _transaction_items.c.item_quantity)
+                 .join(_transactions, _transactions.c.id == _transaction_items.c.transaction_id)
+                 .where(_transaction_items.c.item_name == item_name))
+    return pd.read_sql(_filter(statement, partition), connection)
+
+
+def _filter(statement, partition: Partition):
+    """Limits a select over transactions to the checkouts in the partition."""
+    start, end, end_inclusive = partition
+    statement = statement.where(_transactions.c.action == ActionTypeModel.CHECKOUT.value)
+    if start is not None:
+        statement = statement.where(_transactions.c.timestamp >= start.isoformat())
+    if end is not None:
+        statement = statement.where(_transactions.c.timestamp <= end.isoformat() if end_inclusive
+                                    else _transactions.c.timestamp < end.isoformat())
+    return statement
+
+
+def _month_partitions(bind: Engine, start_date: datetime.date | None,
+                      end_date: datetime.date | None) -> list[Partition]:
+    """
+    Splits the range into calendar months, clamped to the range. An open end is split from the first or last checkout
+    in the logs, and the partition at that end stays open.
+    :return: The partitions, in order
+    """
+    first, last = start_date, end_date
+    if first is None or last is None:
+        with bind.connect() as connection:
+            min_timestamp, max_timestamp = connection.execute(
+                select(func.min(_transactions.c.timestamp), func.max(_transactions.c.timestamp))
+                .where(_transactions.c.action == ActionTypeModel.CHECKOUT.value)).one()
+        if min_timestamp is None:
+            return []
+        first = first or datetime.date.fromisoformat(str(min_timestamp)[:10])
+        last = last or datetime.date.fromisoformat(str(max_timestamp)[:10])
+
+    partitions = []
+    month = datetime.date(first.year, first.month, 1)
+    while month <= last:
+        next_month = datetime.date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        if start_date is not None and month < start_date:
+            partition_start = start_date
+        else:
+            partition_start = month
+        if end_date is not None and next_month > end_date:
+            partitions.append((partition_start, end_date, True))
+        else:
+            partitions.append((partition_start, next_month, False))
+        month = next_month
+    if not partitions:
+        return []
+
+    # open ends stay open, so checkouts logged after the bounds were read are still counted
+    if start_date is None:
+        partitions[0] = (None, *partitions[0][1:])
+    if end_date is None:
+        partitions[-1] = (partitions[-1][0], None, True)
+    return partitions
@@ -0,0 +1,185 @@
+import asyncio
+import datetime
+from typing import Type, List, AsyncIterator
+
+import httpx
+from pydantic import TypeAdapter
+
+from api.inventoryapi import APIResponse, ResponseStatus, BASE_URL, NEXT_CURSOR_HEADER
+from api.inventoryapi import _adapter, _validate, _logs_params
+from models.request_schemas import ItemRequest, MultiItemRequest, CreateRequest, WeekdayModel, ActionTypeModel
+from models.request_schemas import BulkRequest
+from models.response_schemas import ItemResponse, TransactionResponse, MessageResponse, BulkResponse
+
+
+class AsyncInventoryClient:
+    """
+    Asynchronous client for the inventory API, for scripts that make many independent calls.
+
+    Calls return the same APIResponse objects and models as the functions in inventoryapi, so they can be fanned out
+    with asyncio.gather, for example to check many items at once:
+
+        async with AsyncInventoryClient(url) as client:
+            responses = await asyncio.gather(*(client.get_item(name) for name in names))
+
+    At most max_concurrency requests are in flight at a time, the others wait for a slot, and connections are kept
+    alive between requests. Requests that fail to connect are retried.
+
+    Attributes:
+        url (str): The URL of the server.
+        timeout (float): The timeout in seconds used when a call doesn't give one.
+        client (httpx.AsyncClient): The client holding the connection pool.
+    """
+    url: str
+    timeout: float
+    client: httpx.AsyncClient
+
+    def __init__(self, url: str = BASE_URL, timeout: float = 5, max_concurrency: int = 10, retries: int = 3,
+                 transport: httpx.AsyncBaseTransport = None):
+        """
+        :param url: The URL of the server.
+        :param timeout: The timeout in seconds used when a call doesn't give one.
+        :param max_concurrency: The maximum number of requests in flight, which is also the number of connections kept
+                                open.
+        :param retries: The number of times a request that failed to connect is retried.
+        :param transport: The transport to send requests with instead of the network, such as an httpx.ASGITransport.
+        """
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.client = httpx.AsyncClient(
+            base_url=self.url, timeout=timeout,
+            transport=transport or httpx.AsyncHTTPTransport(retries=retries, limits=httpx.Limits(
+                max_connections=max_concurrency, max_keepalive_connections=max_concurrency)))
+
+    async def aclose(self):
+        """Closes every pooled connection."""
+        await self.client.aclose()
+
+    async def __aenter__(self) -> 'AsyncInventoryClient':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def request(self, expected_response_model: Type, method: str, path: str, timeout: float = None,
+                      stream: bool = False, **kwargs) -> APIResponse:
+        """
+        Makes an API request, waiting for a free slot if max_concurrency requests are already in flight.
+        :param expected_response_model: The type a successful response is validated against, or None to skip it.
+        :param method: The HTTP request method to use.
+        :param path: The path of the endpoint, starting with a slash.
+        :param timeout: The timeout in seconds to make the API request.
+        :param stream: True if the endpoint streams newline delimited JSON. If successful, the model will be an async
+                       iterator that validates each line against expected_response_model as it arrives.
+        :param kwargs: Additional keyword arguments to pass to the request.
+        :return: The APIResponse object representing the API response.
+        """
+        try:
+            async with self._semaphore:
+                request = self.client.build_request(method, path, timeout=timeout or self.timeout, **kwargs)
+                response = await self.client.send(request, stream=stream)
+
+                if stream:
+                    if not response.is_success:
+                        # read the error body, there is nothing to stream
+                        await response.aread()
+                        await response.aclose()
+                    apiresponse = APIResponse(response, parse_json=False)
+                    apiresponse.model = _aiter_ndjson(response, _adapter(expected_response_model)) \
+                        if apiresponse.is_success else None
+                    return apiresponse
+
+            apiresponse = APIResponse(response)
+            apiresponse.model = _validate(expected_response_model, apiresponse)
+            return apiresponse
+        except httpx.TimeoutException:
+            return APIResponse(error='Request timed out', status=ResponseStatus.TIMEOUT)
+        except httpx.TransportError:
+            return APIResponse(error='Connection error', status=ResponseStatus.CONNECTION_ERROR)
+        except Exception as e:
+            return APIResponse(error=str(e), status=ResponseStatus.UNKNOWN_ERROR)
+
+    async def get_inventory(self, timeout: float = None) -> APIResponse:
+        """Gets every inventory item. See inventoryapi.get_inventory."""
+        return await self.request(List[ItemResponse], 'GET', '/items', timeout)
+
+    async def get_logs(self, item_name: str = None, student_id: str = None, weekday: WeekdayModel = None,
+                       type: ActionTypeModel = None, start_date: datetime.date = None, end_date: datetime.date = None,
+                       limit: int = None, cursor: str = None, timeout: float = None) -> APIResponse:
+        """Gets a page of logs. See inventoryapi.get_logs."""
+        return await self.request(List[TransactionResponse], 'GET', '/logs', timeout,
+                                  params=_logs_params(item_name, student_id, weekday, type, start_date, end_date,
+                                                      limit=limit, cursor=cursor))
+
+    async def iter_logs(self, item_name: str = None, student_id: str = None, weekday: WeekdayModel = None,
+                        type: ActionTypeModel = None, start_date: datetime.date = None,
+                        end_date: datetime.date = None, page_size: int = 500,
+                        timeout: float = None) -> AsyncIterator[APIResponse]:
+        """
+        Lazily goes through every page of logs. See inventoryapi.iter_logs.
+        Pages are requested one after the other, since each page's cursor comes from the previous one.
+        """
+        cursor = None
+        while True:
+            page = await self.get_logs(item_name, student_id, weekday, type, start_date, end_date, limit=page_size,
+                                       cursor=cursor, timeout=timeout)
+            yield page
+
+            cursor = page.response.headers.get(NEXT_CURSOR_HEADER) if page.is_success else None
+            if cursor is None:
+                return
+
+    async def stream_logs(self, item_name: str = None, student_id: str = None, weekday: WeekdayModel = None,
+                          type: ActionTypeModel = None, start_date: datetime.date = None,
+                          end_date: datetime.date = None, timeout: float = None) -> APIResponse:
+        """
+        Streams every matching log. See inventoryapi.stream_logs.
+        If successful, the model is an AsyncIterator[TransactionResponse]. The stream's connection doesn't count
+        towards max_concurrency once the response has started.
+        """
+        return await self.request(TransactionResponse, 'GET', '/logs/stream', timeout, stream=True,
+                                  params=_logs_params(item_name, student_id, weekday, type, start_date, end_date))
+
+    async def get_item(self, item_name: str, timeout: float = None) -> APIResponse:
+        """Gets a specific item. See inventoryapi.get_item."""
+        return await self.request(ItemResponse, 'GET', f'/items/{item_name}', timeout)
+
+    async def restock_item(self, item: ItemRequest, timeout: float = None) -> APIResponse:
+        """Restocks a specific item. See inventoryapi.restock_item."""
+        return await self.request(MessageResponse, 'POST', '/restock', timeout, json=item.model_dump())
+
+    async def checkout_item(self, item: ItemRequest, timeout: float = None) -> APIResponse:
+        """Checks out a specific item. See inventoryapi.checkout_item."""
+        return await self.request(MessageResponse, 'POST', '/checkout', timeout, json=item.model_dump())
+
+    async def checkout_items(self, items: MultiItemRequest, timeout: float = None) -> APIResponse:
+        """Checks out multiple items. See inventoryapi.checkout_items."""
+        return await self.request(MessageResponse, 'POST', '/checkout', timeout, json=items.model_dump())
+
+    async def create_item(self, item: CreateRequest, timeout: float = None) -> APIResponse:
+        """Creates a new item. See inventoryapi.create_item."""
+        return await self.request(MessageResponse, 'POST', '/create', timeout, json=item.model_dump())
+
+    async def bulk_upsert_items(self, items: BulkRequest, timeout: float = None) -> APIResponse:
+        """Creates or restocks many items in one transaction. See inventoryapi.bulk_upsert_items."""
+        return await self.request(BulkResponse, 'POST', '/items/bulk', timeout, json=items.model_dump())
+
+    async def delete_all_items(self, timeout: float = None) -> APIResponse:
+        """Deletes all items from inventory. See inventoryapi.delete_all_items."""
+        return await self.request(MessageResponse, 'DELETE', '/delete_all', timeout)
+
+
+async def _aiter_ndjson(response: httpx.Response, adapter: TypeAdapter) -> AsyncIterator:
+    """
+    Internal method to parse a streamed newline delimited JSON response, one line at a time.
+    :param response: The streamed response.
+    :param adapter: The adapter to validate each line with.
+    :return: Async iterator of the validated lines. The response is closed once it is exhausted.
+    """
+    try:
+        async for line in response.aiter_lines():
+            if line:
+                yield adapter.validate_json(line)
+    finally:
+        await response.aclose()
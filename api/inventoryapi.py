@@ -1,18 +1,25 @@
-import json
+import datetime
 import os
 from enum import Enum
-from typing import Type, List, Union
+from functools import lru_cache
+from typing import Type, List, Union, Iterator
 
+import orjson
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pydantic import BaseModel, TypeAdapter, ValidationError
 from tabulate import tabulate
 
 from models.request_schemas import ItemRequest, MultiItemRequest, CreateRequest, WeekdayModel, ActionTypeModel
-from models.response_schemas import ItemResponse, TransactionResponse, MessageResponse
+from models.request_schemas import BulkRequest
+from models.response_schemas import ItemResponse, TransactionResponse, MessageResponse, BulkResponse
 
 load_dotenv()
 BASE_URL = os.getenv('INVENTORY_API_URL', 'http://127.0.0.1:8001')
+# response header holding the cursor for the next page of /logs
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
 
 
 class ResponseStatus(Enum):
@@ -31,12 +38,16 @@ class ResponseStatus(Enum):
     UNKNOWN_ERROR = 0
 
 
+_STATUS_CODES = {status.value: status for status in ResponseStatus}
+
+
 class APIResponse:
     """
     Wrapper class for the API response.
 
     Attributes:
-         response (requests.Response): Response from API. None if the request failed.
+         response (requests.Response): Response from API (an httpx.Response from AsyncInventoryClient). None if the
+             request failed.
          status_code (ResponseStatus): ResponseStatus representing the HTTP status code.
          raw_status_code (int): Response status code. -1 if the request failed.
          is_success (bool): True if the response status code is a 2xx status code.
@@ -53,14 +64,18 @@ class APIResponse:
     model: Union[type[BaseModel], list[type[BaseModel]], None]
 
     def __init__(self, response: requests.Response = None, error: str = None,
-                 status: ResponseStatus = None):
+                 status: ResponseStatus = None, parse_json: bool = True):
+        """
+        :param response: Response from API, None if the request failed.
+        :param error: Error message if the request failed.
+        :param status: Status to use instead of the response's status code.
+        :param parse_json: False to leave the body of a successful response unread, for streamed responses.
+        """
         self.response = response
 
         if status is None:
             if response is not None:
-                self.status_code = ResponseStatus(response.status_code) \
-                    if response.status_code in [item.value for item in ResponseStatus] \
-                    else ResponseStatus.UNKNOWN_ERROR
+                self.status_code = _STATUS_CODES.get(response.status_code, ResponseStatus.UNKNOWN_ERROR)
             else:
                 self.status_code = ResponseStatus.UNKNOWN_ERROR
         else:
@@ -77,11 +92,12 @@ class APIResponse:
 
             if not self.is_success and error is None:
                 self.error = f'Failed with status code {self.raw_status_code}: {response.text}'
-            try:
-                self.json = response.json()
-                self.is_json = True
-            except json.decoder.JSONDecodeError:
-                self.is_json = False
+            if parse_json or not self.is_success:
+                try:
+                    self.json = orjson.loads(response.content)
+                    self.is_json = True
+                except orjson.JSONDecodeError:
+                    self.is_json = False
 
     def formatted_string(self) -> str:
         """
@@ -105,35 +121,193 @@ class APIResponse:
         return ''
 
 
-def _make_request(expected_response_model: Type, method: str, endpoint: str, timeout: int = 5,
-                  **kwargs) -> APIResponse:
+@lru_cache(maxsize=None)
+def _adapter(model: Type) -> TypeAdapter:
     """
-    Internal method to make an API request.
-    :param method: The HTTP request method to use.
-    :param endpoint: The endpoint to make the API request.
-    :param timeout: The timeout in seconds to make the API request.
-    :param kwargs: Additional keyword arguments to pass to the request.
-    :return: The APIResponse object representing the API response.
+    Internal method to get the TypeAdapter for a response model. Building an adapter is much slower than using one, so
+    one is kept per model.
+    :param model: The response model.
+    :return: The adapter.
+    """
+    return TypeAdapter(model)
+
+
+class InventoryClient:
+    """
+    Client for the inventory API that keeps its connections open between requests.
+
+    Requests go through a pooled requests.Session, so consecutive calls reuse a keep-alive connection instead of
+    opening a new one each time. Requests that fail to connect are retried, but a request that reached the server is
+    never sent again, so a call still times out after its timeout like the module level functions.
+
+    Attributes:
+        url (str): The URL of the server.
+        timeout (float): The timeout in seconds used when a call doesn't give one.
+        session (requests.Session): The session holding the connection pool.
+    """
+    url: str
+    timeout: float
+    session: requests.Session
+
+    def __init__(self, url: str = BASE_URL, timeout: float = 5, pool_size: int = 10, retries: int = 3,
+                 backoff_factor: float = 0.1):
+        """
+        :param url: The URL of the server.
+        :param timeout: The timeout in seconds used when a call doesn't give one.
+        :param pool_size: The number of connections kept open, which should be at least the number of threads sharing
+                          the client.
+        :param retries: The number of times a request that failed to connect is retried.
+        :param backoff_factor: Retries wait backoff_factor * 2 ** (retry - 1) seconds.
+        """
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=Retry(connect=retries, read=0, status=0, other=0,
+                                                backoff_factor=backoff_factor))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def close(self):
+        """Closes every pooled connection."""
+        self.session.close()
+
+    def __enter__(self) -> 'InventoryClient':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def request(self, expected_response_model: Type, method: str, path: str, timeout: float = None,
+                stream: bool = False, **kwargs) -> APIResponse:
+        """
+        Makes an API request.
+        :param expected_response_model: The type a successful response is validated against, or None to skip it.
+        :param method: The HTTP request method to use.
+        :param path: The path of the endpoint, starting with a slash.
+        :param timeout: The timeout in seconds to make the API request.
+        :param stream: True if the endpoint streams newline delimited JSON. If successful, the model will be an
+                       iterator that validates each line against expected_response_model as it arrives.
+        :param kwargs: Additional keyword arguments to pass to the request.
+        :return: The APIResponse object representing the API response.
+        """
+        try:
+            response = self.session.request(method, f'{self.url}{path}', timeout=timeout or self.timeout,
+                                            stream=stream, **kwargs)
+            if stream:
+                apiresponse = APIResponse(response, parse_json=False)
+                apiresponse.model = _iter_ndjson(response, _adapter(expected_response_model)) \
+                    if apiresponse.is_success else None
+                return apiresponse
+
+            apiresponse = APIResponse(response)
+            apiresponse.model = _validate(expected_response_model, apiresponse)
+            return apiresponse
+        except requests.exceptions.Timeout:
+            return APIResponse(error='Request timed out', status=ResponseStatus.TIMEOUT)
+        except requests.exceptions.ConnectionError:
+            return APIResponse(error='Connection error', status=ResponseStatus.CONNECTION_ERROR)
+        except Exception as e:
+            return APIResponse(error=str(e), status=ResponseStatus.UNKNOWN_ERROR)
+
+    def get_inventory(self, timeout: float = None) -> APIResponse:
+        """Gets every inventory item. See get_inventory."""
+        return self.request(List[ItemResponse], 'GET', '/items', timeout)
+
+    def get_logs(self, item_name: str = None, student_id: str = None, weekday: WeekdayModel = None,
+                 type: ActionTypeModel = None, start_date: datetime.date = None, end_date: datetime.date = None,
+                 limit: int = None, cursor: str = None, timeout: float = None) -> APIResponse:
+        """Gets a page of logs. See get_logs."""
+        return self.request(List[TransactionResponse], 'GET', '/logs', timeout,
+                            params=_logs_params(item_name, student_id, weekday, type, start_date, end_date,
+                                                limit=limit, cursor=cursor))
+
+    def iter_logs(self, item_name: str = None, student_id: str = None, weekday: WeekdayModel = None,
+                  type: ActionTypeModel = None, start_date: datetime.date = None, end_date: datetime.date = None,
+                  page_size: int = 500, timeout: float = None) -> Iterator[APIResponse]:
+        """Lazily goes through every page of logs. See iter_logs."""
+        cursor = None
+        while True:
+            page = self.get_logs(item_name, student_id, weekday, type, start_date, end_date, limit=page_size,
+                                 cursor=cursor, timeout=timeout)
+            yield page
+
+            cursor = page.response.headers.get(NEXT_CURSOR_HEADER) if page.is_success else None
+            if cursor is None:
+                return
+
+    def stream_logs(self, item_name: str = None, student_id: str = None, weekday: WeekdayModel = None,
+                    type: ActionTypeModel = None, start_date: datetime.date = None, end_date: datetime.date = None,
+                    timeout: float = None) -> APIResponse:
+        """Streams every matching log. See stream_logs."""
+        return self.request(TransactionResponse, 'GET', '/logs/stream', timeout, stream=True,
+                            params=_logs_params(item_name, student_id, weekday, type, start_date, end_date))
+
+    def get_item(self, item_name: str, timeout: float = None) -> APIResponse:
+        """Gets a specific item. See get_item."""
+        return self.request(ItemResponse, 'GET', f'/items/{item_name}', timeout)
+
+    def restock_item(self, item: ItemRequest, timeout: float = None) -> APIResponse:
+        """Restocks a specific item. See restock_item."""
+        return self.request(MessageResponse, 'POST', '/restock', timeout, json=item.model_dump())
+
+    def checkout_item(self, item: ItemRequest, timeout: float = None) -> APIResponse:
+        """Checks out a specific item. See checkout_item."""
+        return self.request(MessageResponse, 'POST', '/checkout', timeout, json=item.model_dump())
+
+    def checkout_items(self, items: MultiItemRequest, timeout: float = None) -> APIResponse:
+        """Checks out multiple items. See checkout_items."""
+        return self.request(MessageResponse, 'POST', '/checkout', timeout, json=items.model_dump())
+
+    def create_item(self, item: CreateRequest, timeout: float = None) -> APIResponse:
+        """Creates a new item. See create_item."""
+        return self.request(MessageResponse, 'POST', '/create', timeout, json=item.model_dump())
+
+    def bulk_upsert_items(self, items: BulkRequest, timeout: float = None) -> APIResponse:
+        """Creates or restocks many items in one transaction. See bulk_upsert_items."""
+        return self.request(BulkResponse, 'POST', '/items/bulk', timeout, json=items.model_dump())
+
+    def delete_all_items(self, timeout: float = None) -> APIResponse:
+        """Deletes all items from inventory. See delete_all_items."""
+        return self.request(MessageResponse, 'DELETE', '/delete_all', timeout)
+
+
+@lru_cache(maxsize=None)
+def shared_client(url: str = BASE_URL) -> InventoryClient:
+    """
+    Gets the client the module level functions use for a server, so they share its connection pool.
+    :param url: The URL of the server.
+    :return: The client.
+    """
+    return InventoryClient(url)
+
+
+def _validate(expected_response_model: Type, apiresponse: APIResponse):
     """
+    Internal method to validate the body of a response.
+    :param expected_response_model: The type to validate against, or None to skip validation.
+    :param apiresponse: The response.
+    :return: The validated model, or None if there is no model or the body doesn't match it.
+    """
+    if expected_response_model is None:
+        return None
     try:
-        response = requests.request(method, endpoint, timeout=timeout, **kwargs)
-        apiresponse = APIResponse(response)
-        if expected_response_model is not None:
-            try:
-                adapter = TypeAdapter(expected_response_model)
-                model = adapter.validate_python(apiresponse.json)
-            except ValidationError:
-                model = None
-        else:
-            model = None
-        apiresponse.model = model
-        return apiresponse
-    except requests.exceptions.Timeout:
-        return APIResponse(error='Request timed out', status=ResponseStatus.TIMEOUT)
-    except requests.exceptions.ConnectionError:
-        return APIResponse(error='Connection error', status=ResponseStatus.CONNECTION_ERROR)
-    except Exception as e:
-        return APIResponse(error=str(e), status=ResponseStatus.UNKNOWN_ERROR)
+        return _adapter(expected_response_model).validate_python(apiresponse.json)
+    except ValidationError:
+        return None
+
+
+def _iter_ndjson(response: requests.Response, adapter: TypeAdapter) -> Iterator:
+    """
+    Internal method to parse a streamed newline delimited JSON response, one line at a time.
+    :param response: The streamed response.
+    :param adapter: The adapter to validate each line with.
+    :return: Iterator of the validated lines. The response is closed once it is exhausted.
+    """
+    with response:
+        for line in response.iter_lines():
+            if line:
+                yield adapter.validate_json(line)
 
 
 def get_inventory(url: str = BASE_URL, timeout: int = 5) -> APIResponse:
@@ -144,39 +318,95 @@ def get_inventory(url: str = BASE_URL, timeout: int = 5) -> APIResponse:
     :param timeout: The timeout in seconds to make the API request.
     :return: APIResponse object representing the API response.
     """
-    return _make_request(expected_response_model=List[ItemResponse], method='GET', endpoint=f'{url}/items',
-                         timeout=timeout)
+    return shared_client(url).get_inventory(timeout)
 
 
 def get_logs(item_name: str = None, student_id: str = None, weekday: WeekdayModel = None, type: ActionTypeModel = None,
+             start_date: datetime.date = None, end_date: datetime.date = None, limit: int = None, cursor: str = None,
              url: str = BASE_URL, timeout: int = 5) -> APIResponse:
     """
     Make a request to get a list of all logs.
     If successful, the returned APIResponse's model will be set to a List[TransactionResponse]
+    If limit is given and there are more logs, the response's NEXT_CURSOR_HEADER header holds the cursor for the next
+    page. See iter_logs to go through every page.
 
     :param item_name: The name of the item to search logs for.
     :param student_id: The student ID to search logs for.
     :param weekday: The day of the week to search logs for.
     :param type: The type of action to search logs for.
+    :param start_date: The earliest date to search logs for.
+    :param end_date: The latest date to search logs for.
+    :param limit: The maximum number of logs to return.
+    :param cursor: The cursor of the page to get, from a previous response.
     :param url: The URL to make the API request.
     :param timeout: The timeout in seconds to make the API request.
     :return: APIResponse object representing the API response.
     """
+    return shared_client(url).get_logs(item_name, student_id, weekday, type, start_date, end_date, limit, cursor,
+                                       timeout)
+
+
+def iter_logs(item_name: str = None, student_id: str = None, weekday: WeekdayModel = None, type: ActionTypeModel = None,
+              start_date: datetime.date = None, end_date: datetime.date = None, page_size: int = 500,
+              url: str = BASE_URL, timeout: int = 5) -> Iterator[APIResponse]:
+    """
+    Lazily goes through every page of logs, only requesting the next page once the previous one has been consumed.
+    If successful, each APIResponse's model will be set to a List[TransactionResponse].
+    Iteration stops after the last page, or after the first response that wasn't successful.
+
+    :param item_name: The name of the item to search logs for.
+    :param student_id: The student ID to search logs for.
+    :param weekday: The day of the week to search logs for.
+    :param type: The type of action to search logs for.
+    :param start_date: The earliest date to search logs for.
+    :param end_date: The latest date to search logs for.
+    :param page_size: The number of logs to request per page.
+    :param url: The URL to make the API request.
+    :param timeout: The timeout in seconds to make each API request.
+    :return: Iterator of APIResponse objects, one per page.
+    """
+    return shared_client(url).iter_logs(item_name, student_id, weekday, type, start_date, end_date, page_size, timeout)
+
+
+def stream_logs(item_name: str = None, student_id: str = None, weekday: WeekdayModel = None,
+                type: ActionTypeModel = None, start_date: datetime.date = None, end_date: datetime.date = None,
+                url: str = BASE_URL, timeout: int = 5) -> APIResponse:
+    """
+    Make a request to stream every matching log, without holding the whole history in memory.
+    If successful, the returned APIResponse's model will be set to an Iterator[TransactionResponse] that parses each log
+    as it arrives. The connection stays open until the iterator is exhausted or the response is closed.
+
+    :param item_name: The name of the item to search logs for.
+    :param student_id: The student ID to search logs for.
+    :param weekday: The day of the week to search logs for.
+    :param type: The type of action to search logs for.
+    :param start_date: The earliest date to search logs for.
+    :param end_date: The latest date to search logs for.
+    :param url: The URL to make the API request.
+    :param timeout: The timeout in seconds to wait for the server to send data.
+    :return: APIResponse object representing the API response.
+    """
+    return shared_client(url).stream_logs(item_name, student_id, weekday, type, start_date, end_date, timeout)
 
-    options = []
-    if item_name:
-        options.append(f'item_name={item_name}')
-    if student_id:
-        options.append(f'student_id={student_id}')
-    if weekday:
-        options.append(f'day_of_week={weekday}')
-    if type:
-        options.append(f'action={type}')
 
-    opt_str = '&'.join(options)
-    return _make_request(expected_response_model=List[TransactionResponse], method='GET',
-                         endpoint=f'{url}/logs?{opt_str}',
-                         timeout=timeout)
+def _logs_params(item_name: str = None, student_id: str = None, weekday: WeekdayModel = None,
+                 type: ActionTypeModel = None, start_date: datetime.date = None, end_date: datetime.date = None,
+                 **kwargs) -> dict:
+    """
+    Builds the query parameters for the /logs filters, leaving out filters that aren't set.
+    :param kwargs: Additional query parameters.
+    :return: The query parameters.
+    """
+    params = {
+        'item_name': item_name,
+        'student_id': student_id,
+        'day_of_week': weekday.value if isinstance(weekday, WeekdayModel) else weekday,
+        'action': type.value if isinstance(type, ActionTypeModel) else type,
+        'start_date': start_date.isoformat() if start_date else None,
+        'end_date': end_date.isoformat() if end_date else None,
+        **kwargs
+    }
+    return {key: value for key, value in params.items() if value is not None and value != ''}
 
 
 def get_item(item_name: str, url: str = BASE_URL, timeout: int = 5) -> APIResponse:
@@ -188,8 +418,7 @@ def get_item(item_name: str, url: str = BASE_URL, timeout: int = 5) -> APIRespon
     :param timeout: The timeout in seconds to make the API request.
     :return: APIResponse object representing the API response.
     """
-    return _make_request(expected_response_model=ItemResponse, method='GET', endpoint=f'{url}/items/{item_name}',
-                         timeout=timeout)
+    return shared_client(url).get_item(item_name, timeout)
 
 
 def restock_item(item: ItemRequest, url: str = BASE_URL, timeout: int = 5) -> APIResponse:
@@ -201,8 +430,7 @@ def restock_item(item: ItemRequest, url: str = BASE_URL, timeout: int = 5) -> AP
     :param timeout: The timeout in seconds to make the API request.
     :return: APIResponse object representing the API response.
     """
-    return _make_request(expected_response_model=MessageResponse, method='POST', endpoint=f'{url}/restock',
-                         timeout=timeout, json=item.model_dump())
+    return shared_client(url).restock_item(item, timeout)
 
 
 def checkout_item(item: ItemRequest, url: str = BASE_URL, timeout: int = 5) -> APIResponse:
@@ -214,8 +442,7 @@ def checkout_item(item: ItemRequest, url: str = BASE_URL, timeout: int = 5) -> A
     :param timeout: The timeout in seconds to make the API request.
     :return: APIResponse object representing the API response.
     """
-    return _make_request(expected_response_model=MessageResponse, method='POST', endpoint=f'{url}/checkout',
-                         timeout=timeout, json=item.model_dump())
+    return shared_client(url).checkout_item(item, timeout)
 
 
 def checkout_items(items: MultiItemRequest, url: str = BASE_URL, timeout: int = 5) -> APIResponse:
@@ -227,9 +454,7 @@ def checkout_items(items: MultiItemRequest, url: str = BASE_URL, timeout: int =
     :param timeout: The timeout in seconds to make the API request.
     :return: APIResponse object representing the API response
     """
-
-    return _make_request(expected_response_model=MessageResponse, method='POST', endpoint=f'{url}/checkout',
-                         timeout=timeout, json=items.model_dump())
+    return shared_client(url).checkout_items(items, timeout)
 
 
 def create_item(item: CreateRequest, url: str = BASE_URL,
@@ -242,9 +467,19 @@ def create_item(item: CreateRequest, url: str = BASE_URL,
     :param timeout: The timeout in seconds to make the API request.
     :return: APIResponse object representing the API response.
     """
-    return _make_request(expected_response_model=MessageResponse, method='POST', endpoint=f'{url}/create',
-                         timeout=timeout,
-                         json=item.model_dump())
+    return shared_client(url).create_item(item, timeout)
+
+
+def bulk_upsert_items(items: BulkRequest, url: str = BASE_URL, timeout: int = 5) -> APIResponse:
+    """
+    Make a request to create or restock many items in one transaction.
+    If successful, the returned APIResponse's model will be set to a BulkResponse
+    :param items: Model containing the rows to apply. At most 5000 rows are accepted per request.
+    :param url: The URL to make the API request.
+    :param timeout: The timeout in seconds to make the API request.
+    :return: APIResponse object representing the API response.
+    """
+    return shared_client(url).bulk_upsert_items(items, timeout)
 
 
 def delete_all_items(url: str = BASE_URL, timeout: int = 5) -> APIResponse:
@@ -255,5 +490,4 @@ def delete_all_items(url: str = BASE_URL, timeout: int = 5) -> APIResponse:
     :param timeout: The timeout in seconds to make the API request.
     :return: The APIResponse object representing the API response.
     """
-    return _make_request(expected_response_model=MessageResponse, method='DELETE', endpoint=f'{url}/delete_all',
-                         timeout=timeout)
+    return shared_client(url).delete_all_items(timeout)
@@ -0,0 +1,191 @@
+"""
+Analytics report benchmark.
+
+Fills a database with a multi-year history of checkout lines, then times every report type computed by the loops the
+analytics page used to run over /logs results, by the pandas engine on one process and on a process pool, and by the
+SQL queries over the daily_item_stats rollup. Every method is checked against the loops before it is timed.
+
+Run from the repository root with `python -m benchmarks.analytics_engine`.
+"""
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import analytics_engine
+import server
+from models.request_schemas import ActionTypeModel, PopularityOrderModel
+from models.response_schemas import TransactionResponse
+
+ITEM_COUNT = 200
+LINES_PER_CHECKOUT = 2
+REPORTS = ['popular frequency', 'popular quantity', 'least popular', 'peak days', 'specific item']
+ITEM_NAME = 'item 1'  # the most popular item
+FILL_CHUNK_SIZE = 50_000
+
+
+def fill(session_factory, lines: int, years: int) -> None:
+    """
+    Inserts items and checkouts with LINES_PER_CHECKOUT lines each, spread evenly over the given number of years.
+    :param session_factory: Session factory bound to the benchmark database.
+    :param lines: The total number of checkout lines.
+    :param years: The number of years the history covers.
+    """
+    rng = random.Random(447)
+    start = datetime.datetime(2020, 1, 1)
+    seconds = years * 365 * 24 * 60 * 60
+    checkouts = lines // LINES_PER_CHECKOUT
+
+    with session_factory() as db:
+        db.execute(insert(server.Item), [{'name': f'item {n}', 'stock': 0, 'max_checkout': 10}
+                                         for n in range(ITEM_COUNT)])
+        for chunk in range(0, checkouts, FILL_CHUNK_SIZE):
+            ids = range(chunk, min(chunk + FILL_CHUNK_SIZE, checkouts))
+            db.execute(insert(server.Transaction), [
+                {'id': n + 1, 'action': ActionTypeModel.CHECKOUT, 'student_id': f'student {n % 500}',
+                 'timestamp': start + datetime.timedelta(seconds=seconds * n // checkouts)}
+                for n in ids])
+            # popular items are picked more often, and an item appears at most once per checkout
+            db.execute(insert(server.TransactionItem), [
+                {'transaction_id': n + 1, 'item_name': name, 'item_quantity': rng.randint(1, 10)}
+                for n in ids
+                for name in {f'item {int(rng.paretovariate(1.2)) % ITEM_COUNT}' for _ in range(LINES_PER_CHECKOUT)}])
+        server.backfill_daily_item_stats(db)
+        db.commit()
+
+
+def loop_report(report: str, logs: list[TransactionResponse]) -> list[tuple]:
+    """
+    The report math the analytics page ran over /logs results before the /analytics endpoints existed.
+    :return: The report as (key, value) rows, or (frequency, quantity, rows) for the specific item report.
+    """
+    if report in ('popular frequency', 'least popular', 'popular quantity'):
+        item_count = {}
+        for log in logs:
+            for item in log.items:
+                if item.item_name.startswith('[DELETED]'):
+                    continue
+                if item.item_name not in item_count:
+                    item_count[item.item_name] = 0
+                item_count[item.item_name] += 1 if report != 'popular quantity' else item.item_quantity
+        return sorted(item_count.items(), key=lambda x: x[1], reverse=report != 'least popular')
+
+    if report == 'peak days':
+        day_count = {}
+        for log in logs:
+            log_date = log.timestamp.date()
+            if log_date not in day_count:
+                day_count[log_date] = 0
+            day_count[log_date] += 1
+        return sorted(day_count.items(), key=lambda x: x[1], reverse=True)
+
+    item_quantity = 0
+    item_frequency = 0
+    highest_quantity_days = {}
+    for log in logs:
+        item_frequency += 1
+        if log.timestamp.date() not in highest_quantity_days:
+            highest_quantity_days[log.timestamp.date()] = 0
+        for item in log.items:
+            if item.item_name != ITEM_NAME:
+                continue
+            highest_quantity_days[log.timestamp.date()] += item.item_quantity
+            item_quantity += item.item_quantity
+    return [item_frequency, item_quantity, sorted(highest_quantity_days.items(), key=lambda x: x[1], reverse=True)]
+
+
+def run_loops(session_factory, report: str):
+    with session_factory() as db:
+        logs = server.get_logs(db=db, action=ActionTypeModel.CHECKOUT,
+                               item_name=ITEM_NAME if report == 'specific item' else None)
+    return loop_report(report, logs)
+
+
+def run_pandas(session_factory, report: str, workers: int):
+    bind = session_factory.kw['bind']
+    if report == 'peak days':
+        return [(day.date, day.frequency) for day in analytics_engine.peak_days(bind, workers=workers)]
+    if report == 'specific item':
+        result = analytics_engine.item_report(bind, ITEM_NAME)
+        return [result.frequency, result.quantity, [(day.date, day.quantity) for day in result.days]]
+    result = analytics_engine.popular_items(bind, order_by=_order_by(report), least=report == 'least popular',
+                                            workers=workers)
+    return [(item.item_name, item.quantity if report == 'popular quantity' else item.frequency) for item in result]
+
+
+def run_sql(session_factory, report: str):
+    server.settings.analytics_engine = 'sql'
+    with session_factory() as db:
+        if report == 'peak days':
+            return [(day.date, day.frequency) for day in server.get_peak_days(db=db)]
+        if report == 'specific item':
+            result = server.get_item_report(ITEM_NAME, db=db)
+            return [result.frequency, result.quantity, [(day.date, day.quantity) for day in result.days]]
+        result = server.get_popular_items(db=db, order_by=_order_by(report), least=report == 'least popular')
+        return [(item.item_name, item.quantity if report == 'popular quantity' else item.frequency)
+                for item in result]
+
+
+def _order_by(report: str) -> PopularityOrderModel:
+    return PopularityOrderModel.QUANTITY if report == 'popular quantity' else PopularityOrderModel.FREQUENCY
+
+
+def _same_result(report: str, expected, actual) -> bool:
+    """Compares results ignoring the order of ties, which the loops leave in insertion order."""
+    if report == 'specific item':
+        # the loops count every checkout in the item's logs, which is every checkout the item was in
+        return expected[:2] == actual[:2] and sorted(expected[2]) == sorted(actual[2])
+    if report == 'least popular':
+        # the loops only know about items that were checked out, the endpoints include every item
+        expected, actual = [row for row in expected if row[1] > 0], [row for row in actual if row[1] > 0]
+    return sorted(expected) == sorted(actual) and [value for _, value in expected] == [value for _, value in actual]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Analytics report benchmark')
+    parser.add_argument('--lines', '-n', type=int, default=1_000_000, help='Number of checkout lines in the history')
+    parser.add_argument('--years', '-y', type=int, default=3, help='Number of years the history covers')
+    parser.add_argument('--workers', '-w', type=int, default=os.cpu_count() or 1,
+                        help='Processes used by the partitioned pandas engine')
+    parser.add_argument('--skip-loops', action='store_true',
+                        help='Skip timing the loops, which build a Pydantic object for every log')
+    parser.add_argument('--dir', '-d', type=str, default=None,
+                        help='Directory for the benchmark database (defaults to a temporary directory)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp_dir:
+        engine = create_engine(f'sqlite:///{os.path.join(tmp_dir, "bench.db")}')
+        server.migrate_database(engine)
+        session_factory = sessionmaker(bind=engine)
+
+        start = time.perf_counter()
+        fill(session_factory, args.lines, args.years)
+        print(f'Filled {args.lines} lines over {args.years} years in {time.perf_counter() - start:.1f}s')
+
+        methods = {'pandas': lambda report: run_pandas(session_factory, report, workers=1),
+                   f'pandas x{args.workers}': lambda report: run_pandas(session_factory, report, args.workers),
+                   'sql rollup': lambda report: run_sql(session_factory, report)}
+        if not args.skip_loops:
+            methods = {'loops': lambda report: run_loops(session_factory, report), **methods}
+
+        print(f'{"report":>18} ' + ' '.join(f'{name:>12}' for name in methods))
+        for report in REPORTS:
+            timings = []
+            expected = None
+            for name, method in methods.items():
+                start = time.perf_counter()
+                result = method(report)
+                timings.append(time.perf_counter() - start)
+
+                if expected is None:
+                    expected = result
+                elif not _same_result(report, expected, result):
+                    raise SystemExit(f'{name} returned a different {report} report')
+            print(f'{report:>18} ' + ' '.join(f'{timing:>11.2f}s' for timing in timings))
+
+        engine.dispose()
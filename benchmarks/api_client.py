@@ -0,0 +1,82 @@
+"""
+API client benchmark.
+
+Starts the server on a temporary database and measures requests per second for GET /items/{name} made the way the
+client used to make them, with a new connection and TypeAdapter for every call, and through InventoryClient, which
+reuses pooled keep-alive connections and cached adapters. Both are run from one thread and from several threads
+sharing a client.
+
+Run from the repository root with `python -m benchmarks.api_client`.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import uvicorn
+from pydantic import TypeAdapter
+
+from api.inventoryapi import InventoryClient
+from models.request_schemas import CreateRequest
+from models.response_schemas import ItemResponse
+
+ITEM_NAME = 'benchmark item'
+
+
+def start_server(database_url: str, port: int) -> uvicorn.Server:
+    """Runs the API in a background thread, returning once it accepts requests."""
+    os.environ['INVENTORY_DATABASE_URL'] = database_url
+    # the server reads its settings when it is imported
+    import server
+    server.migrate_database(server.engine)
+
+    uvicorn_server = uvicorn.Server(uvicorn.Config(server.app, port=port, log_level='warning'))
+    threading.Thread(target=uvicorn_server.run, daemon=True).start()
+    while not uvicorn_server.started:
+        time.sleep(0.05)
+    return uvicorn_server
+
+
+def unpooled_get_item(url: str) -> bool:
+    """The request the client made before InventoryClient: a new connection and TypeAdapter every call."""
+    response = requests.request('GET', f'{url}/items/{ITEM_NAME}', timeout=5)
+    TypeAdapter(ItemResponse).validate_python(response.json())
+    return response.status_code == 200
+
+
+def measure(get_item, requests_count: int, threads: int) -> float:
+    """Makes requests_count requests spread over threads, returning requests per second."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        results = list(executor.map(lambda _: get_item(), range(requests_count)))
+    elapsed = time.perf_counter() - start
+    if not all(results):
+        raise SystemExit('a request failed')
+    return requests_count / elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='API client benchmark')
+    parser.add_argument('--requests', '-n', type=int, default=2000, help='Number of requests per measurement')
+    parser.add_argument('--threads', '-t', type=int, nargs='+', default=[1, 8], help='Numbers of client threads')
+    parser.add_argument('--port', '-p', type=int, default=8010, help='Port for the benchmark server')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        uvicorn_server = start_server(f'sqlite:///{os.path.join(tmp_dir, "bench.db")}', args.port)
+        url = f'http://127.0.0.1:{args.port}'
+
+        with InventoryClient(url, pool_size=max(args.threads)) as client:
+            client.create_item(CreateRequest(name=ITEM_NAME, initial_stock=1, max_checkout=1))
+            methods = {'unpooled': lambda: unpooled_get_item(url),
+                       'InventoryClient': lambda: client.get_item(ITEM_NAME).is_success}
+
+            print(f'{"threads":>8} ' + ' '.join(f'{name:>16}' for name in methods))
+            for threads in args.threads:
+                rates = [measure(method, args.requests, threads) for method in methods.values()]
+                print(f'{threads:>8} ' + ' '.join(f'{rate:>12.0f} r/s' for rate in rates))
+
+        uvicorn_server.should_exit = True
@@ -0,0 +1,86 @@
+"""
+Multi-threaded contention benchmark for /checkout.
+
+Several clients repeatedly check out single units of the same item until it runs out. Every run checks that the
+number of successful checkouts matches the starting stock exactly (no oversell) and that stock never goes below zero,
+then reports throughput for each number of concurrent clients.
+
+Run from the repository root with `python -m benchmarks.checkout_contention`.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import server
+from models.request_schemas import ItemRequest, CreateRequest
+from models.response_schemas import MessageResponse
+
+ITEM_NAME = 'contended item'
+
+
+def run(session_factory, clients: int, stock: int) -> tuple[int, int, float]:
+    """
+    Runs a single round of the benchmark.
+    :param session_factory: Session factory bound to the benchmark database.
+    :param clients: The number of concurrent clients.
+    :param stock: The stock to start the item with.
+    :return: A tuple of (successful checkouts, final stock, elapsed seconds).
+    """
+    with session_factory() as db:
+        server.delete_all_items(db=db)
+        server.create_item(CreateRequest(name=ITEM_NAME, initial_stock=stock, max_checkout=1), server.Response(), db=db)
+
+    successes = [0] * clients
+    start_barrier = threading.Barrier(clients)
+
+    def client(index: int):
+        start_barrier.wait()
+        with session_factory() as db:
+            while True:
+                result = server.checkout_item(ItemRequest(name=ITEM_NAME, quantity=1, student_id=str(index)), db=db)
+                if not isinstance(result, MessageResponse):
+                    # out of stock, every other response is a failure
+                    break
+                successes[index] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    with session_factory() as db:
+        final_stock = db.query(server.Item).filter_by(name=ITEM_NAME).one().stock
+
+    return sum(successes), final_stock, elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Checkout contention benchmark')
+    parser.add_argument('--stock', '-s', type=int, default=500, help='Starting stock for each round')
+    parser.add_argument('--clients', '-c', type=str, default='1,2,4,8,16',
+                        help='Comma separated list of concurrent client counts')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(f'sqlite:///{os.path.join(tmp_dir, "bench.db")}', connect_args={'timeout': 30})
+        server.Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+
+        print(f'{"clients":>8} {"checkouts":>10} {"final stock":>12} {"seconds":>8} {"checkouts/s":>12}')
+        for clients in [int(count) for count in args.clients.split(',')]:
+            checkouts, final_stock, elapsed = run(session_factory, clients, args.stock)
+            print(f'{clients:>8} {checkouts:>10} {final_stock:>12} {elapsed:>8.2f} {checkouts / elapsed:>12.1f}')
+
+            if checkouts != args.stock or final_stock != 0:
+                raise SystemExit(f'Oversell detected: {checkouts} checkouts from a stock of {args.stock}, '
+                                 f'final stock {final_stock}')
+
+        engine.dispose()
@@ -0,0 +1,107 @@
+"""
+Group commit benchmark for /restock.
+
+Concurrent clients each send a stream of single-item restocks, first committed one transaction per request and then
+through a GroupCommitWriter. Reports requests/s and commits/s for both modes.
+Results depend heavily on fsync latency, so run it against the same kind of disk as the real database.
+
+Run from the repository root with `python -m benchmarks.group_commit`.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from functools import partial
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import server
+from group_commit import GroupCommitWriter
+from models.request_schemas import CreateRequest, ItemRequest
+from models.response_schemas import MessageResponse
+
+ITEM_COUNT = 20
+
+
+def run(session_factory, clients: int, requests_per_client: int, writer: GroupCommitWriter | None) -> float:
+    """
+    Runs a single round of the benchmark.
+    :param session_factory: Session factory bound to the benchmark database.
+    :param clients: The number of concurrent clients.
+    :param requests_per_client: The number of restocks each client sends.
+    :param writer: The group commit writer to use, or None to commit every request on its own.
+    :return: The elapsed time in seconds.
+    """
+    start_barrier = threading.Barrier(clients)
+    failures = []
+
+    def client(index: int):
+        start_barrier.wait()
+        with session_factory() as db:
+            for i in range(requests_per_client):
+                request = server._aggregate_request(ItemRequest(name=f'item {(index + i) % ITEM_COUNT}', quantity=1))
+                apply = partial(server._restock, multi_request=request)
+
+                if writer is None:
+                    response = server._write(db, apply)
+                else:
+                    response = writer.submit(apply)
+
+                if not isinstance(response, MessageResponse):
+                    failures.append(response)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if failures:
+        raise SystemExit(f'{len(failures)} restocks failed')
+    return elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Group commit benchmark')
+    parser.add_argument('--clients', '-c', type=int, default=16, help='Number of concurrent clients')
+    parser.add_argument('--requests', '-r', type=int, default=50, help='Restocks sent by each client')
+    parser.add_argument('--max-batch', type=int, default=64, help='Group commit max batch size')
+    parser.add_argument('--max-wait-ms', type=float, default=5, help='Group commit max wait time in milliseconds')
+    parser.add_argument('--dir', '-d', type=str, default=None,
+                        help='Directory for the benchmark database (defaults to a temporary directory)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp_dir:
+        engine = create_engine(f'sqlite:///{os.path.join(tmp_dir, "bench.db")}', connect_args={'timeout': 30})
+        server.Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+        with session_factory() as db:
+            for n in range(ITEM_COUNT):
+                server.create_item(CreateRequest(name=f'item {n}', initial_stock=0, max_checkout=1),
+                                   server.Response(), db=db)
+
+        total = args.clients * args.requests
+        print(f'{"mode":>14} {"requests":>9} {"commits":>8} {"seconds":>8} {"requests/s":>11} {"commits/s":>10}')
+
+        elapsed = run(session_factory, args.clients, args.requests, writer=None)
+        print(f'{"per request":>14} {total:>9} {total:>8} {elapsed:>8.2f} {total / elapsed:>11.1f} '
+              f'{total / elapsed:>10.1f}')
+
+        writer = GroupCommitWriter(session_factory, server.log_actions, max_batch_size=args.max_batch,
+                                   max_wait=args.max_wait_ms / 1000)
+        elapsed = run(session_factory, args.clients, args.requests, writer=writer)
+        writer.close()
+        print(f'{"group commit":>14} {total:>9} {writer.batches:>8} {elapsed:>8.2f} {total / elapsed:>11.1f} '
+              f'{writer.batches / elapsed:>10.1f}')
+
+        with session_factory() as db:
+            stock = sum(item.stock for item in db.query(server.Item))
+            logged = db.query(server.TransactionItem).count()
+        if stock != 2 * total or logged != 2 * total:
+            raise SystemExit(f'Expected {2 * total} units restocked and logged, got {stock} and {logged}')
+
+        engine.dispose()
@@ -0,0 +1,44 @@
+"""
+Item search benchmark.
+
+Builds the /items/search index over a generated catalog and times queries of different selectivity, from a single
+letter matching most of the catalog to several words matching a handful of items.
+
+Run from the repository root with `python -m benchmarks.item_search`.
+"""
+import argparse
+import random
+import time
+
+from item_search import ItemSearchIndex
+
+WORDS = ['apple', 'bar', 'beans', 'blue', 'bread', 'cereal', 'chips', 'granola', 'juice', 'milk', 'oat', 'paper',
+         'pasta', 'pen', 'pencil', 'red', 'rice', 'sauce', 'soup', 'tea']
+QUERIES = ['p', 'pen', 'Granola Bar', 'bar granola', 'bread tea milk', 'p b', 'zzz']
+
+
+def catalog(items: int) -> list[str]:
+    """Generates unique item names of three words and a number."""
+    rng = random.Random(447)
+    return [f'{" ".join(rng.sample(WORDS, 3)).title()} {n}' for n in range(items)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Item search benchmark')
+    parser.add_argument('--items', '-n', type=int, default=10_000, help='Number of items in the catalog')
+    parser.add_argument('--repeat', '-r', type=int, default=1000, help='Number of times each query is run')
+    parser.add_argument('--limit', '-l', type=int, default=10, help='Number of results per query')
+    args = parser.parse_args()
+
+    names = catalog(args.items)
+    start = time.perf_counter()
+    index = ItemSearchIndex(names)
+    print(f'Indexed {len(index)} items in {(time.perf_counter() - start) * 1000:.1f}ms')
+
+    print(f'{"query":>16} {"results":>8} {"per query":>12}')
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            results = index.search(query, args.limit)
+        per_query = (time.perf_counter() - start) / args.repeat
+        print(f'{query:>16} {len(results):>8} {per_query * 1_000_000:>10.1f}us')
@@ -3,8 +3,8 @@ import os
 
 from dotenv import load_dotenv
 
-from api.inventoryapi import get_inventory, get_logs, restock_item, checkout_item, delete_all_items, get_item, \
-    create_item, checkout_items
+from api.inventoryapi import get_inventory, iter_logs, stream_logs, restock_item, checkout_item, delete_all_items, \
+    get_item, create_item, checkout_items
 from models.request_schemas import ItemRequest, MultiItemRequest, CreateRequest
 
 load_dotenv()
@@ -26,6 +26,8 @@ if __name__ == '__main__':
                         help='Max amount that can be checked out at a time (required for create)')
     parser.add_argument('--local', '-l', action='store_true')
     parser.add_argument('--id', '-i', help='Student ID for use in checkout', type=str)
+    parser.add_argument('--page-size', type=int, default=500, help='Number of logs to fetch per request (for logs)')
+    parser.add_argument('--stream', action='store_true', help='Print logs one row at a time as they arrive (for logs)')
     args = parser.parse_args()
 
     url = 'http://127.0.0.1:8001' if args.local else BASE_URL
@@ -34,7 +36,21 @@ if __name__ == '__main__':
     if args.action == 'inventory':
         print(get_inventory(url=url).formatted_string())
     elif args.action == 'logs':
-        print(get_logs(url=url).formatted_string())
+        if args.stream:
+            res = stream_logs(url=url)
+            if not res.is_success:
+                print(res.formatted_string())
+            else:
+                # rows are printed as they arrive, so columns are fixed width instead of tabulated
+                print(f'{"id":>8}  {"timestamp":<19}  {"action":<8}  {"day":<9}  {"student_id":<10}  items')
+                for log in res.model:
+                    items = ', '.join(f'{item.item_name} x{item.item_quantity}' for item in log.items)
+                    print(f'{log.transaction_id:>8}  {log.timestamp.isoformat(sep=" "):<19}  {log.action:<8}  '
+                          f'{log.day_of_week:<9}  {log.student_id or "":<10}  {items}')
+        else:
+            # print one page at a time instead of loading the whole history
+            for page in iter_logs(page_size=args.page_size, url=url):
+                print(page.formatted_string())
     elif args.action == 'restock':
         if not args.name or args.quantity is None:
             print('Error: --name and --quantity are required for restock.')
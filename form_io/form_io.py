@@ -11,16 +11,28 @@
 ################################################################################
 
 import csv
+from itertools import chain
+from typing import Iterator
+
+import openpyxl
 import pandas as pd
 
 
 from api import inventoryapi
 from api.inventoryapi import APIResponse, ResponseStatus
-from models.request_schemas import CreateRequest, ItemRequest, MultiItemRequest, ActionTypeModel, WeekdayModel
+from models.request_schemas import ItemRequest, MultiItemRequest, ActionTypeModel, WeekdayModel
+from models.request_schemas import BulkItemRequest, BulkRequest
 from models.response_schemas import ItemResponse, TransactionResponse, MessageResponse, TransactionItemResponse
+from models.response_schemas import BulkResponse
 
 # can't get url in some cases so I might have to utilize server instead of api:
-from server import db_context, get_items
+from server import inventory_snapshot, chunked
+
+
+# number of rows sent to the server per /items/bulk request when importing
+IMPORT_CHUNK_SIZE = 500
+# the default max checkout of items created by an import
+IMPORT_MAX_CHECKOUT = 5
 
 
 # ***********************
@@ -28,11 +40,15 @@ from server import db_context, get_items
 # ***********************    
 
 # file format: first col should be product name, last col quantity (other cols ignored)
-# TODO: throw errors
 # TODO: write pertinent tests
-# TODO: detect headers
-def read_csv(csvfile):
-    
+def iter_csv(csvfile) -> Iterator[list]:
+    """
+    Reads [name, quantity] rows from a csv file one at a time, so the file is never held in memory whole.
+    Blank lines are skipped.
+    :param csvfile: The open text file, which must be seekable to detect the dialect and header
+    :return: A generator of [name, quantity] rows
+    :raises ValueError: If a row's quantity is not an integer, with the line it is on
+    """
     # detect dialect with sample from csvfile
     dialect = csv.Sniffer().sniff(csvfile.read(1024))
     csvfile.seek(0)
@@ -45,36 +61,100 @@ def read_csv(csvfile):
     # ignore header if detected
     if header_detected:
         next(freader)
-        
-    # convert to list
-    data = []
+
     for row in freader:
-        data.append([row[0], int(row[-1])])
-        
-    return data
+        if not row or not ''.join(row).strip():
+            continue
+        try:
+            yield [row[0], int(row[-1])]
+        except ValueError:
+            raise ValueError(f'Line {freader.line_num}: quantity {row[-1]!r} is not an integer') from None
+
+
+def read_csv(csvfile):
+    return list(iter_csv(csvfile))
 
 # file format: first col should be product name, last col quantity (other cols ignored)
-# TODO: throw errors
 # TODO: write pertinent tests
-# TODO: detect headers
+def iter_excel(xlsxfile) -> Iterator[list]:
+    """
+    Reads [name, quantity] rows from the first sheet of an excel (.xlsx) file in a single pass.
+    The workbook is opened in read only mode, so rows are parsed as they are read and memory stays bounded however
+    large the sheet is. Blank rows are skipped.
+    :param xlsxfile: The path or open binary file of the workbook
+    :return: A generator of [name, quantity] rows
+    :raises ValueError: If a row's quantity is blank or not a whole number, with the row it is on
+    """
+    workbook = openpyxl.load_workbook(xlsxfile, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        first_row = next(rows, None)
+        if first_row is None:
+            return
+
+        # simpler hacky algorithm... the first row is a header if none of its cells is an integer
+        header_detected = not any(_is_int(cell) for cell in first_row)
+        # the quantity is the last column of the first row, read only sheets leave the shorter rows unpadded
+        width = len(first_row)
+        while width > 1 and _is_blank(first_row[width - 1]):
+            width -= 1
+
+        for line, row in enumerate(rows if header_detected else chain([first_row], rows), 2 if header_detected else 1):
+            if all(_is_blank(cell) for cell in row):
+                continue
+            row = tuple(row) + (None,) * (width - len(row))
+            yield ['' if row[0] is None else str(row[0]), _quantity(row[width - 1], line)]
+    finally:
+        workbook.close()
+
+
 def read_excel(xlsxfile):
+    return list(iter_excel(xlsxfile))
 
-    # first detect if the first row is a header
-    # simpler hacky algorithm... just detect if there are no integers in the first row
-    header_detected = True
-    first_line = pd.read_excel(xlsxfile, header=None, nrows=1)
-    for cell in first_line.values.tolist()[0]:
+
+def _quantity(cell, line: int) -> int:
+    """
+    Reads the quantity cell of an excel row, which may hold an int, a whole float or a numeric string.
+    :raises ValueError: If the cell is blank or not a whole number, with the row it is on
+    """
+    if _is_blank(cell):
+        raise ValueError(f'Row {line}: quantity is blank')
+    if isinstance(cell, float) and cell.is_integer():
+        return int(cell)
+    if isinstance(cell, str):
+        cell = cell.strip()
+    if isinstance(cell, (int, str)) and not isinstance(cell, bool):
         try:
-            int(cell)
-            # integer detected
-            header_detected = False
-            break
+            return int(cell)
         except ValueError:
-            continue
-    
-    data = pd.read_excel(xlsxfile, header = 0 if header_detected else None)
-    # extract data from the first and last columns, then convert to list format
-    return data[data.columns[0::len(data.columns)-1]].values.tolist()
+            pass
+    raise ValueError(f'Row {line}: quantity {cell!r} is not a whole number')
+
+
+def _is_blank(cell) -> bool:
+    return cell is None or (isinstance(cell, str) and not cell.strip())
+
+
+def _is_int(cell) -> bool:
+    try:
+        int(cell)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def read_file(filename) -> Iterator[list]:
+    """
+    Reads [name, quantity] rows from a csv or excel (.xlsx) file.
+    :param filename: The path of the file
+    :return: A generator of [name, quantity] rows
+    """
+    if str(filename).endswith('.xlsx'):
+        yield from iter_excel(filename)
+        return
+
+    with open(filename, newline='', encoding='utf-8') as csvfile:
+        yield from iter_csv(csvfile)
 
 
 # data format: list of 2-len ['name', quantity] lists
@@ -105,31 +185,31 @@ def write_file(filename, data):
 
 # TODO: throw errors
 # TODO: better handle db response codes
-def db_import(url, filename):
-    # get relevant data from file
-    data = read_file(filename)
-    
-    # put data into DB
-    with db_context() as db:
-        items = get_items(db)
-
-    for row in data:
-        request = CreateRequest(
-            name=row[0],
-            initial_stock=row[1],
-            max_checkout=5
-        )
+def db_import(url, filename, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Creates or restocks the items in a csv or excel file, sending chunk_size rows per request. Each chunk is applied
+    in one transaction on the server, and the file is read one chunk at a time.
+    :param url: The URL of the server
+    :param filename: The path of the file
+    :param chunk_size: The number of rows per request
+    """
+    for chunk in chunked(read_file(filename), chunk_size):
+        request = BulkRequest(items=[BulkItemRequest(name=name, quantity=quantity, max_checkout=IMPORT_MAX_CHECKOUT)
+                                     for name, quantity in chunk])
 
         # send request to db
-        res: APIResponse = inventoryapi.create_item(item=request, url=url, timeout=50)
+        res: APIResponse = inventoryapi.bulk_upsert_items(items=request, url=url, timeout=50)
 
         # below is plagiarized from api_example.py
         
         # Check if it was successful
         if res.is_success:
-            # Since it was successful, the response type is guaranteed to be a MessageResponse
-            message: MessageResponse = res.model
-            print(message.message)
+            # Since it was successful, the response type is guaranteed to be a BulkResponse
+            result: BulkResponse = res.model
+            print(f'Created {result.created}, restocked {result.restocked}, skipped {result.invalid} invalid')
+            for row in result.results:
+                if row.status == 'invalid':
+                    print(f'  {row.name!r}: {row.message}')
         else:
             # If it wasn't successful, res.model will be set to None, but you can check the response status code like this:
             if res.status_code == ResponseStatus.CONFLICT:
@@ -184,8 +264,7 @@ def db_export(url, filename):
 # TODO: throw error
 def server_export(filename):
     
-    with db_context() as db:
-        items = get_items(db)
+    items = inventory_snapshot().items
     data = [[x.name, x.stock] for x in items]
 
     write_file(filename, data)
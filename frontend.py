@@ -1,11 +1,13 @@
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
 from nicegui import app as guiapp
 from nicegui import ui
 
 from frontend_app.common import BTN_MAIN, ADMIN_MSG
-from frontend_app.inventory import INV_VALID_FLAG, TAGS_FIELD
+from frontend_app.inventory import TAGS_FIELD, inventory_subscriptions, image_manifest
 from frontend_app.inventory import STUDENT_VISIBLE
 from frontend_app.screens import admin, student
-from server import app
+from server import app, db_context, import_tags, bump_inventory_version
 
 
 # TODO: Switch to using sessions for login screen
@@ -35,15 +37,18 @@ def show():
             ui.markdown(guiapp.storage.general[ADMIN_MSG])
 
 
-guiapp.storage.general[INV_VALID_FLAG] = 0
 if STUDENT_VISIBLE not in guiapp.storage.general:
     guiapp.storage.general[STUDENT_VISIBLE] = True
 
-# tags are a dictionary of tag names to a list of item names
+# tags used to be stored here as a dictionary of tag names to a list of item names
 # so tags['tag_name'] = [item_name_1, item_name_2, ...]
-# this is because we want to be able to search for items by tag
-if TAGS_FIELD not in guiapp.storage.general:
-    guiapp.storage.general[TAGS_FIELD] = {}
+# they are now stored in the database, so move any that are left over
+if TAGS_FIELD in guiapp.storage.general:
+    with db_context() as db:
+        import_tags(db, guiapp.storage.general[TAGS_FIELD])
+        db.commit()
+    bump_inventory_version()
+    del guiapp.storage.general[TAGS_FIELD]
 
 
 # theming/colors
@@ -51,6 +56,38 @@ guiapp.storage.general[BTN_MAIN] = "#FDB515" # applied through ui.colors
 # admin message board
 guiapp.storage.general[ADMIN_MSG] = "*announcements from staff go here*"
 
+@app.get('/frontend/subscribers')
+def get_subscribers():
+    """
+    Live inventory subscriptions (open inventory tables and carts), how many updates they were sent, and how many
+    refreshes were saved by coalescing inventory changes.
+    """
+    return {'subscribers': inventory_subscriptions.subscriber_count,
+            'invalidations': inventory_subscriptions.invalidations,
+            'published': inventory_subscriptions.published,
+            'delivered': inventory_subscriptions.delivered,
+            'refreshes_saved': inventory_subscriptions.refreshes_saved}
+
+
+# image URLs are named after the image content, so browsers may keep them forever
+IMAGE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+@app.get('/images/{file_name}', include_in_schema=False)
+def get_image(file_name: str, request: Request):
+    """
+    Serves an item image by its content-hashed file name, as listed in the image manifest.
+    """
+    path = image_manifest.path(file_name)
+    if path is None or not path.exists():
+        return Response(status_code=404)
+
+    headers = {'Cache-Control': IMAGE_CACHE_CONTROL, 'ETag': f'"{file_name}"'}
+    if request.headers.get('if-none-match') == headers['ETag']:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, headers=headers)
+
+
 app.include_router(admin.router)
 app.include_router(student.router)
 guiapp.add_static_files('/static', 'static')
@@ -3,9 +3,9 @@ from enum import Enum
 
 from nicegui import ui
 
-from models.request_schemas import ActionTypeModel
-from models.response_schemas import TransactionResponse
-from server import db_context, get_logs
+from models.request_schemas import PopularityOrderModel
+from models.response_schemas import ItemPopularityResponse, DayFrequencyResponse, ItemReportResponse
+from server import read_db_context, get_popular_items, get_peak_days, get_item_report
 
 
 class ReportType(Enum):
@@ -21,13 +21,13 @@ class ReportResult:
     Class for displaying the results of a report.
     """
     report_type: ReportType
-    data: list[TransactionResponse]
+    data: list[ItemPopularityResponse] | list[DayFrequencyResponse] | ItemReportResponse | None
     item_name: str | None
     start_date: date | None
     end_date: date | None
 
     def __init__(self, report_type: ReportType,
-                 data: list[TransactionResponse],
+                 data: list[ItemPopularityResponse] | list[DayFrequencyResponse] | ItemReportResponse | None,
                  item_name: str | None = None,
                  start_date: date | None = None,
                  end_date: date | None = None) -> None:
@@ -45,91 +45,37 @@ class ReportResult:
                  f'{self.start_date.isoformat() if self.start_date is not None else "ALL TIME "}'
                  f'{"to " + self.end_date.isoformat() if self.end_date is not None else ""}')
 
-        if len(self.data) == 0:
+        if self.data is None:
+            ui.label(f'Item "{self.item_name}" was not found')
+            return
+
+        if self.report_type != ReportType.SPECIFIC_ITEM and len(self.data) == 0:
             ui.label('No logs found for this query')
             return
 
+        # the server already counted and sorted the results, so each report only has to be displayed
         if self.report_type == ReportType.MOST_POPULAR_FREQUENCY or self.report_type == ReportType.LEAST_POPULAR:
-            # go through each log and count the number of times each item was checked out
-            item_count = {}
-            for log in self.data:
-                for item in log.items:
-                    # if the item is deleted, we don't want to count it
-                    if item.item_name.startswith('[DELETED]'):
-                        continue
-
-                    if item.item_name not in item_count:
-                        item_count[item.item_name] = 0
-                    item_count[item.item_name] += 1
-
-            # sort the items by the number of times they were checked out
-            sorted_items = sorted(item_count.items(), key=lambda x: x[1],
-                                  reverse=self.report_type == ReportType.MOST_POPULAR_FREQUENCY)
             with ui.row():
                 ui.table(columns=[{'id': 'item_name', 'label': 'Item Name', 'field': 'item_name'},
                                   {'id': 'frequency', 'label': 'Frequency', 'field': 'frequency'}],
-                         rows=[{'item_name': item[0], 'frequency': item[1]} for item in sorted_items])
+                         rows=[{'item_name': item.item_name, 'frequency': item.frequency} for item in self.data])
 
         elif self.report_type == ReportType.MOST_POPULAR_QUANTITY:
-            # go through each log and sum the quantity of each item checked out
-            item_count = {}
-            for log in self.data:
-                for item in log.items:
-                    # if the item is deleted, we don't want to count it
-                    if item.item_name.startswith('[DELETED]'):
-                        continue
-
-                    if item.item_name not in item_count:
-                        item_count[item.item_name] = 0
-                    item_count[item.item_name] += item.item_quantity
-
-            # sort the items by the number of times they were checked out
-            sorted_items = sorted(item_count.items(), key=lambda x: x[1],
-                                  reverse=self.report_type == ReportType.MOST_POPULAR_QUANTITY)
             ui.table(columns=[{'id': 'item_name', 'label': 'Item Name', 'field': 'item_name'},
                               {'id': 'quantity', 'label': 'Quantity', 'field': 'quantity'}],
-                     rows=[{'item_name': item[0], 'quantity': item[1]} for item in sorted_items])
+                     rows=[{'item_name': item.item_name, 'quantity': item.quantity} for item in self.data])
 
         elif self.report_type == ReportType.PEAK_DAYS:
-            # go through each log and count the number of checkouts per day
-            day_count = {}
-            for log in self.data:
-                log_date = log.timestamp.date()
-                if log_date not in day_count:
-                    day_count[log_date] = 0
-                day_count[log_date] += 1
-
-            # sort the days by the number of checkouts
-            sorted_days = sorted(day_count.items(), key=lambda x: x[1], reverse=True)
             ui.table(columns=[{'id': 'date', 'label': 'Date', 'field': 'date'},
                               {'id': 'frequency', 'label': 'Frequency', 'field': 'frequency'}],
-                     rows=[{'date': item[0], 'frequency': item[1]} for item in sorted_days])
+                     rows=[{'date': day.date, 'frequency': day.frequency} for day in self.data])
+
         elif self.report_type == ReportType.SPECIFIC_ITEM:
-            # go through each log and count the number of times the item was checked out
-            # and the total quantity checked out
-            # and the dates with the most checkouts
-            item_quantity = 0
-            item_frequency = 0
-            highest_quantity_days = {}
-            for log in self.data:
-                item_frequency += 1
-                if log.timestamp.date() not in highest_quantity_days:
-                    highest_quantity_days[log.timestamp.date()] = 0
-
-                for item in log.items:
-                    if item.item_name != self.item_name:
-                        continue
-
-                    highest_quantity_days[log.timestamp.date()] += item.item_quantity
-                    item_quantity += item.item_quantity
-
-            ui.label(f'Item "{self.item_name}" was involved in {item_frequency} checkouts'
-                     f' with {item_quantity} total being checked out')
-            # sort the days by the number of checkouts
-            sorted_days = sorted(highest_quantity_days.items(), key=lambda x: x[1], reverse=True)
+            ui.label(f'Item "{self.item_name}" was involved in {self.data.frequency} checkouts'
+                     f' with {self.data.quantity} total being checked out')
             ui.table(columns=[{'id': 'date', 'label': 'Date', 'field': 'date'},
                               {'id': 'quantity', 'label': 'Quantity', 'field': 'quantity'}],
-                     rows=[{'date': item[0], 'quantity': item[1]} for item in sorted_days])
+                     rows=[{'date': day.date, 'quantity': day.quantity} for day in self.data.days])
 
 
 class AnalyticsRequest:
@@ -153,13 +99,20 @@ class AnalyticsRequest:
             report_type = ReportType(self.report_select.value)
             item_name = self.name_input.value if report_type == ReportType.SPECIFIC_ITEM else None
 
-            with db_context() as db:
-                logs = get_logs(db=db,
-                                action=ActionTypeModel.CHECKOUT,
-                                item_name=item_name,
-                                start_date=min_date,
-                                end_date=max_date)
-                result = ReportResult(report_type=report_type, data=logs, item_name=item_name, start_date=min_date,
+            with read_db_context() as db:
+                if report_type == ReportType.PEAK_DAYS:
+                    data = get_peak_days(db=db, start_date=min_date, end_date=max_date)
+                elif report_type == ReportType.SPECIFIC_ITEM:
+                    data = get_item_report(item_name, db=db, start_date=min_date, end_date=max_date)
+                    # the item report is a 404 response if the item doesn't exist
+                    if not isinstance(data, ItemReportResponse):
+                        data = None
+                else:
+                    order_by = PopularityOrderModel.QUANTITY if report_type == ReportType.MOST_POPULAR_QUANTITY \
+                        else PopularityOrderModel.FREQUENCY
+                    data = get_popular_items(db=db, start_date=min_date, end_date=max_date, order_by=order_by,
+                                             least=report_type == ReportType.LEAST_POPULAR)
+                result = ReportResult(report_type=report_type, data=data, item_name=item_name, start_date=min_date,
                                       end_date=max_date)
 
             with self.result_container:
@@ -232,7 +185,7 @@ class AnalyticsRequest:
             self.all_time_autofill = ui.button('All Time', on_click=lambda: fill_dates())
 
         with ui.card():
-            ui.label("Run Reports (check capitalization on any item names)")
+            ui.label("Run Reports")
         with ui.row():
             self.submit_btn = ui.button('Submit Query')
             self.report_select = ui.select(label='Select Report Type',
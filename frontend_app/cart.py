@@ -1,15 +1,19 @@
 import json
 from typing import Self
 
-from nicegui import ui, app
+from nicegui import ui
 from pydantic import BaseModel
 from starlette.responses import JSONResponse
 
 from frontend_app.common import valid_input, make_item, upload_image
-from frontend_app.inventory import invalidate_inventory, INV_VALID_FLAG
+from frontend_app.inventory import invalidate_inventory, inventory_subscriptions, InventoryDelta
 from models.request_schemas import ItemRequest, MultiItemRequest
 from models.response_schemas import MessageResponse
-from server import checkout_item, db_context, get_items
+from server import checkout_item, db_context, inventory_snapshot
+
+SELECT_ITEM = 'Select Item'
+# the number of matching items offered while typing an item name
+SEARCH_LIMIT = 10
 
 
 class CartItem(BaseModel):
@@ -54,22 +58,28 @@ class Cart:
         self.name_in = None
         self.quantity_select = None
 
-        # when the inventory is invalidated, update the name_max_map and name_id_map
-        app.storage.general.on_change(lambda e: update_event(e))
-
-        def update_event(event):
-            if INV_VALID_FLAG in event.sender:
-                self.update()
+        # when the inventory changes, update the name_max_map and name_id_map
+        inventory_subscriptions.subscribe(self.apply_delta)
 
     def update(self) -> None:
         """
         Updates the cart with the current items in the database.
         """
-        with db_context() as db:
-            items = get_items(db)
+        items = inventory_snapshot().items
         self.name_max_map = {item.name: item.max_checkout for item in items}
         self.name_id_map = {item.name: item.id for item in items}
 
+    def apply_delta(self, delta: InventoryDelta) -> None:
+        """
+        Updates the cart with the items that changed in the database.
+        """
+        for name in delta.removed:
+            self.name_max_map.pop(name, None)
+            self.name_id_map.pop(name, None)
+        for item in delta.added + delta.changed:
+            self.name_max_map[item.name] = item.max_checkout
+            self.name_id_map[item.name] = item.id
+
     def render(self) -> Self:
         """
         Render this cart on the page. The cart will automatically be updated when items are added.
@@ -94,10 +104,10 @@ class Cart:
         """
         with ui.row():
             # adds the name text input which checks if each name is actually an item
-            items = [key for key in self.name_id_map.keys()]
-            items.insert(0, "Select Item")
-            self.name_in = ui.select(label="Product Name", options=items, with_input=True,
-                                     value=items[0])
+            # the options are only the best matches for what has been typed, searched on the server
+            self.name_in = ui.select(label="Product Name", options=[SELECT_ITEM], with_input=True,
+                                     value=SELECT_ITEM)
+            self.name_in.on('input-value', lambda e: self.search_items(e.args or ''), throttle=0.1)
 
             # adds the quantity selector and ensures that quantity is a positive integer
             self.quantity_select = ui.number(label='Quantity', max=0, min=0, value=0,
@@ -123,6 +133,17 @@ class Cart:
                          quantity=int(self.quantity_select.value),
                          max_checkout=self.name_max_map[self.name_in.value])))
 
+    def search_items(self, query: str) -> None:
+        """
+        Offers the items best matching the typed name as the options of the item input.
+        :param query: The text typed into the item input
+        """
+        options = [SELECT_ITEM, *inventory_snapshot().search_index.search(query, SEARCH_LIMIT)]
+        # keep the selected item, otherwise the select would clear it
+        if self.name_in.value not in options and self.name_in.value in self.name_id_map:
+            options.append(self.name_in.value)
+        self.name_in.set_options(options)
+
     def render_btns(self) -> None:
         """
         Renders the buttons for the cart, excluding the item input.
@@ -211,8 +232,8 @@ class Cart:
                 image_upload.on_upload(lambda e: upload_image(e, img_data))
 
                 # set create-item button to take info from input fields
-                def create_btn_action(name, value, img_upload, img_data):
-                    make_item(name, 0, value, img_upload, img_data)
+                async def create_btn_action(name, value, img_upload, img_data):
+                    await make_item(name, 0, value, img_upload, img_data)
                     create_popup.close()
 
                 create_btn = ui.button('Create',
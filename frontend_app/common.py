@@ -1,15 +1,14 @@
-from nicegui import APIRouter, ui, app, events
+from nicegui import APIRouter, ui, app, events, run
 from starlette.responses import JSONResponse
 from fastapi import Response
 import json
-import tempfile
 from pathlib import Path
-from PIL import Image
 
+import image_pipeline
 from models.request_schemas import CreateRequest
 from models.response_schemas import MessageResponse
 from server import db_context, create_item
-from frontend_app.inventory import Inventory, invalidate_inventory
+from frontend_app.inventory import Inventory, invalidate_inventory, image_manifest
 
 # for button/color theming
 BTN_MAIN = 'btn_main_color'
@@ -53,11 +52,11 @@ def valid_input(name: str, amt: int, max: int) -> bool:
     return True
 
 
-def make_item(name_field: str,
-              amt_field: int,
-              max_field: int,
-              upload_field: ui.upload,
-              img_data: dict):
+async def make_item(name_field: str,
+                    amt_field: int,
+                    max_field: int,
+                    upload_field: ui.upload,
+                    img_data: dict):
 
     # this is scuffed
     name = name_field
@@ -71,38 +70,40 @@ def make_item(name_field: str,
         result = create_item(CreateRequest(name=form_name, initial_stock=amt, max_checkout=max_val),
                              Response(), db=db)
 
-        # display popup for success or failure
-        if isinstance(result, MessageResponse):
-            # success
-            # now create a new file in /static with the image
-            if img_data['file'] is not None:
-                dest = Path('static') / f'{name}.png'
-                with Image.open(img_data['file']) as img:
-                    img.save(dest)
-
-                # clear temp file
-                img_data['file'].close()
-                img_data['file'] = None
-                img_data['path'] = None
-                img_data['suffix'] = None
-
-            upload_field.reset()
-
-            with ui.dialog() as dialog, ui.card():
-                ui.label(result.message)
-                ui.button("Close", on_click=dialog.close)
-            dialog.open()
-        elif isinstance(result, JSONResponse):
-            # failure (item already exists)
-            with ui.dialog() as dialog, ui.card():
-                ui.label(f"Error {result.status_code}: {json.loads(result.body.decode())["message"]}")
-                ui.button("Close", on_click=dialog.close)
-            dialog.open()
-
-        invalidate_inventory()
-
-
-def upload_image(e: events.UploadEventArguments, img_data):
+    # display popup for success or failure
+    if isinstance(result, MessageResponse):
+        # success
+        # now create the item's images in /static, in a worker process so other pages keep responding
+        if img_data['file'] is not None:
+            try:
+                await run.cpu_bound(image_pipeline.process_image, img_data['path'], form_name)
+                await run.io_bound(image_manifest.add, form_name)
+            except Exception as e:
+                ui.notify(f'The item was created, but its image could not be processed: {e}')
+
+            # clear temp file
+            img_data['file'].close()
+            img_data['file'] = None
+            img_data['path'] = None
+            img_data['suffix'] = None
+
+        upload_field.reset()
+
+        with ui.dialog() as dialog, ui.card():
+            ui.label(result.message)
+            ui.button("Close", on_click=dialog.close)
+        dialog.open()
+    elif isinstance(result, JSONResponse):
+        # failure (item already exists)
+        with ui.dialog() as dialog, ui.card():
+            ui.label(f"Error {result.status_code}: {json.loads(result.body.decode())["message"]}")
+            ui.button("Close", on_click=dialog.close)
+        dialog.open()
+
+    invalidate_inventory()
+
+
+async def upload_image(e: events.UploadEventArguments, img_data):
     if e.type not in ['image/png', 'image/jpeg']:
         ui.notify('Only .png and .jpg files are allowed.')
         return
@@ -110,8 +111,8 @@ def upload_image(e: events.UploadEventArguments, img_data):
     if img_data['file'] is not None:
         img_data['file'].close()
 
-    temp_img_file = tempfile.NamedTemporaryFile()
-    temp_img_file.write(e.content.read())
+    # copy the upload to disk in chunks, off the event loop
+    temp_img_file = await run.io_bound(image_pipeline.save_upload, e.content, Path(e.name).suffix)
     img_data['file'] = temp_img_file
     img_data['path'] = temp_img_file.name
     img_data['suffix'] = Path(e.name).suffix
@@ -1,32 +1,52 @@
-from pathlib import Path
-from typing import Self
+import asyncio
+import logging
+import threading
+from typing import Self, Callable
 
-from nicegui import ui, app
-from nicegui.functions.update import update
+from nicegui import ui, context, Client
+from pydantic import BaseModel
 
+from nicegui.events import GenericEventArguments
+
+from image_pipeline import ImageManifest
+from models.request_schemas import ItemSortModel
 from models.response_schemas import ItemResponse
-from server import db_context, get_items
+from server import inventory_snapshot, bump_inventory_version, InventorySnapshot, read_db_context, item_page
+from settings import settings
+
+logger = logging.getLogger(__name__)
 
-INV_VALID_FLAG = 'inv_valid'
 STUDENT_VISIBLE = 'student_visible'
+# where tags were kept in app.storage.general before the tags table, only read to migrate them
 TAGS_FIELD = 'tags'
+ROWS_PER_PAGE = 5
 
 
 class Inventory:
+    """
+    The inventory table. Small catalogs are sent to the browser whole and paged, sorted and filtered by Quasar.
+    Catalogs over settings.client_rows_max items are paged on the server: the table fires a request event whenever
+    its page, sort or filter changes, and only that page of rows is fetched and sent.
+
+    Attributes:
+        table (ui.table): The inventory table.
+        tag_filter (ui.select): The tag filter above the table.
+        server_side (bool): True if the table is paged on the server.
+    """
     table: ui.table
     tag_filter: ui.select
+    server_side: bool
 
     def render(self) -> Self:
         """
         Displays all items in the inventory, along with their current stock.
         """
-        with db_context() as db:
-            items = get_items(db)
-
+        snapshot = inventory_snapshot()
+        self.server_side = len(snapshot.items) > settings.client_rows_max
         toggle = ui.expansion(text='Inventory', value=True)
 
         with toggle:
-            tag_names = list(app.storage.general[TAGS_FIELD])
+            tag_names = list(snapshot.tag_names)
             tag_names.insert(0, '')
             self.tag_filter = ui.select(tag_names, label='Filter by Tags', with_input=True, clearable=True)
 
@@ -39,8 +59,9 @@ class Inventory:
                     {'name': 'image', 'label': 'Image', 'field': 'image'},
                     {'name': 'tags', 'label': 'Tags', 'field': 'tags'}
                 ],
-                rows=self.create_item_json(items),
-                pagination=5
+                rows=[] if self.server_side else inventory_rows(snapshot),
+                pagination={'rowsPerPage': ROWS_PER_PAGE, 'sortBy': 'name', 'descending': False, 'page': 1,
+                            'rowsNumber': len(snapshot.items)} if self.server_side else ROWS_PER_PAGE
             )
 
             self.tag_filter.bind_value(self.table, 'filter')
@@ -63,43 +84,35 @@ class Inventory:
             </q-tr>
             ''')
 
-            # set a custom filter function for the table that only filters by the tag column
-            self.table.props('''
-                :filter-method="(rows, terms, cols) => rows.filter(row => row.tags.toLowerCase().includes(terms.toLowerCase()))"
-            ''')
-        app.storage.general.on_change(lambda e: refresh(e))
-
-        def refresh(event):
-            if INV_VALID_FLAG in event.sender:
-                update(self)
+            if self.server_side:
+                # Quasar sends the new pagination and filter, and leaves paging, sorting and filtering to us
+                self.table.on('request', self.handle_request, ['pagination'])
+                # no "All" option, so a page never holds the whole catalog
+                self.table.props(':rows-per-page-options="[5, 10, 25, 50]"')
+                self.load_page()
+            else:
+                # set a custom filter function for the table that only filters by the tag column
+                self.table.props('''
+                    :filter-method="(rows, terms, cols) => rows.filter(row => row.tags.toLowerCase().includes(terms.toLowerCase()))"
+                ''')
+        inventory_subscriptions.subscribe(self.apply_delta)
 
         return self
 
     @staticmethod
-    def create_item_json(items: list[ItemResponse]):
+    def create_item_json(items: list[ItemResponse], snapshot: InventorySnapshot | None = None):
         """
         Creates a JSON representation of the items in the inventory.
         :param items: The items to create a JSON representation of.
+        :param snapshot: The snapshot to take the tags of the items from, or None for the current one.
         :return: A JSON representation of the items.
         """
         json = []
-        items.sort(key=lambda e: e.name)
-
-        # tags are a dictionary of tag names to a list of item names
-        # we need to find the tags for each item
-        tags = app.storage.general[TAGS_FIELD]
-        item_tags = {}
-        for tag, item_names in tags.items():
-            for name in item_names:
-                if name not in item_tags:
-                    item_tags[name] = []
-                item_tags[name].append(tag)
+        item_tags = (inventory_snapshot() if snapshot is None else snapshot).tags_by_item
 
         for item in items:
-            # for images, we use the name of the item as the filename or default.png if it doesn't exist
-            image_filename = f'{item.name}.png'
-            image_path = Path('static') / image_filename
-            image_url = f'/static/{image_filename}' if image_path.exists() else '/static/default.png'
+            # for images, we use the item's thumbnail or default.png if it has no image
+            image_url = image_manifest.thumbnail_url(item.name)
 
             # turn the list of tags for this item into a comma separated string
             tag_list = ', '.join(item_tags.get(item.name, []))
@@ -115,25 +128,270 @@ class Inventory:
 
         return json
 
+    def handle_request(self, e: GenericEventArguments) -> None:
+        """
+        Loads the page the table asked for after its page, sort or filter changed.
+        :param e: The request event, whose args hold the new pagination and filter
+        """
+        self.load_page(e.args['pagination'])
+
+    def load_page(self, pagination: dict | None = None) -> None:
+        """
+        Fetches a single page of rows, sorted and filtered on the server, and shows it in the table.
+        :param pagination: The Quasar pagination to load, or None to reload the current page
+        """
+        pagination = dict(self.table.pagination if pagination is None else pagination)
+        rows_per_page = pagination.get('rowsPerPage') or 0
+        page = pagination.get('page') or 1
+        sort_by = pagination.get('sortBy') or ItemSortModel.NAME.value
+
+        with read_db_context() as db:
+            total, items = item_page(db, limit=rows_per_page or ROWS_PER_PAGE, offset=(page - 1) * rows_per_page,
+                                     sort_by=ItemSortModel(sort_by), descending=bool(pagination.get('descending')),
+                                     tags=[self.tag_filter.value] if self.tag_filter.value else None)
+
+        pagination.update(page=page, rowsNumber=total)
+        self.table.rows = Inventory.create_item_json(items)
+        self.table.pagination = pagination
+
     def update(self):
         if self.table is not None:
-            with db_context() as db:
-                new_items = get_items(db)
-                self.table.rows.clear()
-                self.table.rows = self.create_item_json(new_items)
+            if self.server_side:
+                self.load_page()
+            else:
+                self.table.rows = inventory_rows()
                 self.table.update()
+        self.update_tag_filter()
 
+    def apply_delta(self, delta: 'InventoryDelta') -> None:
+        """
+        Updates only the table rows that changed.
+        :param delta: The changes since the last update
+        """
+        if self.server_side:
+            # the changes can move rows between pages, so the page is fetched again
+            self.load_page()
+            self.update_tag_filter()
+            return
+
+        rows = {row['name']: row for row in self.table.rows}
+        for name in delta.removed:
+            rows.pop(name, None)
+        rows.update(delta.rows)
+        self.table.rows = sorted(rows.values(), key=lambda row: row['name'])
+        self.table.update()
+        self.update_tag_filter()
+
+    def update_tag_filter(self) -> None:
         if self.tag_filter is not None:
-            tag_names = list(app.storage.general[TAGS_FIELD])
+            tag_names = list(inventory_snapshot().tag_names)
             tag_names.insert(0, '')
             self.tag_filter.options = tag_names
             self.tag_filter.update()
 
 
+class InventoryDelta(BaseModel):
+    """
+    The changes to the inventory table between two inventory versions, sent to every subscribed page.
+    """
+    version: int
+    added: list[ItemResponse]
+    removed: list[str]
+    # changed items, including items whose image or tags changed
+    changed: list[ItemResponse]
+    # the new table rows of added and changed items, by name
+    rows: dict[str, dict]
+
+
+class InventorySubscriptions:
+    """
+    Registry of the pages showing the inventory. When the inventory changes, publish works out which table rows
+    changed once and sends the same delta to every subscriber. Subscriptions end when their page's client
+    disconnects.
+
+    Invalidations are coalesced: a publish waits until no invalidation has arrived for window seconds, but never
+    longer than max_staleness seconds after the first invalidation it covers.
+
+    Attributes:
+        window (float): Seconds to wait for more invalidations before publishing, 0 to publish immediately.
+        max_staleness (float): The longest a page can go without seeing an invalidation, in seconds.
+        invalidations (int): The number of invalidations received.
+        published (int): The number of deltas published.
+        delivered (int): The number of deltas delivered to subscribers.
+        refreshes_saved (int): Subscriber refreshes avoided by coalescing invalidations.
+    """
+    window: float
+    max_staleness: float
+    invalidations: int
+    published: int
+    delivered: int
+    refreshes_saved: int
+
+    def __init__(self, window: float = 0, max_staleness: float = 1):
+        """
+        Creates an empty registry.
+        :param window: Seconds to wait for more invalidations before publishing, 0 to publish immediately.
+        :param max_staleness: The longest a page can go without seeing an invalidation, in seconds.
+        """
+        self.window = window
+        self.max_staleness = max_staleness
+        self.invalidations = 0
+        self.published = 0
+        self.delivered = 0
+        self.refreshes_saved = 0
+
+        # invalidations waiting for the scheduled publish, only used on the event loop
+        self._pending = 0
+        self._first_pending = 0.0
+        self._scheduled: asyncio.TimerHandle | None = None
+
+        self._lock = threading.Lock()
+        self._subscribers: dict[int, tuple[Client | None, Callable[[InventoryDelta], None]]] = {}
+        self._next_id = 0
+        # the version and table rows the last delta was computed against
+        self._version: int | None = None
+        self._rows: dict[str, dict] = {}
+
+    @property
+    def subscriber_count(self) -> int:
+        """The number of live subscriptions."""
+        with self._lock:
+            self._prune()
+            return len(self._subscribers)
+
+    def subscribe(self, callback: Callable[[InventoryDelta], None]) -> int:
+        """
+        Subscribes the current page to inventory changes until its client disconnects.
+        :param callback: Called with every published delta
+        :return: The subscription id, for unsubscribe
+        """
+        client = context.client if context.slot_stack else None
+        with self._lock:
+            subscription_id = self._next_id
+            self._next_id += 1
+            self._subscribers[subscription_id] = (client, callback)
+            if self._version is None:
+                snapshot = inventory_snapshot()
+                self._version, self._rows = snapshot.version, _rows_by_name(snapshot)
+
+        if client is not None:
+            client.on_disconnect(lambda: self.unsubscribe(subscription_id))
+        return subscription_id
+
+    def unsubscribe(self, subscription_id: int) -> None:
+        with self._lock:
+            self._subscribers.pop(subscription_id, None)
+
+    def invalidate(self) -> None:
+        """
+        Schedules a publish, coalescing it with other invalidations that arrive within the window.
+        Publishes immediately when called outside the event loop or if the window is 0.
+        """
+        with self._lock:
+            self.invalidations += 1
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None or self.window <= 0:
+            self.publish()
+            return
+
+        now = loop.time()
+        if self._pending == 0:
+            self._first_pending = now
+        self._pending += 1
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+        self._scheduled = loop.call_at(min(now + self.window, self._first_pending + self.max_staleness),
+                                       self._publish_pending)
+
+    def _publish_pending(self) -> None:
+        pending, self._pending, self._scheduled = self._pending, 0, None
+        delivered = self.publish()
+        self.refreshes_saved += (pending - 1) * delivered
+
+    def publish(self) -> int:
+        """
+        Sends the changes since the last publish to every subscriber. Does nothing if no table row changed.
+        :return: The number of subscribers the changes were delivered to, leaving out subscribers that failed
+        """
+        with self._lock:
+            snapshot = inventory_snapshot()
+            version, rows = snapshot.version, _rows_by_name(snapshot)
+            if self._version is None or version == self._version:
+                self._version, self._rows = version, rows
+                return 0
+
+            old_rows, self._version, self._rows = self._rows, version, rows
+            changed_rows = {name: row for name, row in rows.items() if old_rows.get(name) != row}
+            delta = InventoryDelta(version=version,
+                                   added=[snapshot.by_name[name] for name in changed_rows if name not in old_rows],
+                                   removed=[name for name in old_rows if name not in rows],
+                                   changed=[snapshot.by_name[name] for name in changed_rows if name in old_rows],
+                                   rows=changed_rows)
+            if not changed_rows and not delta.removed:
+                return 0
+
+            self._prune()
+            subscribers = list(self._subscribers.values())
+            self.published += 1
+
+        delivered = 0
+        for _, callback in subscribers:
+            # one broken page mustn't stop the others from being updated
+            try:
+                callback(delta)
+            except Exception:
+                logger.exception('Inventory subscriber failed to apply version %d', version)
+                continue
+            delivered += 1
+
+        with self._lock:
+            self.delivered += delivered
+        return delivered
+
+    def _prune(self) -> None:
+        # clients can be deleted without a disconnect if the page never finished connecting
+        for subscription_id, (client, _) in list(self._subscribers.items()):
+            if client is not None and client.id not in Client.instances:
+                del self._subscribers[subscription_id]
+
+
+def _rows_by_name(snapshot: InventorySnapshot) -> dict[str, dict]:
+    return {row['name']: row for row in inventory_rows(snapshot)}
+
+
+# the stored item images, indexed once at startup
+image_manifest = ImageManifest()
+
+inventory_subscriptions = InventorySubscriptions(window=settings.refresh_window_ms / 1000,
+                                                 max_staleness=settings.refresh_max_staleness_ms / 1000)
+
+# the inventory table rows of the latest snapshot, shared by every page until the inventory changes
+_rows_version: int | None = None
+_rows: list[dict] = []
+
+
+def inventory_rows(snapshot: InventorySnapshot | None = None) -> list[dict]:
+    """
+    Gets the inventory table rows for an inventory snapshot, only building them once per snapshot.
+    :param snapshot: The snapshot, or None for the current one
+    :return: A new list of the rows. The rows themselves are shared and must not be modified.
+    """
+    global _rows_version, _rows
+    snapshot = inventory_snapshot() if snapshot is None else snapshot
+    if _rows_version != snapshot.version:
+        _rows = Inventory.create_item_json(sorted(snapshot.items, key=lambda e: e.name), snapshot)
+        _rows_version = snapshot.version
+    return list(_rows)
+
+
 def invalidate_inventory() -> None:
     """
-    Invalidates the inventory by marking a general storage flag.
-    This is then checked by show_inventory to refresh clients inventory lists.
+    Invalidates the inventory and sends the changes to every page showing it, once the refresh window has passed.
     Only call this after making an edit to the inventory (like checkout/restock).
     """
-    app.storage.general[INV_VALID_FLAG] = app.storage.general.get(INV_VALID_FLAG, 0) + 1
+    # images are only shown by the frontend, so the server doesn't bump the version for them
+    bump_inventory_version()
+    inventory_subscriptions.invalidate()
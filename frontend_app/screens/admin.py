@@ -1,5 +1,4 @@
 import json
-import os.path
 import tempfile
 from pathlib import Path
 
@@ -8,25 +7,30 @@ from fastapi import Response
 from nicegui import APIRouter, ui, app, events
 from starlette.responses import JSONResponse
 
+import image_pipeline
 import server
 from frontend_app.analytics import AnalyticsRequest
 from frontend_app.cart import CartItem
 from frontend_app.admin_cart import AdminCart
 from frontend_app.common import valid_input, make_item, upload_image, BTN_MAIN, ADMIN_MSG
-from frontend_app.inventory import Inventory, invalidate_inventory, STUDENT_VISIBLE
+from frontend_app.inventory import Inventory, invalidate_inventory, STUDENT_VISIBLE, image_manifest
 
-from models.request_schemas import CreateRequest
+from models.request_schemas import CreateRequest, ExportKindModel, ExportFormatModel
 from models.response_schemas import MessageResponse
 from server import db_context, create_item
 
 try:
-    from io import StringIO
+    from io import StringIO, TextIOWrapper
     from form_io import form_io
 except ImportError:
     print("Error: file_io module (or its dependencies) broken or not present")
 
 router = APIRouter(prefix='/admin')
 
+EXPORT_OPTIONS = {ExportKindModel.INVENTORY: "Current Inventory", ExportKindModel.TRANSACTIONS: "Transactions",
+                  ExportKindModel.ORDERS: "Orders", ExportKindModel.LOGS: "Logs"}
+EXPORT_FORMATS = {ExportFormatModel.CSV: "CSV", ExportFormatModel.XLSX: "Excel"}
+
 
 @router.page('')
 def admin_page():
@@ -65,10 +69,9 @@ def admin_page():
 
             with ui.row():
                 ui.label("Export: ")
-                export_options = ["Current Inventory", "Transactions", "Orders", "Logs"]
-                export_choice = ui.select(export_options, label="What to Export", value="Current Inventory")
-                # export on_click currently dummy function
-                ui.button("Export", on_click=lambda: export_file(export_choice.value))
+                export_choice = ui.select(EXPORT_OPTIONS, label="What to Export", value=ExportKindModel.INVENTORY)
+                format_choice = ui.select(EXPORT_FORMATS, label="Format", value=ExportFormatModel.CSV)
+                ui.button("Export", on_click=lambda: export_file(export_choice.value, format_choice.value))
 
     with ui.card():
         ### creating; visibility matches switch value ###
@@ -138,11 +141,10 @@ def import_file(dest_cart, e):
     # first parse file to extract its data
     ui.notify("FILE GRABBED", close_button="close")
     if (e.name.endswith('.xlsx')):
-        data = form_io.read_excel(e.content)
+        data = form_io.iter_excel(e.content)
     else:
-        data = form_io.read_csv(StringIO(e.content.read().decode('utf-8')))
-
-    print(data)
+        # decode the upload as it is read rather than copying all of it into a string
+        data = form_io.iter_csv(TextIOWrapper(e.content, encoding='utf-8', newline=''))
 
     # now put the data into CartItems
     for row in data:
@@ -163,13 +165,9 @@ def import_text(dest_cart, text):
 
 
     
-def export_file(which_file):
-    # dummy function for now, for exporting spreadsheet
-    ui.notify(f"FILE SENT ({which_file})", close_button="close")
-
-    data = [["hello", 132], ["goodbye", 123]]
-    re_csv = form_io.server_export("RE_EXPORT.csv")
-    ui.download("RE_EXPORT.csv", "RE_EXPORT.csv")
+def export_file(kind: ExportKindModel, file_format: ExportFormatModel):
+    # each download streams its own file from /export, so concurrent exports don't share anything
+    ui.download(f'/export/{kind.value}.{file_format.value}')
 
 
 def post_message(message: str):
@@ -192,10 +190,10 @@ def delete_item(name: str):
                 ui.button("Close", on_click=dialog.close)
             dialog.open()
 
-            # check if the image file exists, and if it does then delete it
+            # delete the item's images, if it has any
             if name != 'default':
-                if os.path.exists(f'static/{name}.png'):
-                    os.remove(f'static/{name}.png')
+                image_manifest.remove(name)
+                image_pipeline.delete_images(name)
 
         elif isinstance(result, JSONResponse):
             # failure (item already exists)
@@ -0,0 +1,143 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session, sessionmaker
+
+# A write job is applied to the shared batch session and returns (response, log).
+# log is passed on to flush_logs if the job succeeded, or None if the job failed and its changes should be undone.
+WriteJob = Callable[[Session], tuple[Any, Any]]
+
+
+class GroupCommitWriter:
+    """
+    Single writer thread that applies queued write jobs in batches, committing each batch in one transaction.
+
+    Each job runs inside its own savepoint, so a failed job is rolled back without affecting the rest of the batch.
+    The logs of every successful job are written with one flush_logs call right before the commit.
+    Callers block in submit until the batch containing their job has been committed.
+
+    Attributes:
+        max_batch_size (int): The maximum number of jobs applied in one transaction.
+        max_wait (float): The maximum time in seconds to wait for more jobs after the first job of a batch arrives.
+        batches (int): The number of batches committed so far.
+        jobs (int): The number of jobs applied so far.
+    """
+    max_batch_size: int
+    max_wait: float
+    batches: int
+    jobs: int
+
+    def __init__(self, session_factory: sessionmaker, flush_logs: Callable[[Session, list], None],
+                 max_batch_size: int = 64, max_wait: float = 0.005):
+        """
+        Creates the writer and starts its thread.
+        :param session_factory: The session factory used to open the session for each batch.
+        :param flush_logs: Function called with the batch session and the logs of all successful jobs.
+        :param max_batch_size: The maximum number of jobs applied in one transaction.
+        :param max_wait: The maximum time in seconds to wait for more jobs after the first job of a batch arrives.
+        """
+        self.session_factory = session_factory
+        self.flush_logs = flush_logs
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.jobs = 0
+
+        self._queue: queue.Queue[tuple[WriteJob, Future] | None] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='group-commit-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, job: WriteJob) -> Any:
+        """
+        Queues a job and waits until the batch containing it has been committed.
+        :param job: The job to apply.
+        :return: The response returned by the job.
+        """
+        future = Future()
+        self._queue.put((job, future))
+        return future.result()
+
+    def close(self) -> None:
+        """
+        Stops the writer thread once every job queued before this call has been applied.
+        """
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            batch, closed = self._next_batch()
+            if batch:
+                self._apply_batch(batch)
+            if closed:
+                return
+
+    def _next_batch(self) -> tuple[list[tuple[WriteJob, Future]], bool]:
+        """
+        Waits for a job, then keeps collecting jobs until the batch is full or max_wait has passed.
+        :return: The batch, and True if the writer was closed while collecting it.
+        """
+        first = self._queue.get()
+        if first is None:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if entry is None:
+                return batch, True
+            batch.append(entry)
+
+        return batch, False
+
+    def _apply_batch(self, batch: list[tuple[WriteJob, Future]]) -> None:
+        outcomes = []
+        try:
+            with self.session_factory() as db:
+                if db.get_bind().dialect.name == 'sqlite':
+                    # pysqlite only starts a transaction before DML, so the first SAVEPOINT would otherwise become
+                    # the outermost transaction and commit on release. IMMEDIATE also takes the write lock up front.
+                    db.connection().exec_driver_sql('BEGIN IMMEDIATE')
+
+                logs = []
+                for job, future in batch:
+                    savepoint = db.begin_nested()
+                    try:
+                        response, log = job(db)
+                    except Exception as e:
+                        savepoint.rollback()
+                        outcomes.append((future, None, e))
+                        continue
+
+                    if log is None:
+                        savepoint.rollback()
+                    else:
+                        savepoint.commit()
+                        logs.append(log)
+                    outcomes.append((future, response, None))
+
+                if logs:
+                    self.flush_logs(db, logs)
+                db.commit()
+        except Exception as e:
+            # the whole transaction failed, so every job in the batch failed with it
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.jobs += len(batch)
+        for future, response, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(response)
@@ -0,0 +1,206 @@
+"""
+Item image processing.
+
+Uploaded images are decoded once and stored as two WebP variants: a thumbnail for the inventory table and a compact
+copy capped at DISPLAY_SIZE for anything that shows the image larger. Decoding, resizing and encoding are CPU bound,
+so the frontend runs process_image in a process pool rather than on the event loop.
+
+ImageManifest indexes the stored images under content-hashed URLs that can be cached forever.
+
+This module only depends on Pillow, so worker processes don't have to import the server or the frontend.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import BinaryIO
+
+from PIL import Image, ImageOps
+
+IMAGE_DIR = Path('static')
+# the inventory table shows images 100px wide, the thumbnail is twice that for high density screens
+THUMBNAIL_SIZE = (200, 200)
+DISPLAY_SIZE = (1024, 1024)
+THUMBNAIL_QUALITY = 80
+DISPLAY_QUALITY = 85
+# bytes copied at a time when streaming an upload to disk
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def thumbnail_path(name: str, directory: Path = IMAGE_DIR) -> Path:
+    return directory / f'{name}.thumb.webp'
+
+
+def display_path(name: str, directory: Path = IMAGE_DIR) -> Path:
+    return directory / f'{name}.webp'
+
+
+def legacy_path(name: str, directory: Path = IMAGE_DIR) -> Path:
+    """The full size PNG stored for items created before images were processed."""
+    return directory / f'{name}.png'
+
+
+def save_upload(source: BinaryIO, suffix: str = '') -> tempfile.NamedTemporaryFile:
+    """
+    Streams an upload to a temporary file in COPY_CHUNK_SIZE chunks, so it is never held in memory whole.
+    :param source: The uploaded file
+    :param suffix: The suffix of the temporary file
+    :return: The temporary file, which is deleted when closed
+    """
+    destination = tempfile.NamedTemporaryFile(suffix=suffix)
+    source.seek(0)
+    shutil.copyfileobj(source, destination, COPY_CHUNK_SIZE)
+    destination.flush()
+    return destination
+
+
+def process_image(source: str, name: str, directory: str = str(IMAGE_DIR)) -> tuple[str, str]:
+    """
+    Decodes an image and writes its thumbnail and display variants for an item, replacing any existing ones.
+    Runs in a worker process, so it only takes and returns plain values.
+    :param source: Path of the uploaded image
+    :param name: The item name
+    :param directory: The directory the variants are written to
+    :return: The paths of the thumbnail and the display variant
+    """
+    directory = Path(directory)
+    with Image.open(source) as img:
+        # apply the camera rotation before it is lost, WebP files are written without EXIF data
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+
+        display = img.copy()
+        display.thumbnail(DISPLAY_SIZE, Image.Resampling.LANCZOS)
+        _save_atomic(display, display_path(name, directory), DISPLAY_QUALITY)
+
+        # resize from the display copy, which is much cheaper than the original and still larger than the thumbnail
+        display.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+        _save_atomic(display, thumbnail_path(name, directory), THUMBNAIL_QUALITY)
+
+    # a new image replaces one uploaded before processing existed
+    legacy_path(name, directory).unlink(missing_ok=True)
+    return str(thumbnail_path(name, directory)), str(display_path(name, directory))
+
+
+def delete_images(name: str, directory: Path = IMAGE_DIR) -> None:
+    """Deletes every stored variant of an item's image."""
+    for path in (thumbnail_path(name, directory), display_path(name, directory), legacy_path(name, directory)):
+        path.unlink(missing_ok=True)
+
+
+def _save_atomic(img: Image.Image, path: Path, quality: int) -> None:
+    # pages reading the image while it is replaced see the old or the new file, never a partial one
+    descriptor, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.webp')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            img.save(file, 'WEBP', quality=quality, method=4)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class ImageManifest:
+    """
+    In-memory index of the stored item images, so pages never stat the image directory.
+
+    Each image is served at a URL named after a hash of its content, so a URL always refers to the same bytes and
+    browsers can cache it forever. Replacing an image gives it a new URL rather than reusing the old one.
+    The create and delete paths must call add and remove after changing an item's images.
+
+    Attributes:
+        directory (Path): The directory the images are stored in.
+        url_prefix (str): The path the images are served under.
+        default_url (str): The URL of the image shown for items without one.
+    """
+    directory: Path
+    url_prefix: str
+    default_url: str
+
+    def __init__(self, directory: Path = IMAGE_DIR, url_prefix: str = '/images',
+                 default_url: str = '/static/default.png'):
+        """
+        Creates the manifest from the images already in directory.
+        :param directory: The directory the images are stored in
+        :param url_prefix: The path the images are served under
+        :param default_url: The URL of the image shown for items without one
+        """
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.default_url = default_url
+
+        self._lock = threading.Lock()
+        # (item name, variant) -> (served file name, which is the content hash and the file's suffix, stored path)
+        self._files: dict[tuple[str, str], tuple[str, Path]] = {}
+        # served file name -> the stored paths with that content, one entry per (item name, variant) using it
+        self._paths: dict[str, list[Path]] = {}
+
+        names = {path.name.removesuffix('.thumb.webp') for path in directory.glob('*.thumb.webp')}
+        names |= {path.stem for path in directory.glob('*.png') if path.stem != 'default'}
+        for name in names:
+            self.add(name)
+
+    def add(self, name: str) -> None:
+        """
+        Indexes the current images of an item, replacing what was indexed for it before.
+        Hashes the files, so call it from a worker thread rather than the event loop.
+        :param name: The item name
+        """
+        # items created before thumbnails existed only have the full size PNG, which stands in for both
+        legacy = legacy_path(name, self.directory)
+        variants = {'thumbnail': thumbnail_path(name, self.directory), 'display': display_path(name, self.directory)}
+        files = {}
+        for variant, path in variants.items():
+            path = path if path.exists() else legacy
+            if path.exists():
+                files[variant] = (f'{_content_hash(path)}{path.suffix}', path)
+
+        with self._lock:
+            self._remove(name)
+            for variant, (file_name, path) in files.items():
+                self._files[(name, variant)] = (file_name, path)
+                self._paths.setdefault(file_name, []).append(path)
+
+    def remove(self, name: str) -> None:
+        """Stops serving an item's images."""
+        with self._lock:
+            self._remove(name)
+
+    def thumbnail_url(self, name: str) -> str:
+        return self._url(name, 'thumbnail')
+
+    def display_url(self, name: str) -> str:
+        return self._url(name, 'display')
+
+    def path(self, file_name: str) -> Path | None:
+        """
+        Gets the stored path of a served image.
+        :param file_name: The last part of the image URL
+        :return: The path, or None if no item has that image
+        """
+        # items uploaded with identical images share a file name, any of their copies can be served
+        paths = self._paths.get(file_name)
+        return paths[-1] if paths else None
+
+    def _url(self, name: str, variant: str) -> str:
+        entry = self._files.get((name, variant))
+        return self.default_url if entry is None else f'{self.url_prefix}/{entry[0]}'
+
+    def _remove(self, name: str) -> None:
+        for variant in ('thumbnail', 'display'):
+            entry = self._files.pop((name, variant), None)
+            if entry is None:
+                continue
+            # only stop serving the file name once no other item's copy of the same content is left
+            file_name, path = entry
+            paths = self._paths[file_name]
+            paths.remove(path)
+            if not paths:
+                del self._paths[file_name]
+
+
+def _content_hash(path: Path) -> str:
+    with open(path, 'rb') as file:
+        return hashlib.file_digest(file, 'sha256').hexdigest()[:16]
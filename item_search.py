@@ -0,0 +1,113 @@
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left
+from itertools import chain
+from typing import Iterable
+
+_TOKEN_SPLIT = re.compile(r'[\W_]+')
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizes an item name for case-insensitive matching: Unicode compatibility forms are folded, case is folded
+    and runs of whitespace become a single space.
+    :param name: The item name or search query
+    :return: The normalized name
+    """
+    return ' '.join(unicodedata.normalize('NFKC', name).casefold().split())
+
+
+def _tokens(normalized: str) -> list[str]:
+    return [token for token in _TOKEN_SPLIT.split(normalized) if token]
+
+
+def _prefix_range(keys: list, prefix: str) -> tuple[int, int]:
+    """The range of keys starting with prefix, found with two binary searches."""
+    # every key starting with prefix sorts before prefix followed by the highest code point
+    return bisect_left(keys, prefix), bisect_left(keys, prefix + '\U0010ffff')
+
+
+class ItemSearchIndex:
+    """
+    Prefix index over item names for autocomplete.
+
+    Names are kept sorted by their normalized form, so the names starting with a prefix are a contiguous run found
+    by binary search, already in result order. Each word of every name is kept in a second sorted list, grouped by
+    word and sorted by name within a word, so the names with a word starting with a prefix are the merge of a few
+    sorted runs, and multi-word queries intersect the runs of each word.
+
+    Matches are ranked by how they match, then by name: names starting with the query first, then names with a word
+    starting with the query. Queries of several words match names with a word starting with each of them.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        """
+        Indexes the names.
+        :param names: The item names, which must be unique
+        """
+        names = sorted((normalize_name(name), name) for name in names)
+        self._names = [name for _, name in names]
+        self._normalized = [normalized for normalized, _ in names]
+
+        # (word, position of the name in self._names), with one run per distinct word
+        word_entries = sorted({(word, position) for position, (normalized, _) in enumerate(names)
+                               for word in _tokens(normalized)})
+        self._word_positions = [position for _, position in word_entries]
+        self._words = []
+        self._word_starts = []
+        for index, (word, _) in enumerate(word_entries):
+            if not self._words or self._words[-1] != word:
+                self._words.append(word)
+                self._word_starts.append(index)
+        self._word_starts.append(len(word_entries))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def search(self, query: str, limit: int = 10) -> list[str]:
+        """
+        Finds the best matching names for a query.
+        :param query: The text typed so far, matched case-insensitively
+        :param limit: The maximum number of names to return
+        :return: The matching names, best first
+        """
+        normalized = normalize_name(query)
+        words = _tokens(normalized)
+        if not words or limit < 1:
+            return []
+
+        start, end = _prefix_range(self._normalized, normalized)
+        end = min(end, start + limit)
+        results = self._names[start:end]
+        if len(results) == limit:
+            return results
+
+        # names with a word starting with each query word
+        word_positions = [self._word_positions_for(word) for word in dict.fromkeys(words)]
+        if len(word_positions) == 1:
+            # the runs are already sorted, so only the first few positions of each are merged
+            candidates = heapq.merge(*word_positions[0])
+        else:
+            # start from the word matching the fewest names, the other words only filter it
+            word_positions.sort(key=lambda runs: sum(map(len, runs)))
+            matching = set(chain.from_iterable(word_positions[0]))
+            for runs in word_positions[1:]:
+                matching = matching.intersection(chain.from_iterable(runs))
+            candidates = sorted(matching)
+
+        found = set(range(start, end))
+        for position in candidates:
+            if position not in found:
+                results.append(self._names[position])
+                if len(results) == limit:
+                    break
+        return results
+
+    def _word_positions_for(self, prefix: str) -> list[list[int]]:
+        """
+        Gets the names with a word starting with prefix, as one sorted run of name positions per matching word.
+        """
+        first, last = _prefix_range(self._words, prefix)
+        return [self._word_positions[self._word_starts[index]:self._word_starts[index + 1]]
+                for index in range(first, last)]
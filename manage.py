@@ -0,0 +1,23 @@
+import argparse
+import sys
+
+from server import SessionLocal, backfill_daily_item_stats, check_daily_item_stats
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Maintenance commands for the inventory database')
+    parser.add_argument('action', choices=['backfill_stats', 'check_stats'],
+                        help='backfill_stats rebuilds the daily item rollup from the logs, '
+                             'check_stats compares the rollup with the logs')
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        if args.action == 'backfill_stats':
+            rows = backfill_daily_item_stats(db)
+            db.commit()
+            print(f'Wrote {rows} daily item stats rows')
+        elif args.action == 'check_stats':
+            mismatches = check_daily_item_stats(db)
+            for day, item_name, action, expected, actual in mismatches:
+                print(f'{day} {action} {item_name}: expected (count, quantity) {expected}, found {actual}')
+            print(f'{len(mismatches)} mismatched daily item stats rows')
+            sys.exit(1 if mismatches else 0)
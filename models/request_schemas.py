@@ -33,6 +33,38 @@ class CreateRequest(BaseModel):
     initial_stock: int
     max_checkout: int
 
+
+class BulkItemRequest(BaseModel):
+    """
+    Model representing a single row of a bulk import: the item is created with quantity as its initial stock if it
+    doesn't exist yet, otherwise quantity is added to its stock. max_checkout is only used when creating the item.
+    """
+    name: str
+    quantity: int
+    max_checkout: int = Field(default=5)
+
+
+class BulkRequest(BaseModel):
+    """
+    Model representing a request to create or restock many items at once.
+    """
+    items: list[BulkItemRequest]
+
+
+class CreateTagRequest(BaseModel):
+    """
+    Model representing a request to create a tag, optionally already applied to some items.
+    """
+    name: str
+    items: list[str] = Field(default_factory=list)
+
+
+class TagItemsRequest(BaseModel):
+    """
+    Model representing a request to apply a tag to items.
+    """
+    items: list[str]
+
 class WeekdayModel(str, Enum):
     """
     Enum model representing the days of the week when searching /logs by day of the week.
@@ -52,3 +84,49 @@ class ActionTypeModel(str, Enum):
     """
     CHECKOUT = 'checkout'
     RESTOCK = 'restock'
+
+
+class PopularityOrderModel(str, Enum):
+    """
+    Enum model representing what to rank items by when requesting /analytics/popular.
+    """
+    FREQUENCY = 'frequency'
+    QUANTITY = 'quantity'
+
+
+class ItemSortModel(str, Enum):
+    """
+    Enum model representing the column to sort by when requesting a page of /items.
+    """
+    ID = 'id'
+    NAME = 'name'
+    STOCK = 'stock'
+
+
+class TagMatchModel(str, Enum):
+    """
+    Enum model representing how items are matched against multiple tags:
+    ALL requires every tag, ANY requires at least one of them.
+    """
+    ALL = 'all'
+    ANY = 'any'
+
+
+class ExportKindModel(str, Enum):
+    """
+    Enum model representing what /export writes:
+    INVENTORY is every item, TRANSACTIONS is one row per checkout or restock,
+    ORDERS is every item line of the restocks and LOGS is every item line of every transaction.
+    """
+    INVENTORY = 'inventory'
+    TRANSACTIONS = 'transactions'
+    ORDERS = 'orders'
+    LOGS = 'logs'
+
+
+class ExportFormatModel(str, Enum):
+    """
+    Enum model representing the file format of /export.
+    """
+    CSV = 'csv'
+    XLSX = 'xlsx'
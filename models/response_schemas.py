@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, date
 from typing import Optional
 
 from pydantic import BaseModel
@@ -34,6 +34,74 @@ class TransactionResponse(BaseModel):
     items: list[TransactionItemResponse]
 
 
+class ItemPopularityResponse(BaseModel):
+    """
+    Model representing how often an item was checked out, returned by /analytics/popular
+    frequency is the number of checkouts that included the item, quantity is the total amount checked out.
+    """
+    item_name: str
+    frequency: int
+    quantity: int
+
+
+class DayFrequencyResponse(BaseModel):
+    """
+    Model representing the number of checkouts on a single day, returned by /analytics/peak-days
+    """
+    date: date
+    frequency: int
+
+
+class DayQuantityResponse(BaseModel):
+    """
+    Model representing the total quantity of an item checked out on a single day
+    """
+    date: date
+    quantity: int
+
+
+class ItemReportResponse(BaseModel):
+    """
+    Model representing the checkout history of a single item, returned by /analytics/item/{item_name}
+    days is sorted by quantity, highest first.
+    """
+    item_name: str
+    frequency: int
+    quantity: int
+    days: list[DayQuantityResponse]
+
+
+class BulkItemResult(BaseModel):
+    """
+    Model representing the outcome of a single row of a bulk import.
+    status is 'created', 'restocked' or 'invalid'. stock is the item's stock after the row was applied, and message
+    says why an invalid row was skipped.
+    """
+    name: str
+    status: str
+    stock: Optional[int] = None
+    message: Optional[str] = None
+
+
+class BulkResponse(BaseModel):
+    """
+    Model representing the outcome of a bulk import, returned by /items/bulk
+    results has one entry per row of the request, in the same order.
+    """
+    created: int
+    restocked: int
+    invalid: int
+    results: list[BulkItemResult]
+
+
+class TagResponse(BaseModel):
+    """
+    Model representing a tag and the names of the items it is applied to, returned by /tags
+    """
+    name: str
+    items: list[str]
+
+
 class MessageResponse(BaseModel):
     """
     Model representing a message sent by the server
@@ -0,0 +1,128 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+# A report's aggregate, such as item name -> (frequency, quantity). Values are tuples of counts, so two aggregates
+# are merged by adding the counts of matching keys.
+Counts = dict[Any, tuple[int, ...]]
+
+
+class ReportCache:
+    """
+    LRU cache of report aggregates. Each entry records the watermark it covers, the highest transaction id at the time
+    it was computed, so a repeat request only has to aggregate the transactions logged since then.
+
+    This relies on transaction ids being committed in increasing order, which holds for SQLite's single writer.
+    Deleting an item renames its logs, which changes old aggregates, so deletes must call clear.
+
+    Attributes:
+        max_entries (int): The maximum number of cached reports.
+        max_rows (int): The maximum number of aggregate rows kept across all cached reports.
+        hits (int): Requests answered from the cache without reading any logs.
+        folds (int): Requests answered by adding the logs newer than a cached report's watermark.
+        misses (int): Requests that were computed from scratch.
+        evictions (int): Reports dropped to stay within the size limits.
+    """
+    max_entries: int
+    max_rows: int
+    hits: int
+    folds: int
+    misses: int
+    evictions: int
+
+    def __init__(self, max_entries: int = 128, max_rows: int = 100_000):
+        """
+        Creates an empty cache.
+        :param max_entries: The maximum number of cached reports.
+        :param max_rows: The maximum number of aggregate rows kept across all cached reports.
+        """
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.hits = 0
+        self.folds = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[int, Counts]] = OrderedDict()
+        self._rows = 0
+        # bumped by clear, so reports computed from logs read before a clear are never stored
+        self._generation = 0
+
+    def get(self, key: Hashable, read_watermark: Callable[[], int], compute: Callable[[], Counts],
+            fold: Callable[[int, int], Counts]) -> Counts:
+        """
+        Returns the aggregate for key as of the current watermark, computing only what is missing from the cache.
+        The returned aggregate is shared with the cache and must not be modified.
+        :param key: The report and its parameters.
+        :param read_watermark: Returns the highest transaction id. It is called before compute or fold, which must
+            read the same snapshot of the logs.
+        :param compute: Aggregates every log.
+        :param fold: Called with (after_id, watermark), aggregates the logs with after_id < id <= watermark.
+        :return: The aggregate.
+        """
+        with self._lock:
+            generation = self._generation
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        watermark = read_watermark()
+        with self._lock:
+            if generation != self._generation:
+                entry = None
+
+        if entry is not None and entry[0] == watermark:
+            with self._lock:
+                self.hits += 1
+            return entry[1]
+
+        if entry is not None and entry[0] < watermark:
+            counts = _merge(entry[1], fold(entry[0], watermark))
+            with self._lock:
+                self.folds += 1
+        else:
+            counts = compute()
+            with self._lock:
+                self.misses += 1
+
+        self._store(key, watermark, counts, generation)
+        return counts
+
+    def clear(self) -> None:
+        """
+        Drops every cached report. Call after committing a change that rewrites existing logs.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._rows = 0
+            self._generation += 1
+
+    def _store(self, key: Hashable, watermark: int, counts: Counts, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation or len(counts) > self.max_rows:
+                return
+
+            # a concurrent request may already have stored a newer aggregate
+            current = self._entries.get(key)
+            if current is not None:
+                if current[0] >= watermark:
+                    return
+                self._rows -= len(current[1])
+
+            self._entries[key] = (watermark, counts)
+            self._entries.move_to_end(key)
+            self._rows += len(counts)
+
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._rows -= len(evicted)
+                self.evictions += 1
+
+
+def _merge(counts: Counts, delta: Counts) -> Counts:
+    merged = dict(counts)
+    for key, values in delta.items():
+        current = merged.get(key)
+        merged[key] = values if current is None else tuple(a + b for a, b in zip(current, values))
+    return merged
@@ -1,26 +1,99 @@
+import base64
+import csv
 import datetime
+import io
+import json
+import tempfile
+import threading
 from contextlib import contextmanager
-from typing import List, Union
+from functools import partial, cached_property, lru_cache
+from itertools import groupby, islice
+from typing import List, Union, Iterator, Callable, Iterable
 
-from fastapi import FastAPI, Depends, Response
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, relationship, Query
+import openpyxl
+from fastapi import FastAPI, Depends, Response, Query as QueryParam
+from pydantic import TypeAdapter
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, CheckConstraint, Index, PrimaryKeyConstraint
+from sqlalchemy import func, update, case, insert, delete, select, literal, or_, and_, type_coerce
+from sqlalchemy import create_engine, event, Engine, inspect, text, bindparam
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, relationship, Query, selectinload
 from sqlalchemy.orm import sessionmaker, declarative_base
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, StreamingResponse
 
+import analytics_engine
+from group_commit import GroupCommitWriter
+from item_search import ItemSearchIndex, normalize_name
+from report_cache import ReportCache
 from models.request_schemas import CreateRequest, ItemRequest, WeekdayModel, ActionTypeModel, MultiItemRequest
-from models.response_schemas import ItemResponse, MessageResponse
+from models.request_schemas import PopularityOrderModel, ItemSortModel
+from models.request_schemas import CreateTagRequest, TagItemsRequest, TagMatchModel, BulkRequest
+from models.request_schemas import ExportKindModel, ExportFormatModel
+from models.response_schemas import ItemResponse, MessageResponse, TagResponse, BulkResponse, BulkItemResult
+from models.response_schemas import ItemPopularityResponse, DayFrequencyResponse, DayQuantityResponse, ItemReportResponse
 from models.response_schemas import RESPONSE_404
 from models.response_schemas import TransactionResponse, TransactionItemResponse
+from settings import settings
 
-DATABASE_URL = 'sqlite:///inventory.db'
-engine = create_engine(DATABASE_URL, echo=True)  # echo=True logs SQL queries
+DATABASE_URL = settings.database_url
+
+
+def _make_engine(read_only: bool = False) -> Engine:
+    """
+    Creates an engine for DATABASE_URL using the configured settings.
+    SQLite connections are set up for concurrent access: WAL journal mode lets readers run while a write is in
+    progress, and synchronous=NORMAL only syncs at checkpoints instead of on every commit.
+    :param read_only: True to create connections that can only read from the database.
+    :return: The engine.
+    """
+    new_engine = create_engine(DATABASE_URL, echo=settings.database_echo, pool_size=settings.database_pool_size)
+
+    if new_engine.dialect.name == 'sqlite':
+        @event.listens_for(new_engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            if read_only:
+                cursor.execute('PRAGMA query_only = ON')
+            else:
+                # journal mode is stored in the database file, so only writers need to set it
+                cursor.execute('PRAGMA journal_mode = WAL')
+            cursor.execute('PRAGMA synchronous = NORMAL')
+            cursor.execute(f'PRAGMA busy_timeout = {settings.sqlite_busy_timeout_ms:d}')
+            cursor.execute(f'PRAGMA mmap_size = {settings.sqlite_mmap_size:d}')
+            cursor.execute(f'PRAGMA cache_size = {settings.sqlite_cache_size:d}')
+            cursor.execute('PRAGMA temp_store = MEMORY')
+            cursor.close()
+
+    return new_engine
+
+
+engine = _make_engine()
+# in-memory SQLite databases can't be shared between engines, so they read through the main engine
+read_engine = engine if engine.url.get_backend_name() != 'sqlite' or engine.url.database in (None, '', ':memory:') \
+    else _make_engine(read_only=True)
 SessionLocal = sessionmaker(bind=engine)
+ReadSessionLocal = sessionmaker(bind=read_engine)
 Base = declarative_base()
 
 app = FastAPI()
 
+# response header holding the cursor for the next page of /logs
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+TOTAL_COUNT_HEADER = 'X-Total-Count'
+# the most rows accepted by /items/bulk in one request, larger imports are sent in chunks
+BULK_MAX_ROWS = 5000
+# media type of /logs/stream, one JSON object per line
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+# number of rows fetched from the database at a time while streaming
+STREAM_CHUNK_SIZE = 500
+# bytes sent at a time when streaming an export file
+EXPORT_FILE_CHUNK_SIZE = 64 * 1024
+EXPORT_MEDIA_TYPES = {
+    ExportFormatModel.CSV: 'text/csv',
+    ExportFormatModel.XLSX: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
 
 def get_db():
     db = SessionLocal()
@@ -30,20 +103,66 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """
+    Read-only session, for endpoints that don't write so they never wait on checkout/restock writes.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 db_context = contextmanager(get_db)
+read_db_context = contextmanager(get_read_db)
 
 
 class Item(Base):
     __tablename__ = 'items'
+    __table_args__ = (
+        # only applied to newly created databases, SQLite can't add constraints to an existing table
+        CheckConstraint('stock >= 0', name='ck_items_stock_nonnegative'),
+        Index('ix_items_search_name', 'search_name'),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False, unique=True)
     stock = Column(Integer, default=0)
     max_checkout = Column(Integer)
+    # normalize_name(name), for case-insensitive lookups. Filled in on insert, and by migrate_database for items
+    # created before the column existed.
+    search_name = Column(String, default=lambda context: normalize_name(context.get_current_parameters()['name']))
+
+
+class Tag(Base):
+    __tablename__ = 'tags'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+
+class ItemTag(Base):
+    __tablename__ = 'item_tags'
+    __table_args__ = (
+        # the primary key covers items by tag, the index covers the tags of an item and deleting items
+        PrimaryKeyConstraint('tag_id', 'item_name'),
+        Index('ix_item_tags_item_name_tag_id', 'item_name', 'tag_id'),
+    )
+
+    tag_id = Column(Integer, ForeignKey('tags.id'), nullable=False)
+    item_name = Column(String, ForeignKey('items.name'), nullable=False)
 
 
 class Transaction(Base):
     __tablename__ = 'transactions'
+    # one index per /logs filter, each ending in timestamp so date ranges and ordering can use the same index
+    __table_args__ = (
+        Index('ix_transactions_timestamp', 'timestamp'),
+        Index('ix_transactions_action_timestamp', 'action', 'timestamp'),
+        Index('ix_transactions_student_id_timestamp', 'student_id', 'timestamp'),
+        Index('ix_transactions_day_of_week_timestamp', 'day_of_week', 'timestamp'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     action = Column(String, nullable=False)  # 'checkout' or 'restock'
@@ -58,6 +177,11 @@ class Transaction(Base):
 
 class TransactionItem(Base):
     __tablename__ = 'transaction_items'
+    __table_args__ = (
+        # covers the /logs item_name filter and renaming logs when an item is deleted
+        Index('ix_transaction_items_item_name_transaction_id', 'item_name', 'transaction_id'),
+        Index('ix_transaction_items_transaction_id', 'transaction_id'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     transaction_id = Column(Integer, ForeignKey('transactions.id'), nullable=False)
@@ -67,7 +191,149 @@ class TransactionItem(Base):
     transaction = relationship('Transaction', back_populates='entries')
 
 
-Base.metadata.create_all(engine)
+class DailyItemStat(Base):
+    """
+    Rollup of transaction_items per day, item and action, kept up to date by log_actions in the same transaction as
+    the logs themselves. Reports read from here instead of scanning every log.
+    """
+    __tablename__ = 'daily_item_stats'
+    __table_args__ = (
+        PrimaryKeyConstraint('date', 'item_name', 'action'),
+        Index('ix_daily_item_stats_item_name_action_date', 'item_name', 'action', 'date'),
+    )
+
+    date = Column(Date, nullable=False)  # UTC day of the transactions, the same as date(transactions.timestamp)
+    item_name = Column(String, nullable=False)
+    action = Column(String, nullable=False)
+    txn_count = Column(Integer, nullable=False)  # number of transactions the item was in
+    qty_sum = Column(Integer, nullable=False)  # total quantity of the item in those transactions
+
+
+def migrate_database(bind: Engine) -> None:
+    """
+    Brings an existing database up to date with the models. Safe to run on every startup.
+    create_all only creates missing tables, so indexes added to existing tables are created here.
+    Columns added to existing tables are added and filled in here, and if the daily_item_stats rollup is new, it is
+    backfilled from the existing logs.
+    :param bind: The engine to migrate.
+    """
+    inspector = inspect(bind)
+    needs_backfill = not inspector.has_table(DailyItemStat.__tablename__)
+    needs_search_name = inspector.has_table(Item.__tablename__) and \
+        'search_name' not in {column['name'] for column in inspector.get_columns(Item.__tablename__)}
+    Base.metadata.create_all(bind)
+    with bind.begin() as connection:
+        if needs_search_name:
+            connection.execute(text('ALTER TABLE items ADD COLUMN search_name VARCHAR'))
+            names = connection.execute(select(Item.id, Item.name)).all()
+            if names:
+                connection.execute(update(Item).where(Item.id == bindparam('item_id'))
+                                   .values(search_name=bindparam('normalized')),
+                                   [{'item_id': item_id, 'normalized': normalize_name(name)}
+                                    for item_id, name in names])
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+    if needs_backfill:
+        with Session(bind) as db:
+            backfill_daily_item_stats(db)
+            db.commit()
+
+
+class InventorySnapshot:
+    """
+    Immutable copy of the items table and the item tags at one inventory version, shared by every request and page
+    until the next write. Never modify a snapshot or the items in it.
+
+    Attributes:
+        version (int): The inventory version the snapshot was built for.
+        items (tuple[ItemResponse, ...]): Every item, in table order.
+        by_name (dict[str, ItemResponse]): Every item by name.
+        items_json (bytes): The /items response body.
+        tag_names (tuple[str, ...]): Every tag, sorted by name.
+        tags_by_item (dict[str, tuple[str, ...]]): The sorted tags of every item that has any, by item name.
+        search_index (ItemSearchIndex): The prefix index over the item names, for /items/search.
+    """
+    version: int
+    items: tuple[ItemResponse, ...]
+    by_name: dict[str, ItemResponse]
+    items_json: bytes
+    tag_names: tuple[str, ...]
+    tags_by_item: dict[str, tuple[str, ...]]
+
+    @cached_property
+    def search_index(self) -> ItemSearchIndex:
+        """The prefix index over the item names, built the first time a search needs it."""
+        return _search_index(tuple(item.name for item in self.items))
+
+    def __init__(self, version: int, items: list[ItemResponse], tags: list[tuple[str, str | None]] = ()):
+        """
+        :param version: The inventory version the snapshot is built for
+        :param items: Every item, in table order
+        :param tags: (tag name, item name) pairs sorted by tag name, with None for the item of unused tags
+        """
+        self.version = version
+        self.items = tuple(items)
+        self.by_name = {item.name: item for item in items}
+        self.items_json = _items_adapter.dump_json(items)
+        self.tag_names = tuple(dict.fromkeys(tag for tag, _ in tags))
+
+        tags_by_item = {}
+        for tag, item_name in tags:
+            if item_name is not None:
+                tags_by_item.setdefault(item_name, []).append(tag)
+        self.tags_by_item = {name: tuple(item_tags) for name, item_tags in tags_by_item.items()}
+
+
+_items_adapter = TypeAdapter(list[ItemResponse])
+# checkouts and restocks make new snapshots without changing any names, so the last index is reused until they change
+_search_index = lru_cache(maxsize=1)(ItemSearchIndex)
+_inventory_version = 0
+_snapshot: InventorySnapshot | None = None
+_snapshot_lock = threading.Lock()
+
+
+def bump_inventory_version() -> None:
+    """
+    Marks the current inventory snapshot as stale. Call after committing any change to the items table, or to
+    anything else shown with the items.
+    """
+    global _inventory_version
+    with _snapshot_lock:
+        _inventory_version += 1
+
+
+def inventory_snapshot(db: Session | None = None) -> InventorySnapshot:
+    """
+    Returns the snapshot for the current inventory version, building it once if the inventory changed since the
+    last snapshot.
+    :param db: Session to read the items with if a new snapshot is needed, or None to open a read session
+    :return: The snapshot
+    """
+    global _snapshot
+    with _snapshot_lock:
+        if _snapshot is not None and _snapshot.version == _inventory_version:
+            return _snapshot
+
+        # the version is read before the items, so a write committed during the read only makes the snapshot newer
+        # than its version, and the next call rebuilds it again
+        version = _inventory_version
+        if db is None:
+            with read_db_context() as read_db:
+                _snapshot = _read_snapshot(read_db, version)
+        else:
+            _snapshot = _read_snapshot(db, version)
+        return _snapshot
+
+
+def _read_snapshot(db: Session, version: int) -> InventorySnapshot:
+    items = [ItemResponse(id=row.id, name=row.name, stock=row.stock, max_checkout=row.max_checkout)
+             for row in db.query(Item).all()]
+    # every tag with its items in one join, instead of a query per item or per tag
+    tags = db.execute(select(Tag.name, ItemTag.item_name).outerjoin(ItemTag, ItemTag.tag_id == Tag.id)
+                      .order_by(Tag.name, ItemTag.item_name)).all()
+    return InventorySnapshot(version, items, [tuple(row) for row in tags])
 
 
 @app.delete('/delete_all', response_model=MessageResponse)
@@ -76,6 +342,8 @@ def delete_all_items(db: Session = Depends(get_db)):
     items = db.query(Item)
     _delete_item(db, items)
     db.commit()
+    bump_inventory_version()
+    _clear_report_cache()
     return MessageResponse(message='All items have been deleted.')
 
 
@@ -90,13 +358,125 @@ def delete_all_items(db: Session = Depends(get_db)):
                     {'name': 'baz', 'stock': 0, 'max_checkout': 10},
                 ]
             }
+        },
+        'headers': {
+            TOTAL_COUNT_HEADER: {
+                'description': 'Number of items matching the names filter. Only sent if limit was given.',
+                'schema': {'type': 'integer'}
+            }
         }
+    },
+    400: {
+        'model': MessageResponse,
+        'description': 'Invalid limit or offset.'
     }
 })
-def get_items(db: Session = Depends(get_db)) -> list[ItemResponse]:
-    """Fetch all items in inventory."""
+def get_items(response: Response = None,
+              db: Session = Depends(get_read_db),
+              limit: int | None = None,
+              offset: int = 0,
+              sort_by: ItemSortModel = ItemSortModel.NAME,
+              descending: bool = False,
+              names: list[str] | None = QueryParam(None),
+              tags: list[str] | None = QueryParam(None),
+              match: TagMatchModel = TagMatchModel.ALL):
+    """
+    Fetch all items in inventory.
+    If limit is given, only that page of the items sorted by sort_by is returned, optionally only including the given
+    names and the items with all or any of the given tags, and the X-Total-Count header is set to the number of
+    matching items.
+    """
+    if limit is None:
+        return Response(content=inventory_snapshot(db).items_json, media_type='application/json')
+    if limit < 1 or offset < 0:
+        return JSONResponse(status_code=400, content={'message': 'Invalid limit or offset.'})
+
+    total, items = item_page(db, limit, offset, sort_by, descending, names, tags, match)
+    if response is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(total)
+    return items
+
+
+def item_page(db: Session, limit: int, offset: int = 0, sort_by: ItemSortModel = ItemSortModel.NAME,
+              descending: bool = False, names: list[str] | None = None, tags: list[str] | None = None,
+              match: TagMatchModel = TagMatchModel.ALL) -> tuple[int, list[ItemResponse]]:
+    """
+    Fetches one page of items, sorted and filtered in the database.
+    :param db: The database session to use.
+    :param limit: The number of items on the page.
+    :param offset: The number of matching items before the page.
+    :param sort_by: The column to sort by.
+    :param descending: True to sort in descending order.
+    :param names: If given, only these items are included.
+    :param tags: If given, only items with all or any of these tags are included.
+    :param match: Whether items need all or any of the tags.
+    :return: The number of matching items and the items on the page.
+    """
+    query = db.query(Item)
+    if names is not None:
+        query = query.filter(Item.name.in_(names))
+    if tags:
+        query = query.filter(_tag_filter(tags, match))
+
+    # names are unique, so they break ties between equal stock and make the order stable across pages
+    column = getattr(Item, sort_by.value)
+    query = query.order_by(column.desc() if descending else column.asc(),
+                           Item.name.desc() if descending else Item.name.asc())
+
+    total = query.order_by(None).count()
+    return total, [ItemResponse(id=row.id, name=row.name, stock=row.stock, max_checkout=row.max_checkout)
+                   for row in query.offset(offset).limit(limit)]
+
+
+@app.get('/items/search', response_model=list[ItemResponse], responses={
+    200: {
+        'description': 'The best matching items, best first',
+        'content': {
+            'application/json': {
+                'example': [
+                    {'id': 2, 'name': 'Pencil', 'stock': 3, 'max_checkout': 1},
+                    {'id': 1, 'name': 'Blue Pen', 'stock': 10, 'max_checkout': 5},
+                ]
+            }
+        }
+    },
+    400: {
+        'model': MessageResponse,
+        'description': 'Invalid limit.'
+    }
+})
+def search_items(q: str = '', limit: int = 10, db: Session = Depends(get_read_db)):
+    """
+    Search items by name for autocomplete, ignoring case. Names starting with q come first, then names with a word
+    starting with q, each sorted by name. If q has several words, every one of them has to start a word of the name.
+    """
+    if limit < 1:
+        return JSONResponse(status_code=400, content={'message': 'limit must be at least 1.'})
+    snapshot = inventory_snapshot(db)
+    return [snapshot.by_name[name] for name in snapshot.search_index.search(q, limit)]
+
+
+@app.get('/items/by-tags', response_model=list[ItemResponse], responses={
+    200: {
+        'description': 'Items with the given tags, sorted by name',
+        'content': {
+            'application/json': {
+                'example': [
+                    {'id': 1, 'name': 'bar', 'stock': 10, 'max_checkout': 5},
+                ]
+            }
+        }
+    }
+})
+def get_items_by_tags(tags: list[str] = QueryParam(),
+                      match: TagMatchModel = TagMatchModel.ALL,
+                      db: Session = Depends(get_read_db)):
+    """
+    Fetch the items that have all (match=all) or any (match=any) of the given tags.
+    Tags that don't exist match no items.
+    """
     return [ItemResponse(id=row.id, name=row.name, stock=row.stock, max_checkout=row.max_checkout)
-            for row in db.query(Item).all()]
+            for row in db.query(Item).filter(_tag_filter(tags, match)).order_by(Item.name)]
 
 
 @app.get('/items/{item_name}', response_model=ItemResponse, responses={
@@ -110,13 +490,13 @@ def get_items(db: Session = Depends(get_db)) -> list[ItemResponse]:
     },
     **RESPONSE_404
 })
-def get_item(item_name: str, db: Session = Depends(get_db)):
+def get_item(item_name: str, db: Session = Depends(get_read_db)):
     """Gets data for a specific item in inventory"""
-    item = db.query(Item).filter_by(name=item_name).first()
+    item = inventory_snapshot(db).by_name.get(item_name)
     if not item:
         return JSONResponse(status_code=404, content={'message': 'Item not found.'})
 
-    return ItemResponse(id=item.id, name=item.name, stock=item.stock, max_checkout=item.max_checkout)
+    return item
 
 
 @app.delete('/items/{item_name}', response_model=MessageResponse, responses={
@@ -135,6 +515,8 @@ def delete_item(item_name: str, db: Session = Depends(get_db)):
 
     _delete_item(db, query)
     db.commit()
+    bump_inventory_version()
+    _clear_report_cache()
     return MessageResponse(message='Item deleted successfully.')
 
 
@@ -156,10 +538,82 @@ def create_item(request: CreateRequest, response: Response, db: Session = Depend
     item = Item(name=request.name, stock=request.initial_stock, max_checkout=request.max_checkout)
     db.add(item)
     db.commit()
+    bump_inventory_version()
     response.headers['Location'] = f'/items/{item.name}'
     return MessageResponse(message=f'Created item {item.name} with an initial stock of {item.stock}')
 
 
+@app.post('/items/bulk', response_model=BulkResponse, responses={
+    200: {
+        'model': BulkResponse,
+        'description': 'The outcome of every row, in request order.'
+    },
+    400: {
+        'model': MessageResponse,
+        'description': f'More than {BULK_MAX_ROWS} rows.'
+    },
+    409: {
+        'model': MessageResponse,
+        'description': 'An item was created by another request during the import, nothing was applied.'
+    }
+})
+def bulk_upsert_items(request: BulkRequest, db: Session = Depends(get_db)):
+    """
+    Creates or restocks many items in one transaction. Rows for items that don't exist create them with quantity as
+    the initial stock, rows for existing items (or items created by an earlier row) add quantity to the stock.
+    Rows with an empty name or a negative quantity, and rows creating an item with a max_checkout below 1, are reported
+    as invalid and skipped, the other rows still apply.
+    Restocks are logged as a single restock transaction.
+    """
+    if len(request.items) > BULK_MAX_ROWS:
+        return JSONResponse(status_code=400, content={'message': f'At most {BULK_MAX_ROWS} rows can be sent at once.'})
+
+    stock = {name: item.stock for name, item in _load_items(db, [row.name for row in request.items]).items()}
+    created: dict[str, dict] = {}
+    restocks: dict[str, int] = {}
+    results = []
+    for row in request.items:
+        if not row.name.strip():
+            results.append(BulkItemResult(name=row.name, status='invalid', message='Name must not be empty.'))
+            continue
+        if row.quantity < 0:
+            results.append(BulkItemResult(name=row.name, status='invalid', message='Quantity must not be negative.'))
+            continue
+
+        if row.name in stock:
+            stock[row.name] += row.quantity
+            if row.name in created:
+                created[row.name]['stock'] += row.quantity
+            elif row.quantity:
+                restocks[row.name] = restocks.get(row.name, 0) + row.quantity
+            results.append(BulkItemResult(name=row.name, status='restocked', stock=stock[row.name]))
+        elif row.max_checkout < 1:
+            results.append(BulkItemResult(name=row.name, status='invalid', message='Max checkout must be at least 1.'))
+        else:
+            stock[row.name] = row.quantity
+            created[row.name] = {'name': row.name, 'stock': row.quantity, 'max_checkout': row.max_checkout}
+            results.append(BulkItemResult(name=row.name, status='created', stock=row.quantity))
+
+    try:
+        if created:
+            db.execute(insert(Item), list(created.values()))
+        if restocks:
+            _apply_stock_changes(db, restocks)
+            log_actions(db, [(ActionTypeModel.RESTOCK, MultiItemRequest(
+                items=[ItemRequest(name=name, quantity=quantity) for name, quantity in restocks.items()]))])
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return JSONResponse(status_code=409, content={
+            'message': 'An item was created by another request during the import, nothing was applied.'})
+
+    if created or restocks:
+        bump_inventory_version()
+    statuses = [result.status for result in results]
+    return BulkResponse(created=statuses.count('created'), restocked=statuses.count('restocked'),
+                        invalid=statuses.count('invalid'), results=results)
+
+
 @app.post('/checkout', response_model=MessageResponse, responses={
     200: {
         'model': MessageResponse,
@@ -167,7 +621,7 @@ def create_item(request: CreateRequest, response: Response, db: Session = Depend
     },
     400: {
         'model': MessageResponse,
-        'description': 'Attempted to checkout more than the maximum allowed.'
+        'description': 'Attempted to checkout more than the maximum allowed, or a quantity below 1.'
     },
     409: {
         'model': MessageResponse,
@@ -177,98 +631,626 @@ def create_item(request: CreateRequest, response: Response, db: Session = Depend
 })
 def checkout_item(request: Union[ItemRequest, MultiItemRequest], db: Session = Depends(get_db)):
     """Checkout an item from inventory."""
-    multi_request: MultiItemRequest
-    if not isinstance(request, MultiItemRequest):
-        multi_request = MultiItemRequest(student_id=request.student_id, items=[request])
-    else:
-        multi_request = request
+    invalid = _check_quantities(request)
+    if invalid is not None:
+        return invalid
+    return _write(db, partial(_checkout, multi_request=_aggregate_request(request)))
 
-    not_found = []
-    insufficient_stock = []
-    over_max = []
-    for item_request in multi_request.items:
-        item = db.query(Item).filter_by(name=item_request.name).first()
 
-        if not item:
-            not_found.append(item_request.name)
-        elif item_request.quantity > item.max_checkout:
-            over_max.append(item_request.name)
-        elif item.stock < item_request.quantity:
-            insufficient_stock.append(item_request.name)
+@app.post('/restock', response_model=MessageResponse, responses={
+    200: {
+        'model': MessageResponse,
+        'description': 'Item restocked successfully.'
+    },
+    400: {
+        'model': MessageResponse,
+        'description': 'A quantity below 1.'
+    },
+    **RESPONSE_404
+})
+def restock_item(request: Union[ItemRequest, MultiItemRequest], db: Session = Depends(get_db)):
+    """Restock an item in inventory."""
+    invalid = _check_quantities(request)
+    if invalid is not None:
+        return invalid
+    return _write(db, partial(_restock, multi_request=_aggregate_request(request)))
 
-    if not_found:
-        return JSONResponse(status_code=404, content={'message': f'Item(s) {", ".join(not_found)} not found.'})
 
-    if over_max:
-        return JSONResponse(status_code=400, content={
-            'message': f'Attempted to checkout more than the max quantity allowed for items(s) {", ".join(over_max)}.'})
+@app.get('/tags', response_model=list[TagResponse], responses={
+    200: {
+        'description': 'Every tag and the items it is applied to',
+        'content': {
+            'application/json': {
+                'example': [
+                    {'name': 'snacks', 'items': ['bar', 'chips']},
+                ]
+            }
+        }
+    }
+})
+def get_tags(db: Session = Depends(get_read_db)):
+    """Fetch every tag, sorted by name, with the names of the items it is applied to."""
+    rows = db.execute(select(Tag.name, ItemTag.item_name).outerjoin(ItemTag, ItemTag.tag_id == Tag.id)
+                      .order_by(Tag.name, ItemTag.item_name))
+    return [TagResponse(name=name, items=[item_name for _, item_name in group if item_name is not None])
+            for name, group in groupby(rows, key=lambda row: row.name)]
 
-    if insufficient_stock:
-        return JSONResponse(status_code=409,
-                            content={'message': f'Not enough stock for item(s) {", ".join(insufficient_stock)}.'})
 
-    for item_request in multi_request.items:
-        db.query(Item).filter_by(name=item_request.name).first().stock -= item_request.quantity
+@app.post('/tags', status_code=201, response_model=MessageResponse, responses={
+    201: {
+        'model': MessageResponse,
+        'description': 'Tag created successfully.'
+    },
+    409: {
+        'model': MessageResponse,
+        'description': 'Tag with the given name already exists.'
+    },
+    **RESPONSE_404
+})
+def create_tag(request: CreateTagRequest, response: Response, db: Session = Depends(get_db)):
+    """Creates a new tag, applied to the given items"""
+    if db.query(Tag).filter_by(name=request.name).first():
+        return JSONResponse(status_code=409, content={'message': 'Tag with the given name already exists.'})
 
-    log_action(db, ActionTypeModel.CHECKOUT, items=multi_request)
-    db.commit()
+    tag = Tag(name=request.name)
+    db.add(tag)
+    db.flush()
+    not_found = _tag_items(db, tag, request.items)
+    if not_found:
+        db.rollback()
+        return JSONResponse(status_code=404, content={'message': f'Item(s) {", ".join(not_found)} not found.'})
 
-    return MessageResponse(message='Checked out items successfully.')
+    db.commit()
+    bump_inventory_version()
+    response.headers['Location'] = '/tags'
+    return MessageResponse(message=f'Created tag {tag.name}')
 
 
-@app.post('/restock', response_model=MessageResponse, responses={
+@app.delete('/tags/{tag_name}', response_model=MessageResponse, responses={
     200: {
         'model': MessageResponse,
-        'description': 'Item restocked successfully.'
+        'description': 'Tag deleted successfully',
     },
-    **RESPONSE_404
+    404: {'model': MessageResponse, 'detail': 'Tag not found.'}
 })
-def restock_item(request: Union[ItemRequest, MultiItemRequest], db: Session = Depends(get_db)):
-    """Restock an item in inventory."""
-    multi_request: MultiItemRequest
-    if not isinstance(request, MultiItemRequest):
-        multi_request = MultiItemRequest(student_id=request.student_id, items=[request])
-    else:
-        multi_request = request
+def delete_tag(tag_name: str, db: Session = Depends(get_db)):
+    """Deletes a tag and removes it from every item"""
+    tag = db.query(Tag).filter_by(name=tag_name).first()
+    if not tag:
+        return JSONResponse(status_code=404, content={'message': 'Tag not found.'})
 
-    not_found = []
-    missing_items = [] # scuffed way of checking name + quantity from items missing from database
-    for item_request in multi_request.items:
-        item = db.query(Item).filter_by(name=item_request.name).first()
+    db.execute(delete(ItemTag).where(ItemTag.tag_id == tag.id))
+    db.delete(tag)
+    db.commit()
+    bump_inventory_version()
+    return MessageResponse(message='Tag deleted successfully.')
 
-        if not item:
-            not_found.append(item_request.name)
-            missing_items.append(item_request)
 
+@app.post('/tags/{tag_name}/items', response_model=MessageResponse, responses={
+    200: {
+        'model': MessageResponse,
+        'description': 'Tag applied successfully.'
+    },
+    404: {'model': MessageResponse, 'detail': 'Tag or item(s) not found.'}
+})
+def tag_items(tag_name: str, request: TagItemsRequest, db: Session = Depends(get_db)):
+    """Applies a tag to items. Items that already have the tag are left as they are."""
+    tag = db.query(Tag).filter_by(name=tag_name).first()
+    if not tag:
+        return JSONResponse(status_code=404, content={'message': 'Tag not found.'})
+
+    not_found = _tag_items(db, tag, request.items)
     if not_found:
+        db.rollback()
+        return JSONResponse(status_code=404, content={'message': f'Item(s) {", ".join(not_found)} not found.'})
 
-        return JSONResponse(status_code=404, content={'message': f'Item(s) {", ".join(not_found)} not found.', # default message
-                                                      # a little verbose but just converts list to json
-                                                      'missing': f'[{",".join("{\"name\":\""+item.name+"\", \"quantity\":"+str(item.quantity)+"}" for item in missing_items)}]'}) 
+    db.commit()
+    bump_inventory_version()
+    return MessageResponse(message=f'Tagged {len(set(request.items))} item(s) with {tag.name}')
 
-    for item_request in multi_request.items:
-        db.query(Item).filter_by(name=item_request.name).first().stock += item_request.quantity
 
-    log_action(db, action=ActionTypeModel.RESTOCK, items=multi_request)
-    db.commit()
+@app.delete('/tags/{tag_name}/items/{item_name}', response_model=MessageResponse, responses={
+    200: {
+        'model': MessageResponse,
+        'description': 'Tag removed successfully.'
+    },
+    404: {'model': MessageResponse, 'detail': 'Item does not have the tag.'}
+})
+def untag_item(tag_name: str, item_name: str, db: Session = Depends(get_db)):
+    """Removes a tag from an item"""
+    removed = db.execute(delete(ItemTag).where(ItemTag.tag_id == select(Tag.id).where(Tag.name == tag_name)
+                                               .scalar_subquery(),
+                                               ItemTag.item_name == item_name)).rowcount
+    if not removed:
+        db.rollback()
+        return JSONResponse(status_code=404, content={'message': 'Item does not have the tag.'})
 
-    return MessageResponse(message=f'Restocked items successfully.')
+    db.commit()
+    bump_inventory_version()
+    return MessageResponse(message='Tag removed successfully.')
 
 
 @app.get('/logs', response_model=List[TransactionResponse], responses={
     200: {
         'model': List[TransactionResponse],
-        'description': 'The list of all transactions'
+        'description': 'The list of all transactions, oldest first',
+        'headers': {
+            NEXT_CURSOR_HEADER: {
+                'description': 'Cursor for the next page. Only sent if limit was given and there are more logs.',
+                'schema': {'type': 'string'}
+            }
+        }
+    },
+    400: {
+        'model': MessageResponse,
+        'description': 'Invalid limit or cursor.'
     }
 })
-def get_logs(db: Session = Depends(get_db),
+def get_logs(response: Response = None,
+             db: Session = Depends(get_read_db),
              day_of_week: WeekdayModel | int | None = None,
              student_id: str | None = None,
              item_name: str | None = None,
              start_date: datetime.date | None = None,
              end_date: datetime.date | None = None,
-             action: ActionTypeModel | None = None) -> list[TransactionResponse]:
-    """Fetch all action logs."""
+             action: ActionTypeModel | None = None,
+             limit: int | None = None,
+             cursor: str | None = None) -> list[TransactionResponse]:
+    """
+    Fetch all action logs.
+    If limit is given, at most limit logs are returned and the next page can be fetched by passing the
+    X-Next-Cursor response header back as cursor, with the same filters.
+    """
+    query = _logs_query(db, day_of_week=day_of_week, student_id=student_id, item_name=item_name,
+                        start_date=start_date, end_date=end_date, action=action)
+    # load the entries of every transaction with one extra IN query, instead of one lazy load per transaction
+    query = query.options(selectinload(Transaction.entries))
+
+    # keyset pagination: continue after the (timestamp, id) of the last log on the previous page,
+    # which the timestamp indexes (ending in the implicit rowid) can seek to directly at any depth
+    raw_timestamp = type_coerce(Transaction.timestamp, String)
+    query = query.order_by(Transaction.timestamp, Transaction.id)
+    if cursor is not None:
+        try:
+            after_timestamp, after_id = _decode_cursor(cursor)
+        except ValueError:
+            return JSONResponse(status_code=400, content={'message': 'Invalid cursor.'})
+        query = query.filter(or_(raw_timestamp > after_timestamp,
+                                 and_(raw_timestamp == after_timestamp, Transaction.id > after_id)))
+
+    if limit is not None:
+        if limit < 1:
+            return JSONResponse(status_code=400, content={'message': 'limit must be at least 1.'})
+
+        transactions = query.limit(limit + 1).all()
+        if len(transactions) > limit:
+            transactions = transactions[:limit]
+            last = transactions[-1]
+            if response is not None:
+                # the stored timestamp text is used so the cursor compares exactly like the column does
+                last_timestamp = db.execute(select(raw_timestamp).where(Transaction.id == last.id)).scalar_one()
+                response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(last_timestamp, last.id)
+    else:
+        transactions = query.all()
+
+    return [
+        TransactionResponse(transaction_id=transaction.id,
+                            student_id=transaction.student_id,
+                            day_of_week=transaction.day_of_week,
+                            action=transaction.action,
+                            timestamp=transaction.timestamp,
+                            items=[TransactionItemResponse(item_name=item.item_name, item_quantity=item.item_quantity)
+                                   for item in transaction.entries])
+        for transaction in transactions]
+
+
+@app.get('/logs/stream', response_class=StreamingResponse, responses={
+    200: {
+        'description': 'Every matching transaction as newline delimited JSON (one TransactionResponse per line), '
+                       'oldest first',
+        'content': {NDJSON_MEDIA_TYPE: {}}
+    }
+})
+def stream_logs(day_of_week: WeekdayModel | int | None = None,
+                student_id: str | None = None,
+                item_name: str | None = None,
+                start_date: datetime.date | None = None,
+                end_date: datetime.date | None = None,
+                action: ActionTypeModel | None = None) -> StreamingResponse:
+    """
+    Stream all action logs, one transaction per line.
+    Logs are read from a database cursor as they are sent, so memory use doesn't depend on the size of the history.
+    """
+    return StreamingResponse(_iter_logs_ndjson(day_of_week=day_of_week, student_id=student_id, item_name=item_name,
+                                               start_date=start_date, end_date=end_date, action=action),
+                             media_type=NDJSON_MEDIA_TYPE)
+
+
+def _iter_logs_ndjson(**filters) -> Iterator[bytes]:
+    """
+    Generates the lines of /logs/stream.
+    The generator opens its own session since it keeps running after the endpoint has returned.
+    :param filters: The /logs filters (see _logs_query)
+    :return: Iterator of encoded lines, one per transaction
+    """
+    with read_db_context() as db:
+        for entries in _log_entries_by_transaction(db, **filters):
+            first = entries[0]
+            transaction = TransactionResponse(
+                transaction_id=first.id,
+                student_id=first.student_id,
+                day_of_week=first.day_of_week,
+                action=first.action,
+                timestamp=first.timestamp,
+                items=[TransactionItemResponse(item_name=entry.item_name, item_quantity=entry.item_quantity)
+                       for entry in entries if entry.item_name is not None])
+            yield transaction.model_dump_json().encode() + b'\n'
+
+
+@app.get('/export/{kind}.{file_format}', response_class=StreamingResponse, responses={
+    200: {
+        'description': 'The export as a file download',
+        'content': {EXPORT_MEDIA_TYPES[ExportFormatModel.CSV]: {}, EXPORT_MEDIA_TYPES[ExportFormatModel.XLSX]: {}}
+    }
+})
+def export_file(kind: ExportKindModel, file_format: ExportFormatModel) -> StreamingResponse:
+    """
+    Download the inventory, the transactions, the restock orders or every log line as a CSV or Excel file.
+    CSV files are sent as they are written. Excel files are built in a temporary file first, then sent in chunks.
+    The inventory export puts the stock last, so it can be imported back.
+    """
+    header, rows = EXPORTS[kind]
+    if file_format == ExportFormatModel.CSV:
+        content = _iter_csv_chunks(header, rows)
+    else:
+        content = _iter_xlsx_chunks(kind.value, header, rows)
+    return StreamingResponse(content, media_type=EXPORT_MEDIA_TYPES[file_format],
+                             headers={'Content-Disposition': f'attachment; filename="{kind.value}.{file_format.value}"'})
+
+
+def _iter_csv_chunks(header: list[str], rows: Callable[[Session], Iterator[tuple]]) -> Iterator[bytes]:
+    """
+    Generates a CSV file, encoding STREAM_CHUNK_SIZE rows at a time.
+    :param header: The column names
+    :param rows: Reads the rows from the session
+    :return: Iterator of encoded chunks
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    with read_db_context() as db:
+        for chunk in chunked(rows(db), STREAM_CHUNK_SIZE):
+            writer.writerows(chunk)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _iter_xlsx_chunks(title: str, header: list[str], rows: Callable[[Session], Iterator[tuple]]) -> Iterator[bytes]:
+    """
+    Generates an Excel file. An xlsx file is a zip archive that can only be written once every row is known, so
+    the rows are written with openpyxl's write only mode, which keeps them in a temporary file rather than in memory,
+    and the finished file is sent in chunks.
+    :param title: The sheet name
+    :param header: The column names
+    :param rows: Reads the rows from the session
+    :return: Iterator of file chunks
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(title)
+    sheet.append(header)
+    with read_db_context() as db:
+        for row in rows(db):
+            sheet.append(tuple(row))
+
+    with tempfile.TemporaryFile() as file:
+        workbook.save(file)
+        file.seek(0)
+        while chunk := file.read(EXPORT_FILE_CHUNK_SIZE):
+            yield chunk
+
+
+def chunked(rows: Iterable, size: int) -> Iterator[list]:
+    """
+    Groups rows into lists of at most size rows, reading only one chunk ahead.
+    :param rows: The rows, usually a generator
+    :param size: The number of rows per chunk
+    :return: A generator of chunks
+    """
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _log_entries(db: Session, **filters) -> Query:
+    """
+    Builds the query reading one row per transaction entry, oldest transaction first, STREAM_CHUNK_SIZE rows at a
+    time. Transactions without entries get one row with no item.
+    :param db: The database session
+    :param filters: The /logs filters (see _logs_query)
+    :return: The query
+    """
+    return (_logs_query(db, **filters)
+            .outerjoin(Transaction.entries)
+            .with_entities(Transaction.id, Transaction.student_id, Transaction.day_of_week, Transaction.action,
+                           Transaction.timestamp, TransactionItem.item_name, TransactionItem.item_quantity)
+            .order_by(Transaction.timestamp, Transaction.id)
+            .execution_options(yield_per=STREAM_CHUNK_SIZE))
+
+
+def _log_entries_by_transaction(db: Session, **filters) -> Iterator[list]:
+    """
+    Reads the rows of _log_entries grouped by transaction.
+    :param db: The database session
+    :param filters: The /logs filters (see _logs_query)
+    :return: Iterator of the rows of each transaction
+    """
+    # the rows of a transaction are next to each other since they're ordered by transaction
+    for _, entries in groupby(_log_entries(db, **filters), key=lambda row: row.id):
+        yield list(entries)
+
+
+def _export_inventory(db: Session) -> Iterator[tuple]:
+    return iter(db.query(Item)
+                .with_entities(Item.name, Item.max_checkout, Item.stock)
+                .order_by(Item.name)
+                .execution_options(yield_per=STREAM_CHUNK_SIZE))
+
+
+def _export_transactions(db: Session) -> Iterator[tuple]:
+    for entries in _log_entries_by_transaction(db):
+        first = entries[0]
+        yield (first.id, first.timestamp, first.day_of_week, first.action, first.student_id,
+               sum(entry.item_name is not None for entry in entries),
+               sum(entry.item_quantity or 0 for entry in entries))
+
+
+def _export_orders(db: Session) -> Iterator[tuple]:
+    for row in _log_entries(db, action=ActionTypeModel.RESTOCK):
+        if row.item_name is not None:
+            yield row.id, row.timestamp, row.item_name, row.item_quantity
+
+
+def _export_logs(db: Session) -> Iterator[tuple]:
+    for row in _log_entries(db):
+        yield row.id, row.timestamp, row.day_of_week, row.action, row.student_id, row.item_name, row.item_quantity
+
+
+# /export kind -> (column names, function streaming the rows from a session)
+EXPORTS: dict[ExportKindModel, tuple[list[str], Callable[[Session], Iterator[tuple]]]] = {
+    ExportKindModel.INVENTORY: (['Product', 'Max Checkout', 'Stock'], _export_inventory),
+    ExportKindModel.TRANSACTIONS: (['Transaction', 'Timestamp', 'Day', 'Action', 'Student', 'Items', 'Quantity'],
+                                   _export_transactions),
+    ExportKindModel.ORDERS: (['Transaction', 'Timestamp', 'Product', 'Quantity'], _export_orders),
+    ExportKindModel.LOGS: (['Transaction', 'Timestamp', 'Day', 'Action', 'Student', 'Product', 'Quantity'],
+                           _export_logs),
+}
+
+
+@app.get('/analytics/popular', response_model=list[ItemPopularityResponse], responses={
+    200: {
+        'model': list[ItemPopularityResponse],
+        'description': 'Items ranked by how often they were checked out'
+    }
+})
+def get_popular_items(db: Session = Depends(get_read_db),
+                      start_date: datetime.date | None = None,
+                      end_date: datetime.date | None = None,
+                      order_by: PopularityOrderModel = PopularityOrderModel.FREQUENCY,
+                      least: bool = False,
+                      limit: int | None = None) -> list[ItemPopularityResponse]:
+    """
+    Rank items in inventory by the number of checkouts they were in (frequency) or by the total quantity checked out.
+    Most popular items come first and only include items that were checked out.
+    If least is true, least popular items come first and items that were never checked out are included with zeros.
+    """
+    if settings.analytics_engine == 'pandas':
+        return analytics_engine.popular_items(db.get_bind(), start_date, end_date, order_by, least, limit,
+                                              workers=settings.analytics_workers)
+
+    checkouts = (select(DailyItemStat.item_name,
+                        func.sum(DailyItemStat.txn_count).label('frequency'),
+                        func.sum(DailyItemStat.qty_sum).label('quantity'))
+                 .where(DailyItemStat.action == ActionTypeModel.CHECKOUT, *_stat_date_filters(start_date, end_date))
+                 .group_by(DailyItemStat.item_name))
+
+    if report_cache is None:
+        # starting from items means deleted items are left out, and never checked out items get a row of zeros
+        checkouts = checkouts.subquery()
+        frequency = func.coalesce(checkouts.c.frequency, 0)
+        quantity = func.coalesce(checkouts.c.quantity, 0)
+        rank = frequency if order_by == PopularityOrderModel.FREQUENCY else quantity
+        statement = select(Item.name, frequency, quantity).outerjoin(checkouts, checkouts.c.item_name == Item.name)
+        if least:
+            statement = statement.order_by(rank, Item.name)
+        else:
+            statement = statement.where(frequency > 0).order_by(rank.desc(), Item.name)
+        return [ItemPopularityResponse(item_name=name, frequency=frequency, quantity=quantity)
+                for name, frequency, quantity in db.execute(statement.limit(limit))]
+
+    def fold(after_id: int, watermark: int):
+        return _new_checkout_counts(db, after_id, watermark, TransactionItem.item_name,
+                                    _stat_date_filters(start_date, end_date, day=_transaction_day()))
+
+    counts = _cached_counts(db, ('popular', start_date, end_date), lambda: _counts(db.execute(checkouts)), fold)
+
+    # the cached aggregate lives in Python, so it is joined onto the items here rather than in SQL. Items created
+    # since the aggregate was cached still get their row of zeros, since nothing clears the cache when they are added.
+    rows = [(name, *counts.get(name, (0, 0))) for name in db.execute(select(Item.name)).scalars()]
+    rank = 1 if order_by == PopularityOrderModel.FREQUENCY else 2
+    if least:
+        rows.sort(key=lambda row: (row[rank], row[0]))
+    else:
+        rows = sorted((row for row in rows if row[1] > 0), key=lambda row: (-row[rank], row[0]))
+
+    return [ItemPopularityResponse(item_name=name, frequency=frequency, quantity=quantity)
+            for name, frequency, quantity in rows[:limit]]
+
+
+@app.get('/analytics/peak-days', response_model=list[DayFrequencyResponse], responses={
+    200: {
+        'model': list[DayFrequencyResponse],
+        'description': 'Days ranked by number of checkouts'
+    }
+})
+def get_peak_days(db: Session = Depends(get_read_db),
+                  start_date: datetime.date | None = None,
+                  end_date: datetime.date | None = None,
+                  limit: int | None = None) -> list[DayFrequencyResponse]:
+    """Rank days by the number of checkouts on that day, busiest first."""
+    if settings.analytics_engine == 'pandas':
+        return analytics_engine.peak_days(db.get_bind(), start_date, end_date, limit, workers=settings.analytics_workers)
+
+    def count_days(*filters):
+        day = _transaction_day()
+        return _counts(db.execute(select(day, func.count(Transaction.id))
+                                  .where(Transaction.action == ActionTypeModel.CHECKOUT,
+                                         *_date_filters(start_date, end_date), *filters)
+                                  .group_by(day)))
+
+    counts = _cached_counts(db, ('peak-days', start_date, end_date), count_days,
+                            lambda after_id, watermark: count_days(Transaction.id > after_id,
+                                                                   Transaction.id <= watermark))
+
+    days = sorted(counts.items(), key=lambda day: (-day[1][0], day[0]))
+    return [DayFrequencyResponse(date=day, frequency=frequency) for day, (frequency,) in days[:limit]]
+
+
+@app.get('/analytics/item/{item_name}', response_model=ItemReportResponse, responses={
+    200: {
+        'model': ItemReportResponse,
+        'description': 'Checkout history of the item'
+    },
+    **RESPONSE_404
+})
+def get_item_report(item_name: str,
+                    db: Session = Depends(get_read_db),
+                    start_date: datetime.date | None = None,
+                    end_date: datetime.date | None = None):
+    """
+    Summarize the checkouts of a single item, with the total quantity checked out per day.
+    If no item is named exactly item_name, an item with the same name ignoring case is used.
+    """
+    item = db.query(Item.name).filter_by(name=item_name).first() or \
+        db.query(Item.name).filter_by(search_name=normalize_name(item_name)).order_by(Item.name).first()
+    if item is None:
+        return JSONResponse(status_code=404, content={'message': 'Item not found.'})
+    item_name = item.name
+    if settings.analytics_engine == 'pandas':
+        return analytics_engine.item_report(db.get_bind(), item_name, start_date, end_date)
+
+    def compute():
+        return _counts(db.execute(select(DailyItemStat.date, DailyItemStat.txn_count, DailyItemStat.qty_sum)
+                                  .where(DailyItemStat.item_name == item_name,
+                                         DailyItemStat.action == ActionTypeModel.CHECKOUT,
+                                         *_stat_date_filters(start_date, end_date))))
+
+    def fold(after_id: int, watermark: int):
+        return _new_checkout_counts(db, after_id, watermark, _transaction_day(),
+                                    [TransactionItem.item_name == item_name,
+                                     *_stat_date_filters(start_date, end_date, day=_transaction_day())])
+
+    counts = _cached_counts(db, ('item', item_name, start_date, end_date), compute, fold)
+
+    days = sorted(counts.items(), key=lambda day: (-day[1][1], day[0]))
+    return ItemReportResponse(item_name=item_name,
+                              frequency=sum(day_frequency for _, (day_frequency, _) in days),
+                              quantity=sum(day_quantity for _, (_, day_quantity) in days),
+                              days=[DayQuantityResponse(date=day, quantity=day_quantity)
+                                    for day, (_, day_quantity) in days])
+
+
+def _cached_counts(db: Session, key: tuple, compute, fold) -> dict:
+    """
+    Gets a report's aggregate through the report cache, or computes it directly if the cache is disabled.
+    :param db: The read session the aggregate is computed with
+    :param key: The report and its parameters
+    :param compute: Aggregates every log
+    :param fold: Aggregates the logs with after_id < id <= watermark, called with (after_id, watermark)
+    :return: The aggregate
+    """
+    if report_cache is None:
+        return compute()
+
+    def read_watermark() -> int:
+        connection = db.connection()
+        # pysqlite doesn't start a transaction for reads, so every statement would read its own snapshot.
+        # The watermark and the aggregate have to come from the same one. The session's transaction doesn't say
+        # whether SQLite has one open, an earlier report in the same session may already have begun it.
+        if db.get_bind().dialect.name == 'sqlite' and not connection.connection.dbapi_connection.in_transaction:
+            connection.exec_driver_sql('BEGIN')
+        return db.scalar(select(func.coalesce(func.max(Transaction.id), 0)))
+
+    return report_cache.get(key, read_watermark, compute, fold)
+
+
+def _new_checkout_counts(db: Session, after_id: int, watermark: int, key, filters: list) -> dict:
+    """
+    Counts the checkout lines logged after a cached report was computed, to fold into it.
+    :param db: The database session
+    :param after_id: The watermark of the cached report
+    :param watermark: The current watermark
+    :param key: The column to group the lines by
+    :param filters: Conditions limiting which lines are counted
+    :return: key -> (frequency, quantity)
+    """
+    return _counts(db.execute(select(key, func.count(TransactionItem.id), func.sum(TransactionItem.item_quantity))
+                              .join(Transaction, Transaction.id == TransactionItem.transaction_id)
+                              .where(Transaction.id > after_id, Transaction.id <= watermark,
+                                     Transaction.action == ActionTypeModel.CHECKOUT, *filters)
+                              .group_by(key)))
+
+
+def _counts(rows) -> dict:
+    """Turns (key, count, ...) rows into a key -> (count, ...) aggregate."""
+    return {key: tuple(values) for key, *values in rows}
+
+
+def _transaction_day():
+    """The UTC day of a transaction, the same day daily_item_stats files it under."""
+    return type_coerce(func.date(Transaction.timestamp), Date)
+
+
+def _encode_cursor(timestamp: str, transaction_id: int) -> str:
+    """
+    Encodes the position of a log as an opaque /logs cursor.
+    :param timestamp: The log timestamp, as stored in the database
+    :param transaction_id: The log (transaction) id
+    :return: The cursor
+    """
+    return base64.urlsafe_b64encode(json.dumps([timestamp, transaction_id]).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[str, int]:
+    """
+    Decodes a cursor created by _encode_cursor.
+    :param cursor: The cursor
+    :return: The (timestamp, id) of the log the cursor points to
+    :raises ValueError: If the cursor is malformed
+    """
+    try:
+        timestamp, transaction_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+    if not isinstance(timestamp, str) or not isinstance(transaction_id, int):
+        raise ValueError('Invalid cursor')
+    return timestamp, transaction_id
+
+
+def _logs_query(db: Session,
+                day_of_week: WeekdayModel | int | None = None,
+                student_id: str | None = None,
+                item_name: str | None = None,
+                start_date: datetime.date | None = None,
+                end_date: datetime.date | None = None,
+                action: ActionTypeModel | None = None) -> Query[Transaction]:
+    """
+    Builds the query for transactions matching the /logs filters. Every filter has an index (see Transaction).
+    :return: The transaction query
+    """
     query = db.query(Transaction)
 
     if day_of_week is not None:
@@ -283,22 +1265,40 @@ def get_logs(db: Session = Depends(get_db),
     if action is not None:
         query = query.filter_by(action=action)
     if item_name is not None:
-        query = query.filter(Transaction.entries.any(item_name=item_name))
+        # an IN subquery lets SQLite look the ids up by item name first,
+        # where entries.any() would be a correlated EXISTS run against every transaction
+        query = query.filter(Transaction.id.in_(
+            select(TransactionItem.transaction_id).where(TransactionItem.item_name == item_name)))
+    return query.filter(*_date_filters(start_date, end_date))
+
+
+def _date_filters(start_date: datetime.date | None, end_date: datetime.date | None) -> list:
+    """
+    Builds the conditions for transactions between start_date and end_date. Either date may be None for no limit.
+    :return: The list of conditions
+    """
+    filters = []
     if start_date is not None:
-        query = query.filter(Transaction.timestamp >= start_date)
+        filters.append(Transaction.timestamp >= start_date)
     if end_date is not None:
-        query = query.filter(Transaction.timestamp <= end_date)
+        filters.append(Transaction.timestamp <= end_date)
+    return filters
 
-    transactions = query.all()
-    return [
-        TransactionResponse(transaction_id=transaction.id,
-                            student_id=transaction.student_id,
-                            day_of_week=transaction.day_of_week,
-                            action=transaction.action,
-                            timestamp=transaction.timestamp,
-                            items=[TransactionItemResponse(item_name=item.item_name, item_quantity=item.item_quantity)
-                                   for item in transaction.entries])
-        for transaction in transactions]
+
+def _stat_date_filters(start_date: datetime.date | None, end_date: datetime.date | None,
+                       day=DailyItemStat.date) -> list:
+    """
+    Builds the conditions for daily_item_stats rows between start_date and end_date, matching _date_filters.
+    Timestamps are compared against midnight of end_date there, so only days before end_date are included.
+    :param day: The day column to filter, for applying the same range to transactions
+    :return: The list of conditions
+    """
+    filters = []
+    if start_date is not None:
+        filters.append(day >= start_date)
+    if end_date is not None:
+        filters.append(day < end_date)
+    return filters
 
 
 def _delete_item(db: Session, query: Query[Item]):
@@ -309,16 +1309,354 @@ def _delete_item(db: Session, query: Query[Item]):
     """
     items = query.all()
     for item in items:
+        deleted_name = f'[DELETED] {item.name}'
         db.query(TransactionItem).filter_by(item_name=item.name).update(
-            {TransactionItem.item_name: f'[DELETED] {item.name}'})
+            {TransactionItem.item_name: deleted_name})
+
+        # an item can be deleted more than once under the same name, so merge into any existing deleted rows
+        stats = select(DailyItemStat.date, literal(deleted_name), DailyItemStat.action, DailyItemStat.txn_count,
+                       DailyItemStat.qty_sum).where(DailyItemStat.item_name == item.name)
+        db.execute(_upsert_daily_item_stats(db, stats))
+        db.execute(delete(DailyItemStat).where(DailyItemStat.item_name == item.name))
+        db.execute(delete(ItemTag).where(ItemTag.item_name == item.name))
 
     query.delete()
 
 
+def _tag_filter(tags: list[str], match: TagMatchModel):
+    """
+    Builds a filter on Item for the items with all or any of the given tags.
+    :param tags: The tag names
+    :param match: ALL to require every tag, ANY to require at least one
+    :return: The filter, for Query.filter or Select.where
+    """
+    tags = set(tags)
+    tagged = (select(ItemTag.item_name).join(Tag, Tag.id == ItemTag.tag_id)
+              .where(Tag.name.in_(tags)))
+    if match == TagMatchModel.ALL:
+        tagged = tagged.group_by(ItemTag.item_name).having(func.count() == len(tags))
+    return Item.name.in_(tagged)
+
+
+def _tag_items(db: Session, tag: Tag, item_names: list[str]) -> list[str]:
+    """
+    Applies a tag to items that don't have it yet. Doesn't commit.
+    :param db: The database session
+    :param tag: The tag, which must have an id
+    :param item_names: The names of the items
+    :return: The names that don't exist, in which case nothing was applied
+    """
+    item_names = sorted(set(item_names))
+    existing = set(db.execute(select(Item.name).where(Item.name.in_(item_names))).scalars())
+    not_found = [name for name in item_names if name not in existing]
+    if not_found or not item_names:
+        return not_found
+
+    tagged = set(db.execute(select(ItemTag.item_name).where(ItemTag.tag_id == tag.id,
+                                                             ItemTag.item_name.in_(item_names))).scalars())
+    new_rows = [{'tag_id': tag.id, 'item_name': name} for name in item_names if name not in tagged]
+    if new_rows:
+        db.execute(insert(ItemTag), new_rows)
+    return []
+
+
+def import_tags(db: Session, tags: dict[str, list[str]]) -> int:
+    """
+    Adds tags from a tag name -> item names dictionary, the format tags were kept in before they were stored in the
+    database. Items that no longer exist are skipped. Doesn't commit.
+    :param db: The database session
+    :param tags: The tags to add, merged into any existing tags with the same name
+    :return: The number of items tagged
+    """
+    existing_items = set(db.execute(select(Item.name)).scalars())
+    count = 0
+    for name, item_names in tags.items():
+        tag = db.query(Tag).filter_by(name=name).first()
+        if tag is None:
+            tag = Tag(name=name)
+            db.add(tag)
+            db.flush()
+        item_names = [item_name for item_name in item_names if item_name in existing_items]
+        _tag_items(db, tag, item_names)
+        count += len(item_names)
+    return count
+
+
+def _clear_report_cache() -> None:
+    """Clears cached reports after deleting items, which renames their logs. Call after committing."""
+    if report_cache is not None:
+        report_cache.clear()
+
+
+def _write(db: Session, apply) -> Union[MessageResponse, JSONResponse]:
+    """
+    Applies a checkout/restock and commits it, either directly with the given session or through the group commit
+    writer if group commit mode is enabled.
+    :param db: The database session, unused in group commit mode
+    :param apply: The write to apply, called with the session it should use (see _checkout and _restock)
+    :return: The response from the write
+    """
+    if group_commit_writer is not None:
+        response = group_commit_writer.submit(apply)
+    else:
+        response, log = apply(db)
+        if log is None:
+            db.rollback()
+            return response
+
+        log_actions(db, [log])
+        db.commit()
+
+    # failed writes are rolled back, so only successful ones change the inventory
+    if isinstance(response, MessageResponse):
+        bump_inventory_version()
+    return response
+
+
+def _checkout(db: Session, multi_request: MultiItemRequest) -> tuple[Union[MessageResponse, JSONResponse], tuple | None]:
+    """
+    Applies a checkout without committing it.
+    :param db: The database session
+    :param multi_request: The aggregated checkout request
+    :return: The response, and the (action, items) to log if the checkout succeeded or None if it failed
+    """
+    items = _load_items(db, [item_request.name for item_request in multi_request.items])
+
+    not_found = []
+    insufficient_stock = []
+    over_max = []
+    for item_request in multi_request.items:
+        item = items.get(item_request.name)
+
+        if not item:
+            not_found.append(item_request.name)
+        elif item_request.quantity > item.max_checkout:
+            over_max.append(item_request.name)
+        elif item.stock < item_request.quantity:
+            insufficient_stock.append(item_request.name)
+
+    if not_found:
+        return JSONResponse(status_code=404, content={'message': f'Item(s) {", ".join(not_found)} not found.'}), None
+
+    if over_max:
+        return JSONResponse(status_code=400, content={
+            'message': f'Attempted to checkout more than the max quantity allowed for items(s) {", ".join(over_max)}.'}), None
+
+    if insufficient_stock:
+        return JSONResponse(status_code=409,
+                            content={'message': f'Not enough stock for item(s) {", ".join(insufficient_stock)}.'}), None
+
+    insufficient_stock = _remove_stock(db, {item_request.name: item_request.quantity
+                                            for item_request in multi_request.items})
+    if insufficient_stock:
+        # another checkout took the stock between the check above and the update
+        return JSONResponse(status_code=409,
+                            content={'message': f'Not enough stock for item(s) {", ".join(insufficient_stock)}.'}), None
+
+    return MessageResponse(message='Checked out items successfully.'), (ActionTypeModel.CHECKOUT, multi_request)
+
+
+def _restock(db: Session, multi_request: MultiItemRequest) -> tuple[Union[MessageResponse, JSONResponse], tuple | None]:
+    """
+    Applies a restock without committing it.
+    :param db: The database session
+    :param multi_request: The aggregated restock request
+    :return: The response, and the (action, items) to log if the restock succeeded or None if it failed
+    """
+    items = _load_items(db, [item_request.name for item_request in multi_request.items])
+
+    not_found = []
+    missing_items = [] # scuffed way of checking name + quantity from items missing from database
+    for item_request in multi_request.items:
+        if item_request.name not in items:
+            not_found.append(item_request.name)
+            missing_items.append(item_request)
+
+    if not_found:
+
+        return JSONResponse(status_code=404, content={'message': f'Item(s) {", ".join(not_found)} not found.', # default message
+                                                      # a little verbose but just converts list to json
+                                                      'missing': f'[{",".join("{\"name\":\""+item.name+"\", \"quantity\":"+str(item.quantity)+"}" for item in missing_items)}]'}), None
+
+    _apply_stock_changes(db, {item_request.name: item_request.quantity for item_request in multi_request.items})
+
+    return MessageResponse(message=f'Restocked items successfully.'), (ActionTypeModel.RESTOCK, multi_request)
+
+
+def _check_quantities(request: Union[ItemRequest, MultiItemRequest]) -> JSONResponse | None:
+    """
+    Rejects lines that don't move a positive quantity. A negative restock would otherwise fail the stock >= 0
+    constraint, and a negative checkout would add stock.
+    :param request: The single or multi item request, checked line by line before lines are merged
+    :return: A 400 response naming the invalid items, or None if every quantity is positive
+    """
+    items = request.items if isinstance(request, MultiItemRequest) else [request]
+    invalid = list(dict.fromkeys(item_request.name for item_request in items if item_request.quantity < 1))
+    if invalid:
+        return JSONResponse(status_code=400,
+                            content={'message': f'Quantity must be at least 1 for item(s) {", ".join(invalid)}.'})
+    return None
+
+
+def _aggregate_request(request: Union[ItemRequest, MultiItemRequest]) -> MultiItemRequest:
+    """
+    Converts a checkout/restock request into a MultiItemRequest with at most one line per item name.
+    Quantities of repeated lines for the same item are summed, so limits are checked against the total requested.
+    :param request: The single or multi item request
+    :return: The equivalent MultiItemRequest, with lines in the order each item name first appears
+    """
+    if not isinstance(request, MultiItemRequest):
+        request = MultiItemRequest(student_id=request.student_id, items=[request])
+
+    quantities: dict[str, int] = {}
+    for item_request in request.items:
+        quantities[item_request.name] = quantities.get(item_request.name, 0) + item_request.quantity
+
+    return MultiItemRequest(student_id=request.student_id,
+                            items=[ItemRequest(name=name, quantity=quantity) for name, quantity in quantities.items()])
+
+
+def _load_items(db: Session, names: list[str]) -> dict[str, Item]:
+    """
+    Loads every item with one of the given names in a single query.
+    :param db: The database session
+    :param names: The item names to load
+    :return: A dict of item name to item. Names that don't exist are left out.
+    """
+    # populate_existing so items loaded earlier in the same session (group commit batches) don't keep stale stock
+    return {item.name: item for item in
+            db.query(Item).filter(Item.name.in_(names)).execution_options(populate_existing=True)}
+
+
+def _apply_stock_changes(db: Session, deltas: dict[str, int]):
+    """
+    Adds each delta to the stock of the item with that name, using a single UPDATE statement.
+    :param db: The database session
+    :param deltas: A dict of item name to the amount to add to its stock (negative to remove stock)
+    """
+    if not deltas:
+        # case() with no whens doesn't compile
+        return
+    db.execute(update(Item)
+               .where(Item.name.in_(deltas))
+               .values(stock=Item.stock + case(deltas, value=Item.name)),
+               execution_options={'synchronize_session': False})
+
+
+def _remove_stock(db: Session, quantities: dict[str, int]) -> list[str]:
+    """
+    Atomically removes stock for every item in a single guarded UPDATE.
+    An item is only updated if it still has enough stock and the quantity is within its max_checkout, so two
+    concurrent checkouts can't both take the last units.
+    If any item fails the guard, the caller must roll back since the other items will have been updated.
+    :param db: The database session
+    :param quantities: A dict of item name to the quantity to remove
+    :return: The names of the items that failed the guard, empty if every item was updated
+    """
+    if not quantities:
+        return []
+    quantity = case(quantities, value=Item.name)
+    updated = set(db.execute(update(Item)
+                             .where(Item.name.in_(quantities), Item.stock >= quantity, Item.max_checkout >= quantity)
+                             .values(stock=Item.stock - quantity)
+                             .returning(Item.name),
+                             execution_options={'synchronize_session': False}).scalars())
+    return [name for name in quantities if name not in updated]
+
+
 def log_action(db: Session, action: ActionTypeModel, items: MultiItemRequest):
-    transaction = Transaction(action=action, student_id=items.student_id)
-    db.add(transaction)
-    db.flush()
+    log_actions(db, [(action, items)])
+
+
+def log_actions(db: Session, logs: list[tuple[ActionTypeModel, MultiItemRequest]]):
+    """
+    Logs a list of actions using one bulk insert for the transactions and one for their items.
+    :param db: The database session
+    :param logs: The (action, items) pairs to log
+    """
+    transaction_ids = db.execute(insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True),
+                                 [{'action': action, 'student_id': items.student_id} for action, items in logs]
+                                 ).scalars().all()
+
+    rows = [{'transaction_id': transaction_id, 'item_name': item.name, 'item_quantity': item.quantity}
+            for transaction_id, (_, items) in zip(transaction_ids, logs)
+            for item in items.items]
+    # an empty parameter list would insert a single row of defaults
+    if rows:
+        db.execute(insert(TransactionItem), rows)
+
+    db.execute(_upsert_daily_item_stats(db, _daily_item_stats_select(Transaction.id.in_(transaction_ids))))
+
+
+def _daily_item_stats_select(*filters):
+    """
+    Builds the select that computes daily_item_stats rows from the logs.
+    :param filters: Conditions limiting which transactions are counted
+    :return: The select, with columns in the order of daily_item_stats
+    """
+    day = _transaction_day()
+    return (select(day, TransactionItem.item_name, Transaction.action,
+                   func.count(TransactionItem.id), func.sum(TransactionItem.item_quantity))
+            .join(Transaction, Transaction.id == TransactionItem.transaction_id)
+            .where(*filters)
+            .group_by(day, TransactionItem.item_name, Transaction.action))
+
+
+def _upsert_daily_item_stats(db: Session, rows):
+    """
+    Builds an INSERT ... SELECT that adds the counts of the given rows to daily_item_stats.
+    Only SQLite and PostgreSQL are supported, since upserts are dialect specific.
+    :param db: The database session
+    :param rows: Select returning (date, item_name, action, txn_count, qty_sum) rows, with no duplicate keys
+    :return: The insert statement
+    """
+    dialect = sqlite if db.get_bind().dialect.name == 'sqlite' else postgresql
+    statement = dialect.insert(DailyItemStat).from_select(
+        ['date', 'item_name', 'action', 'txn_count', 'qty_sum'], rows)
+    return statement.on_conflict_do_update(
+        index_elements=['date', 'item_name', 'action'],
+        set_={'txn_count': DailyItemStat.txn_count + statement.excluded.txn_count,
+              'qty_sum': DailyItemStat.qty_sum + statement.excluded.qty_sum})
+
+
+def backfill_daily_item_stats(db: Session) -> int:
+    """
+    Rebuilds daily_item_stats from the logs. Needed once for databases created before the rollup existed.
+    :param db: The database session, committed by the caller
+    :return: The number of rows written
+    """
+    db.execute(delete(DailyItemStat))
+    db.execute(insert(DailyItemStat).from_select(['date', 'item_name', 'action', 'txn_count', 'qty_sum'],
+                                                 _daily_item_stats_select()))
+    return db.query(DailyItemStat).count()
+
+
+def check_daily_item_stats(db: Session) -> list[tuple]:
+    """
+    Compares daily_item_stats with the counts computed from the logs.
+    :param db: The database session
+    :return: (date, item_name, action, expected (txn_count, qty_sum), actual (txn_count, qty_sum)) for every row that
+        differs, where a missing row is None. Empty if the rollup is consistent.
+    """
+    expected = {(day, item_name, action): (txn_count, qty_sum)
+                for day, item_name, action, txn_count, qty_sum in db.execute(_daily_item_stats_select())}
+    actual = {(day, item_name, action): (txn_count, qty_sum)
+              for day, item_name, action, txn_count, qty_sum in
+              db.execute(select(DailyItemStat.date, DailyItemStat.item_name, DailyItemStat.action,
+                                DailyItemStat.txn_count, DailyItemStat.qty_sum))}
+
+    return [(*key, expected.get(key), actual.get(key))
+            for key in sorted(expected.keys() | actual.keys())
+            if expected.get(key) != actual.get(key)]
+
+
+migrate_database(engine)
+
+# opt-in group commit mode, where concurrent /checkout and /restock requests are committed together in batches
+group_commit_writer = GroupCommitWriter(SessionLocal, log_actions, max_batch_size=settings.group_commit_max_batch,
+                                        max_wait=settings.group_commit_max_wait_ms / 1000) \
+    if settings.group_commit else None
 
-    for item in items.items:
-        db.add(TransactionItem(transaction_id=transaction.id, item_name=item.name, item_quantity=item.quantity))
+# caches /analytics aggregates between requests, see ReportCache
+report_cache = ReportCache(max_entries=settings.report_cache_entries, max_rows=settings.report_cache_max_rows) \
+    if settings.report_cache_entries > 0 else None
@@ -0,0 +1,84 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class Settings:
+    """
+    Server settings, read from environment variables or a .env file when the server starts.
+
+    Attributes:
+        database_url (str): SQLAlchemy URL of the database (INVENTORY_DATABASE_URL).
+        database_echo (bool): True to log every SQL statement (INVENTORY_DATABASE_ECHO).
+        database_pool_size (int): Number of pooled connections kept per engine (INVENTORY_DATABASE_POOL_SIZE).
+        sqlite_mmap_size (int): Bytes of the database file SQLite may memory map (INVENTORY_SQLITE_MMAP_SIZE).
+        sqlite_cache_size (int): SQLite page cache size, negative values are in KiB (INVENTORY_SQLITE_CACHE_SIZE).
+        sqlite_busy_timeout_ms (int): How long SQLite waits for a lock before failing (INVENTORY_SQLITE_BUSY_TIMEOUT_MS).
+        group_commit (bool): True to commit /checkout and /restock requests in batches (INVENTORY_GROUP_COMMIT).
+        group_commit_max_batch (int): Maximum requests per group commit batch (INVENTORY_GROUP_COMMIT_MAX_BATCH).
+        group_commit_max_wait_ms (float): Maximum time to wait for a group commit batch to fill
+            (INVENTORY_GROUP_COMMIT_MAX_WAIT_MS).
+        analytics_engine (str): 'sql' to compute reports in the database, 'pandas' to compute them with
+            analytics_engine.py (INVENTORY_ANALYTICS_ENGINE).
+        analytics_workers (int): Processes the pandas engine may use for ranges over a year (INVENTORY_ANALYTICS_WORKERS).
+        report_cache_entries (int): Maximum number of cached SQL reports, 0 disables the cache
+            (INVENTORY_REPORT_CACHE_ENTRIES).
+        report_cache_max_rows (int): Maximum number of rows kept across all cached reports
+            (INVENTORY_REPORT_CACHE_MAX_ROWS).
+        refresh_window_ms (float): How long the frontend waits for more inventory changes before refreshing pages,
+            0 to refresh after every change (INVENTORY_REFRESH_WINDOW_MS).
+        refresh_max_staleness_ms (float): The longest the frontend delays a refresh while changes keep arriving
+            (INVENTORY_REFRESH_MAX_STALENESS_MS).
+        client_rows_max (int): Largest catalog the inventory table sends to the browser whole, larger catalogs are
+            paged on the server (INVENTORY_CLIENT_ROWS_MAX).
+    """
+    database_url: str
+    database_echo: bool
+    database_pool_size: int
+    sqlite_mmap_size: int
+    sqlite_cache_size: int
+    sqlite_busy_timeout_ms: int
+    group_commit: bool
+    group_commit_max_batch: int
+    group_commit_max_wait_ms: float
+    analytics_engine: str
+    analytics_workers: int
+    report_cache_entries: int
+    report_cache_max_rows: int
+    refresh_window_ms: float
+    refresh_max_staleness_ms: float
+    client_rows_max: int
+
+    def __init__(self):
+        self.database_url = os.getenv('INVENTORY_DATABASE_URL', 'sqlite:///inventory.db')
+        self.database_echo = _env_bool('INVENTORY_DATABASE_ECHO', False)
+        self.database_pool_size = int(os.getenv('INVENTORY_DATABASE_POOL_SIZE', '5'))
+
+        self.sqlite_mmap_size = int(os.getenv('INVENTORY_SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+        self.sqlite_cache_size = int(os.getenv('INVENTORY_SQLITE_CACHE_SIZE', str(-64 * 1024)))
+        self.sqlite_busy_timeout_ms = int(os.getenv('INVENTORY_SQLITE_BUSY_TIMEOUT_MS', '5000'))
+
+        self.group_commit = _env_bool('INVENTORY_GROUP_COMMIT', False)
+        self.group_commit_max_batch = int(os.getenv('INVENTORY_GROUP_COMMIT_MAX_BATCH', '64'))
+        self.group_commit_max_wait_ms = float(os.getenv('INVENTORY_GROUP_COMMIT_MAX_WAIT_MS', '5'))
+
+        self.analytics_engine = os.getenv('INVENTORY_ANALYTICS_ENGINE', 'sql')
+        self.analytics_workers = int(os.getenv('INVENTORY_ANALYTICS_WORKERS', str(os.cpu_count() or 1)))
+        self.report_cache_entries = int(os.getenv('INVENTORY_REPORT_CACHE_ENTRIES', '128'))
+        self.report_cache_max_rows = int(os.getenv('INVENTORY_REPORT_CACHE_MAX_ROWS', '100000'))
+
+        self.refresh_window_ms = float(os.getenv('INVENTORY_REFRESH_WINDOW_MS', '150'))
+        self.refresh_max_staleness_ms = float(os.getenv('INVENTORY_REFRESH_MAX_STALENESS_MS', '1000'))
+        self.client_rows_max = int(os.getenv('INVENTORY_CLIENT_ROWS_MAX', '500'))
+
+
+settings = Settings()
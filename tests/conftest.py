@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# point the server at a throwaway database before anything imports it
+os.environ['INVENTORY_DATABASE_URL'] = f'sqlite:///{os.path.join(tempfile.mkdtemp(), "test_inventory.db")}'
+# and keep NiceGUI's app.storage files out of the repository
+os.environ['NICEGUI_STORAGE_PATH'] = tempfile.mkdtemp()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
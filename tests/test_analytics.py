@@ -0,0 +1,111 @@
+import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+
+import analytics_engine
+import server
+
+client = TestClient(server.app)
+
+
+def test_analytics_reports():
+    client.post('/create', json={'name': 'popular a', 'initial_stock': 100, 'max_checkout': 10})
+    client.post('/create', json={'name': 'popular b', 'initial_stock': 100, 'max_checkout': 10})
+    client.post('/create', json={'name': 'popular never', 'initial_stock': 100, 'max_checkout': 10})
+    client.post('/checkout', json={'items': [{'name': 'popular a', 'quantity': 1},
+                                             {'name': 'popular b', 'quantity': 5}], 'student_id': 'analyst'})
+    client.post('/checkout', json={'items': [{'name': 'popular a', 'quantity': 2}], 'student_id': 'analyst'})
+    client.post('/restock', json={'items': [{'name': 'popular b', 'quantity': 50}], 'student_id': 'analyst'})
+
+    ranked = {row['item_name']: row for row in client.get('/analytics/popular').json()}
+    assert ranked['popular a'] == {'item_name': 'popular a', 'frequency': 2, 'quantity': 3}
+    assert ranked['popular b'] == {'item_name': 'popular b', 'frequency': 1, 'quantity': 5}
+    assert 'popular never' not in ranked
+
+    by_quantity = [row['item_name'] for row in client.get('/analytics/popular', params={'order_by': 'quantity'}).json()]
+    assert by_quantity.index('popular b') < by_quantity.index('popular a')
+
+    least = client.get('/analytics/popular', params={'least': True, 'limit': 1}).json()
+    assert least[0]['frequency'] == 0
+
+    assert sum(day['frequency'] for day in client.get('/analytics/peak-days').json()) >= 2
+
+    report = client.get('/analytics/item/popular a').json()
+    assert (report['frequency'], report['quantity']) == (2, 3)
+    assert sum(day['quantity'] for day in report['days']) == 3
+    assert client.get('/analytics/item/not an item').status_code == 404
+
+
+def test_daily_item_stats_match_logs():
+    client.post('/create', json={'name': 'rollup item', 'initial_stock': 100, 'max_checkout': 10})
+    client.post('/checkout', json={'items': [{'name': 'rollup item', 'quantity': 2},
+                                             {'name': 'rollup item', 'quantity': 3}], 'student_id': 'rollup'})
+    client.post('/restock', json={'name': 'rollup item', 'quantity': 4})
+    client.delete('/items/rollup item')
+    client.post('/create', json={'name': 'rollup item', 'initial_stock': 100, 'max_checkout': 10})
+    client.post('/checkout', json={'name': 'rollup item', 'quantity': 1})
+    client.delete('/items/rollup item')
+
+    with server.read_db_context() as db:
+        assert server.check_daily_item_stats(db) == []
+        deleted = db.query(server.DailyItemStat).filter_by(item_name='[DELETED] rollup item', action='checkout').all()
+        assert [(stat.txn_count, stat.qty_sum) for stat in deleted] == [(2, 6)]
+
+
+def test_pandas_engine_matches_sql(monkeypatch):
+    client.post('/create', json={'name': 'pandas item', 'initial_stock': 100, 'max_checkout': 10})
+    client.post('/checkout', json={'items': [{'name': 'pandas item', 'quantity': 4}], 'student_id': 'pandas'})
+
+    reports = [('/analytics/popular', {}), ('/analytics/popular', {'order_by': 'quantity'}),
+               ('/analytics/popular', {'least': True}), ('/analytics/peak-days', {}),
+               ('/analytics/item/pandas item', {})]
+    expected = [client.get(url, params=params).json() for url, params in reports]
+
+    monkeypatch.setattr(server.settings, 'analytics_engine', 'pandas')
+    assert [client.get(url, params=params).json() for url, params in reports] == expected
+
+    # split every range by month and aggregate it in worker processes
+    monkeypatch.setattr(server.analytics_engine, 'PARTITION_MIN_MONTHS', 0)
+    monkeypatch.setattr(server.settings, 'analytics_workers', 2)
+    assert [client.get(url, params=params).json() for url, params in reports] == expected
+
+
+def test_partitioned_pandas_engine_matches_single_process_on_half_open_ranges(monkeypatch, tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "partitions.db"}')
+    server.migrate_database(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(server.Item), [{'name': 'partition item', 'stock': 0, 'max_checkout': 10}])
+        timestamps = [datetime.datetime(2023, 1, 15), datetime.datetime(2023, 6, 1, 10),
+                      datetime.datetime(2024, 3, 10), datetime.datetime(2025, 2, 1)]
+        connection.execute(insert(server.Transaction), [
+            {'id': n + 1, 'action': 'checkout', 'student_id': 'partition', 'timestamp': timestamp}
+            for n, timestamp in enumerate(timestamps)])
+        connection.execute(insert(server.TransactionItem), [
+            {'transaction_id': n + 1, 'item_name': 'partition item', 'item_quantity': 1}
+            for n in range(len(timestamps))])
+
+    def reports(start_date, end_date, workers):
+        return (analytics_engine.popular_items(engine, start_date, end_date, least=True, workers=workers),
+                analytics_engine.peak_days(engine, start_date, end_date, workers=workers))
+
+    monkeypatch.setattr(analytics_engine, 'PARTITION_MIN_MONTHS', 0)
+    for start_date, end_date, frequency in [(datetime.date(2025, 1, 1), None, 1), (None, datetime.date(2023, 6, 1), 1),
+                                            (datetime.date(2023, 2, 1), datetime.date(2024, 12, 31), 2),
+                                            (None, None, 4)]:
+        single = reports(start_date, end_date, workers=1)
+        assert single == reports(start_date, end_date, workers=2)
+        assert single[0][0].frequency == frequency
+    engine.dispose()
+
+
+def test_uncached_popular_items_join_in_sql(monkeypatch):
+    client.post('/create', json={'name': 'joined a', 'initial_stock': 100, 'max_checkout': 10})
+    client.post('/create', json={'name': 'joined never', 'initial_stock': 100, 'max_checkout': 10})
+    client.post('/checkout', json={'items': [{'name': 'joined a', 'quantity': 3}], 'student_id': 'joiner'})
+
+    reports = [{}, {'order_by': 'quantity'}, {'least': True}, {'least': True, 'limit': 2}, {'limit': 1}]
+    cached = [client.get('/analytics/popular', params=params).json() for params in reports]
+    monkeypatch.setattr(server, 'report_cache', None)
+    assert [client.get('/analytics/popular', params=params).json() for params in reports] == cached
+    assert {'item_name': 'joined never', 'frequency': 0, 'quantity': 0} in cached[2]
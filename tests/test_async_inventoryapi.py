@@ -0,0 +1,65 @@
+import asyncio
+
+import httpx
+
+import server
+from api.async_inventoryapi import AsyncInventoryClient
+from api.inventoryapi import ResponseStatus
+from models.request_schemas import CreateRequest, ItemRequest, MultiItemRequest
+from models.response_schemas import ItemResponse
+
+
+def make_client(max_concurrency: int = 10) -> AsyncInventoryClient:
+    return AsyncInventoryClient('http://testserver', max_concurrency=max_concurrency,
+                                transport=httpx.ASGITransport(app=server.app))
+
+
+def test_async_client_fans_out_with_bounded_concurrency():
+    names = [f'async item {n}' for n in range(6)]
+
+    async def run():
+        async with make_client(max_concurrency=2) as client:
+            created = await asyncio.gather(*(client.create_item(CreateRequest(name=name, initial_stock=2,
+                                                                               max_checkout=2)) for name in names))
+            assert all(response.status_code == ResponseStatus.CREATED for response in created)
+
+            in_flight = peak = 0
+            send = client.client.send
+
+            async def counting_send(*args, **kwargs):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                try:
+                    await asyncio.sleep(0.01)
+                    return await send(*args, **kwargs)
+                finally:
+                    in_flight -= 1
+
+            client.client.send = counting_send
+            items = await asyncio.gather(*(client.get_item(name) for name in names + ['async missing']))
+            assert peak == 2
+            return items
+
+    items = asyncio.run(run())
+    assert [item.model.name for item in items[:-1]] == names
+    assert all(isinstance(item.model, ItemResponse) for item in items[:-1])
+    assert (items[-1].status_code, items[-1].model) == (ResponseStatus.NOT_FOUND, None)
+
+
+def test_async_client_pages_and_streams_logs():
+    async def run():
+        async with make_client() as client:
+            await client.create_item(CreateRequest(name='async logged', initial_stock=5, max_checkout=5))
+            for student in ('async a', 'async b', 'async c'):
+                await client.checkout_items(MultiItemRequest(student_id=student,
+                                                             items=[ItemRequest(name='async logged', quantity=1)]))
+
+            pages = [page.model async for page in client.iter_logs(item_name='async logged', page_size=2)]
+            streamed = await client.stream_logs(item_name='async logged')
+            return pages, [log async for log in streamed.model]
+
+    pages, streamed = asyncio.run(run())
+    assert [len(page) for page in pages] == [2, 1]
+    assert [log.student_id for page in pages for log in page] == [log.student_id for log in streamed] == \
+        ['async a', 'async b', 'async c']
@@ -0,0 +1,52 @@
+from fastapi.testclient import TestClient
+
+import server
+from models.request_schemas import ActionTypeModel
+
+client = TestClient(server.app)
+
+
+def test_bulk_creates_restocks_and_skips_invalid_rows():
+    client.post('/create', json={'name': 'bulk existing', 'initial_stock': 2, 'max_checkout': 3})
+    response = client.post('/items/bulk', json={'items': [
+        {'name': 'bulk existing', 'quantity': 5},
+        {'name': 'bulk new', 'quantity': 4, 'max_checkout': 2},
+        {'name': 'bulk new', 'quantity': 1},
+        {'name': '', 'quantity': 1},
+        {'name': 'bulk negative', 'quantity': -1},
+    ]})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body['created'], body['restocked'], body['invalid']) == (1, 2, 2)
+    assert [(row['status'], row['stock']) for row in body['results']] == \
+        [('restocked', 7), ('created', 4), ('restocked', 5), ('invalid', None), ('invalid', None)]
+
+    items = server.inventory_snapshot().by_name
+    assert (items['bulk existing'].stock, items['bulk new'].stock, items['bulk new'].max_checkout) == (7, 5, 2)
+    assert 'bulk negative' not in items
+    assert [item['name'] for item in client.get('/items/search', params={'q': 'BULK NEW'}).json()] == ['bulk new']
+
+    # only the existing item's restock is logged, the created item's rows are its initial stock
+    restocks = client.get('/logs', params={'item_name': 'bulk existing', 'action': ActionTypeModel.RESTOCK.value})
+    assert [[(item['item_name'], item['item_quantity']) for item in log['items']] for log in restocks.json()] == \
+        [[('bulk existing', 5)]]
+    assert client.get('/logs', params={'item_name': 'bulk new'}).json() == []
+
+
+def test_bulk_checks_max_checkout_only_when_creating():
+    client.post('/create', json={'name': 'bulk limited', 'initial_stock': 1, 'max_checkout': 1})
+    response = client.post('/items/bulk', json={'items': [
+        {'name': 'bulk limited', 'quantity': 2, 'max_checkout': 0},
+        {'name': 'bulk unlimited', 'quantity': 3, 'max_checkout': 0},
+    ]})
+    assert [(row['status'], row['message']) for row in response.json()['results']] == \
+        [('restocked', None), ('invalid', 'Max checkout must be at least 1.')]
+
+    items = server.inventory_snapshot().by_name
+    assert (items['bulk limited'].stock, items['bulk limited'].max_checkout) == (3, 1)
+    assert 'bulk unlimited' not in items
+
+
+def test_bulk_rejects_too_many_rows():
+    rows = [{'name': f'bulk row {n}', 'quantity': 1} for n in range(server.BULK_MAX_ROWS + 1)]
+    assert client.post('/items/bulk', json={'items': rows}).status_code == 400
@@ -0,0 +1,76 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+import server
+
+client = TestClient(server.app)
+
+
+def stock(name: str) -> int:
+    return client.get(f'/items/{name}').json()['stock']
+
+
+def test_checkout_decrements_stock_only_while_it_lasts():
+    client.post('/create', json={'name': 'guarded item', 'initial_stock': 3, 'max_checkout': 3})
+    assert client.post('/checkout', json={'name': 'guarded item', 'quantity': 2}).status_code == 200
+    assert stock('guarded item') == 1
+
+    response = client.post('/checkout', json={'name': 'guarded item', 'quantity': 2})
+    assert response.status_code == 409
+    assert stock('guarded item') == 1
+
+
+def test_checkout_conflicts_when_a_concurrent_checkout_takes_the_stock(monkeypatch):
+    client.post('/create', json={'name': 'raced item', 'initial_stock': 1, 'max_checkout': 1})
+    load_items = server._load_items
+
+    def load_then_lose_race(db, names):
+        # the stock check passes on what was loaded, then another request takes the last unit before the update
+        items = load_items(db, names)
+        with server.db_context() as other:
+            other.execute(update(server.Item).where(server.Item.name == 'raced item').values(stock=0))
+            other.commit()
+        return items
+
+    monkeypatch.setattr(server, '_load_items', load_then_lose_race)
+    response = client.post('/checkout', json={'name': 'raced item', 'quantity': 1})
+    assert response.status_code == 409
+    assert response.json()['message'] == 'Not enough stock for item(s) raced item.'
+    monkeypatch.undo()
+    assert stock('raced item') == 0
+    assert client.get('/logs', params={'item_name': 'raced item'}).json() == []
+
+
+def test_non_positive_quantities_are_rejected():
+    client.post('/create', json={'name': 'negative item', 'initial_stock': 2, 'max_checkout': 2})
+    for quantity in (-5, 0):
+        response = client.post('/restock', json={'name': 'negative item', 'quantity': quantity})
+        assert response.status_code == 400
+        assert client.post('/checkout', json={'name': 'negative item', 'quantity': quantity}).status_code == 400
+    # a negative line can't hide inside a positive total either
+    response = client.post('/restock', json={'items': [{'name': 'negative item', 'quantity': 5},
+                                                       {'name': 'negative item', 'quantity': -3}]})
+    assert response.status_code == 400
+    assert stock('negative item') == 2
+
+
+def test_repeated_lines_are_checked_against_max_checkout_together():
+    client.post('/create', json={'name': 'repeated item', 'initial_stock': 10, 'max_checkout': 3})
+    response = client.post('/checkout', json={'student_id': 'repeater', 'items': [
+        {'name': 'repeated item', 'quantity': 2}, {'name': 'repeated item', 'quantity': 2}]})
+    assert response.status_code == 400
+    assert stock('repeated item') == 10
+
+    assert client.post('/checkout', json={'student_id': 'repeater', 'items': [
+        {'name': 'repeated item', 'quantity': 1}, {'name': 'repeated item', 'quantity': 2}]}).status_code == 200
+    assert stock('repeated item') == 7
+    # the merged lines are logged as one line per item
+    log, = client.get('/logs', params={'item_name': 'repeated item'}).json()
+    assert [(item['item_name'], item['item_quantity']) for item in log['items']] == [('repeated item', 3)]
+
+
+def test_empty_item_lists_change_nothing():
+    client.post('/create', json={'name': 'untouched item', 'initial_stock': 4, 'max_checkout': 4})
+    assert client.post('/checkout', json={'student_id': 'nobody', 'items': []}).status_code == 200
+    assert client.post('/restock', json={'items': []}).status_code == 200
+    assert stock('untouched item') == 4
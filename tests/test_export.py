@@ -0,0 +1,53 @@
+import csv
+import io
+
+import openpyxl
+from fastapi.testclient import TestClient
+
+import server
+
+client = TestClient(server.app)
+
+
+def test_export_inventory_csv_round_trips_through_import():
+    client.post('/create', json={'name': 'export apple', 'initial_stock': 3, 'max_checkout': 2})
+    response = client.get('/export/inventory.csv')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    assert response.headers['content-disposition'] == 'attachment; filename="inventory.csv"'
+
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ['Product', 'Max Checkout', 'Stock']
+    assert ['export apple', '2', '3'] in rows
+    assert len(rows) == len(server.inventory_snapshot().items) + 1
+
+
+def test_export_logs_orders_and_transactions_xlsx():
+    client.post('/create', json={'name': 'export bread', 'initial_stock': 5, 'max_checkout': 5})
+    client.post('/create', json={'name': 'export candy', 'initial_stock': 5, 'max_checkout': 5})
+    client.post('/restock', json={'items': [{'name': 'export bread', 'quantity': 2},
+                                            {'name': 'export candy', 'quantity': 4}]})
+    client.post('/checkout', json={'student_id': 'export student', 'items': [{'name': 'export bread', 'quantity': 1}]})
+
+    def sheet_rows(kind: str) -> list[tuple]:
+        response = client.get(f'/export/{kind}.xlsx')
+        assert response.status_code == 200
+        workbook = openpyxl.load_workbook(io.BytesIO(response.content), read_only=True)
+        return list(workbook[kind].iter_rows(values_only=True))
+
+    logs = sheet_rows('logs')
+    assert logs[0] == ('Transaction', 'Timestamp', 'Day', 'Action', 'Student', 'Product', 'Quantity')
+    assert [row[3:] for row in logs[-3:]] == [('restock', None, 'export bread', 2), ('restock', None, 'export candy', 4),
+                                              ('checkout', 'export student', 'export bread', 1)]
+
+    orders = sheet_rows('orders')
+    assert [row[2:] for row in orders[-2:]] == [('export bread', 2), ('export candy', 4)]
+    assert all(row[2] != 'export student' for row in orders)
+
+    transactions = sheet_rows('transactions')
+    assert [row[3:] for row in transactions[-2:]] == [('restock', None, 2, 6), ('checkout', 'export student', 1, 1)]
+
+
+def test_export_rejects_unknown_kind_or_format():
+    assert client.get('/export/secrets.csv').status_code == 422
+    assert client.get('/export/logs.pdf').status_code == 422
@@ -10,6 +10,9 @@ from dotenv import load_dotenv
 
 from io import StringIO
 
+import openpyxl
+import pytest
+
 from form_io import form_io
 
 # name of the csv to read (can detect delimiters)
@@ -121,3 +124,55 @@ def export_example_xlsx():
     print(f"Please verify the {XLSX_EXPORT} output file in the form_io folder.")
 
 
+
+
+def test_iter_csv_streams_rows_and_reports_bad_lines():
+    rows = form_io.iter_csv(StringIO('apple,3\n\nbread,2\npear,lots\n'))
+    assert next(rows) == ['apple', 3]
+    assert next(rows) == ['bread', 2]
+    try:
+        next(rows)
+    except ValueError as error:
+        assert str(error).startswith('Line 4')
+    else:
+        assert False, 'expected a ValueError'
+
+
+def test_chunked():
+    assert list(form_io.chunked(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(form_io.chunked([], 2)) == []
+
+
+def test_iter_excel_detects_header_and_keeps_first_and_last_columns(tmp_path):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for row in (['Product', 'Price', 'Stock'], ['apple', 1.5, 3], [None, None, None], ['bread', 2, 4.0]):
+        sheet.append(row)
+    workbook.save(tmp_path / 'header.xlsx')
+    assert list(form_io.iter_excel(tmp_path / 'header.xlsx')) == [['apple', 3], ['bread', 4]]
+
+    sheet.delete_rows(1)
+    workbook.save(tmp_path / 'no_header.xlsx')
+    assert form_io.read_excel(tmp_path / 'no_header.xlsx') == [['apple', 3], ['bread', 4]]
+
+
+def test_iter_excel_rejects_blank_and_fractional_quantities(tmp_path):
+    def read(rows):
+        workbook = openpyxl.Workbook()
+        for row in rows:
+            workbook.active.append(row)
+        workbook.save(tmp_path / 'quantities.xlsx')
+        return form_io.iter_excel(tmp_path / 'quantities.xlsx')
+
+    assert list(read([['Product', 'Stock'], ['apple', '7 '], ['bread', 2.0]])) == [['apple', 7], ['bread', 2]]
+
+    # a filled cell past the quantity column is not taken as the quantity
+    rows = read([['Product', 'Stock'], ['apple', 3], ['bread', None, 1.99]])
+    assert next(rows) == ['apple', 3]
+    with pytest.raises(ValueError, match='Row 3: quantity is blank'):
+        next(rows)
+
+    with pytest.raises(ValueError, match='Row 2: quantity 1.5 is not a whole number'):
+        list(read([['Product', 'Stock'], ['apple', 1.5]]))
+    with pytest.raises(ValueError, match='Row 2: quantity is blank'):
+        list(read([['Product', 'Stock'], ['apple']]))
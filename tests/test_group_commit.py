@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from group_commit import GroupCommitWriter
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "group_commit.db"}')
+    with engine.begin() as connection:
+        connection.execute(text('CREATE TABLE rows (name TEXT PRIMARY KEY)'))
+        connection.execute(text('CREATE TABLE logs (name TEXT)'))
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def insert_job(name: str, log=True, error: Exception = None):
+    def job(db):
+        db.execute(text('INSERT INTO rows VALUES (:name)'), {'name': name})
+        if error is not None:
+            raise error
+        return f'response {name}', name if log else None
+    return job
+
+
+def flush_logs(db, logs):
+    db.execute(text('INSERT INTO logs VALUES (:name)'), [{'name': name} for name in logs])
+
+
+def table(session_factory, name: str) -> list[str]:
+    with session_factory() as db:
+        return sorted(db.execute(text(f'SELECT name FROM {name}')).scalars())
+
+
+def test_failed_and_unlogged_jobs_roll_back_alone(session_factory):
+    writer = GroupCommitWriter(session_factory, flush_logs)
+    error = ValueError('job failed')
+    batch = [(insert_job('a'), Future()), (insert_job('b', error=error), Future()),
+             (insert_job('c', log=False), Future()), (insert_job('d'), Future())]
+    writer._apply_batch(batch)
+    writer.close()
+
+    assert table(session_factory, 'rows') == ['a', 'd']
+    assert table(session_factory, 'logs') == ['a', 'd']
+    assert batch[0][1].result() == 'response a'
+    assert batch[1][1].exception() is error
+    # a job that returns no log is undone, but its caller still gets its response
+    assert batch[2][1].result() == 'response c'
+    assert batch[3][1].result() == 'response d'
+    assert (writer.batches, writer.jobs) == (1, 4)
+
+
+def test_failed_commit_fails_every_job_in_the_batch(session_factory):
+    error = RuntimeError('disk full')
+
+    def failing_flush(db, logs):
+        raise error
+
+    writer = GroupCommitWriter(session_factory, failing_flush)
+    batch = [(insert_job('a'), Future()), (insert_job('b', log=False), Future())]
+    writer._apply_batch(batch)
+    writer.close()
+
+    assert table(session_factory, 'rows') == []
+    assert [future.exception() for _, future in batch] == [error, error]
+    assert writer.batches == 0
+
+
+def test_concurrent_callers_get_their_own_responses(session_factory):
+    writer = GroupCommitWriter(session_factory, flush_logs, max_wait=0.2)
+    names = [f'row {n}' for n in range(8)]
+    results = {}
+    start = threading.Barrier(len(names))
+
+    def submit(name):
+        start.wait()
+        try:
+            results[name] = writer.submit(insert_job(name, error=ValueError(name) if name == 'row 3' else None))
+        except ValueError as e:
+            results[name] = e
+
+    threads = [threading.Thread(target=submit, args=(name,)) for name in names]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.close()
+
+    assert str(results.pop('row 3')) == 'row 3'
+    assert results == {name: f'response {name}' for name in names if name != 'row 3'}
+    assert table(session_factory, 'rows') == sorted(results)
+    # the callers arrived together, so their jobs were committed in fewer transactions than jobs
+    assert writer.batches < len(names)
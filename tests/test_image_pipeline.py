@@ -0,0 +1,89 @@
+import io
+
+from PIL import Image
+
+import image_pipeline
+
+
+def test_upload_is_stored_as_thumbnail_and_display_variants(tmp_path):
+    upload = io.BytesIO()
+    Image.new('RGB', (3000, 1500), 'red').save(upload, 'JPEG')
+    image_pipeline.legacy_path('ITEM', tmp_path).write_bytes(b'old image')
+
+    with image_pipeline.save_upload(upload, '.jpg') as source:
+        thumbnail, display = image_pipeline.process_image(source.name, 'ITEM', str(tmp_path))
+
+    with Image.open(thumbnail) as img:
+        assert (img.format, img.size) == ('WEBP', (200, 100))
+    with Image.open(display) as img:
+        assert (img.format, img.size) == ('WEBP', (1024, 512))
+    # only the variants are left behind, the replaced legacy PNG and temporary files are gone
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['ITEM.thumb.webp', 'ITEM.webp']
+
+    image_pipeline.delete_images('ITEM', tmp_path)
+    assert not any(tmp_path.iterdir())
+
+
+def test_transparency_is_kept(tmp_path):
+    upload = io.BytesIO()
+    Image.new('RGBA', (50, 50), (0, 0, 0, 0)).save(upload, 'PNG')
+    with image_pipeline.save_upload(upload, '.png') as source:
+        thumbnail, _ = image_pipeline.process_image(source.name, 'ITEM', str(tmp_path))
+
+    with Image.open(thumbnail) as img:
+        assert img.mode == 'RGBA'
+        assert img.getpixel((0, 0))[3] == 0
+
+
+def test_manifest_urls_change_with_content(tmp_path):
+    image_pipeline.legacy_path('OLD', tmp_path).write_bytes(b'legacy png')
+    manifest = image_pipeline.ImageManifest(tmp_path)
+    assert manifest.thumbnail_url('OLD').endswith('.png')
+    assert manifest.thumbnail_url('MISSING') == manifest.default_url
+
+    upload = io.BytesIO()
+    Image.new('RGB', (300, 300), 'blue').save(upload, 'PNG')
+    with image_pipeline.save_upload(upload, '.png') as source:
+        image_pipeline.process_image(source.name, 'OLD', str(tmp_path))
+    manifest.add('OLD')
+
+    url = manifest.thumbnail_url('OLD')
+    assert url.startswith(manifest.url_prefix) and url.endswith('.webp')
+    assert manifest.path(url.rsplit('/', 1)[1]) == image_pipeline.thumbnail_path('OLD', tmp_path)
+    assert manifest.display_url('OLD') != url
+
+    # the same name with a different image gets a different URL, and the old one stops being served
+    upload = io.BytesIO()
+    Image.new('RGB', (300, 300), 'green').save(upload, 'PNG')
+    with image_pipeline.save_upload(upload, '.png') as source:
+        image_pipeline.process_image(source.name, 'OLD', str(tmp_path))
+    manifest.add('OLD')
+    assert manifest.thumbnail_url('OLD') != url
+    assert manifest.path(url.rsplit('/', 1)[1]) is None
+
+    manifest.remove('OLD')
+    assert manifest.thumbnail_url('OLD') == manifest.default_url
+
+
+def test_manifest_keeps_serving_an_image_shared_by_a_deleted_item(tmp_path):
+    upload = io.BytesIO()
+    Image.new('RGB', (300, 300), 'blue').save(upload, 'PNG')
+    manifest = image_pipeline.ImageManifest(tmp_path)
+    for name in ('FIRST', 'SECOND'):
+        with image_pipeline.save_upload(upload, '.png') as source:
+            image_pipeline.process_image(source.name, name, str(tmp_path))
+        manifest.add(name)
+
+    url = manifest.thumbnail_url('FIRST')
+    assert manifest.thumbnail_url('SECOND') == url
+
+    # SECOND was added last, so its copy is the one being served when it is deleted
+    file_name = url.rsplit('/', 1)[1]
+    image_pipeline.delete_images('SECOND', tmp_path)
+    manifest.remove('SECOND')
+    assert manifest.path(file_name) == image_pipeline.thumbnail_path('FIRST', tmp_path)
+    assert manifest.path(file_name).exists()
+
+    image_pipeline.delete_images('FIRST', tmp_path)
+    manifest.remove('FIRST')
+    assert manifest.path(file_name) is None
@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import server
+from frontend_app.inventory import Inventory
+from settings import settings
+
+client = TestClient(server.app)
+
+
+def test_snapshot_is_rebuilt_once_per_write():
+    client.post('/create', json={'name': 'snapshot item', 'initial_stock': 10, 'max_checkout': 5})
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(server.read_engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        for _ in range(5):
+            items = {item['name']: item for item in client.get('/items').json()}
+            assert items['snapshot item']['stock'] == 10
+            assert client.get('/items/snapshot item').json()['stock'] == 10
+    finally:
+        event.remove(server.read_engine, 'before_cursor_execute', before_cursor_execute)
+    # the items and the tags
+    assert len(statements) == 2
+
+    # failed writes keep the snapshot, successful ones replace it
+    version = server.inventory_snapshot().version
+    assert client.post('/checkout', json={'name': 'snapshot item', 'quantity': 6}).status_code == 400
+    assert server.inventory_snapshot().version == version
+
+    client.post('/checkout', json={'name': 'snapshot item', 'quantity': 2})
+    assert client.get('/items/snapshot item').json()['stock'] == 8
+    assert server.inventory_snapshot().version > version
+
+    client.delete('/items/snapshot item')
+    assert client.get('/items/snapshot item').status_code == 404
+
+
+def test_items_pages_are_sorted_and_filtered():
+    names = [f'paged stock {n}' for n in range(7)]
+    for n, name in enumerate(names):
+        client.post('/create', json={'name': name, 'initial_stock': n % 3, 'max_checkout': 5})
+
+    def page(**params) -> tuple[list[str], int]:
+        response = client.get('/items', params={'names': names, **params})
+        assert response.status_code == 200
+        return [item['name'] for item in response.json()], int(response.headers[server.TOTAL_COUNT_HEADER])
+
+    # ties on stock are broken by name, so pages never overlap
+    by_stock = sorted(names, key=lambda name: (int(name.split()[-1]) % 3, name))
+    assert page(limit=3, sort_by='stock') == (by_stock[:3], 7)
+    assert page(limit=3, offset=3, sort_by='stock') == (by_stock[3:6], 7)
+    assert page(limit=3, offset=6, sort_by='stock') == (by_stock[6:], 7)
+    assert page(limit=2, descending=True) == (sorted(names, reverse=True)[:2], 7)
+
+    response = client.get('/items', params={'names': names[:2], 'limit': 5})
+    assert [item['name'] for item in response.json()] == names[:2]
+    assert response.headers[server.TOTAL_COUNT_HEADER] == '2'
+
+    assert client.get('/items', params={'limit': 0}).status_code == 400
+    # without a limit the whole snapshot is returned
+    assert server.TOTAL_COUNT_HEADER not in client.get('/items').headers
+    for name in names:
+        client.delete(f'/items/{name}')
+
+
+def test_server_side_table_loads_pages(monkeypatch):
+    names = [f'table page {n}' for n in range(4)]
+    for n, name in enumerate(names):
+        client.post('/create', json={'name': name, 'initial_stock': n, 'max_checkout': 5})
+    client.post('/tags', json={'name': 'table page tag', 'items': names[1:]})
+    monkeypatch.setattr(settings, 'client_rows_max', 2)
+
+    # render needs a page to draw on, so the table and tag filter are stand-ins holding what load_page reads
+    inventory = Inventory()
+    inventory.server_side = len(server.inventory_snapshot().items) > settings.client_rows_max
+    inventory.table = SimpleNamespace(rows=[], pagination={'rowsPerPage': 2, 'sortBy': 'stock', 'descending': True,
+                                                           'page': 1})
+    inventory.tag_filter = SimpleNamespace(value='table page tag')
+    assert inventory.server_side
+
+    inventory.load_page()
+    assert [row['name'] for row in inventory.table.rows] == ['table page 3', 'table page 2']
+    assert inventory.table.rows[0]['tags'] == 'table page tag'
+    assert inventory.table.pagination['rowsNumber'] == 3
+
+    inventory.load_page({**inventory.table.pagination, 'page': 2})
+    assert [row['name'] for row in inventory.table.rows] == ['table page 1']
+    assert inventory.table.pagination['page'] == 2
+
+    inventory.tag_filter.value = None
+    inventory.load_page({'rowsPerPage': 2, 'sortBy': 'name', 'page': 1})
+    assert len(inventory.table.rows) == 2
+    assert inventory.table.pagination['rowsNumber'] == len(server.inventory_snapshot().items)
+    for name in names:
+        client.delete(f'/items/{name}')
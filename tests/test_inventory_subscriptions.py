@@ -0,0 +1,82 @@
+import asyncio
+
+import server
+from frontend_app.inventory import InventorySubscriptions
+from models.request_schemas import CreateRequest, ItemRequest
+
+
+def test_subscribers_get_only_changed_rows():
+    with server.db_context() as db:
+        server.create_item(CreateRequest(name='delta kept', initial_stock=5, max_checkout=5), server.Response(), db=db)
+        server.create_item(CreateRequest(name='delta removed', initial_stock=5, max_checkout=5), server.Response(),
+                           db=db)
+
+    subscriptions = InventorySubscriptions()
+    deltas = []
+    first = subscriptions.subscribe(deltas.append)
+    subscriptions.subscribe(deltas.append)
+    assert subscriptions.subscriber_count == 2
+
+    with server.db_context() as db:
+        server.restock_item(ItemRequest(name='delta kept', quantity=1), db=db)
+        server.delete_item('delta removed', db=db)
+        server.create_item(CreateRequest(name='delta added', initial_stock=5, max_checkout=5), server.Response(),
+                           db=db)
+    subscriptions.publish()
+
+    assert len(deltas) == 2 and deltas[0] is deltas[1]
+    assert [item.name for item in deltas[0].added] == ['delta added']
+    assert deltas[0].removed == ['delta removed']
+    assert [(item.name, item.stock) for item in deltas[0].changed] == [('delta kept', 6)]
+    assert set(deltas[0].rows) == {'delta added', 'delta kept'}
+
+    # nothing changed, so nothing is sent
+    subscriptions.unsubscribe(first)
+    subscriptions.publish()
+    assert subscriptions.subscriber_count == 1
+    assert (subscriptions.published, subscriptions.delivered) == (1, 2)
+
+
+def test_invalidations_within_window_are_coalesced():
+    subscriptions = InventorySubscriptions(window=0.05, max_staleness=0.2)
+    deltas = []
+    subscriptions.subscribe(deltas.append)
+    subscriptions.subscribe(deltas.append)
+
+    async def burst(writes: int, interval: float) -> None:
+        for n in range(writes):
+            with server.db_context() as db:
+                server.create_item(CreateRequest(name=f'burst {interval} {n}', initial_stock=1, max_checkout=1),
+                                   server.Response(), db=db)
+            subscriptions.invalidate()
+            await asyncio.sleep(interval)
+        await asyncio.sleep(0.1)
+
+    # five writes within the window become one refresh per subscriber
+    asyncio.run(burst(5, 0))
+    assert len(deltas) == 2 and len(deltas[0].added) == 5
+    assert (subscriptions.invalidations, subscriptions.refreshes_saved) == (5, 8)
+
+    # a steady stream of writes is still published once max_staleness has passed
+    deltas.clear()
+    asyncio.run(burst(12, 0.03))
+    assert len(deltas) >= 4
+
+
+def test_failing_subscriber_does_not_stop_the_others(caplog):
+    subscriptions = InventorySubscriptions()
+    deltas = []
+
+    def broken(delta):
+        raise RuntimeError('page gone')
+
+    subscriptions.subscribe(broken)
+    subscriptions.subscribe(deltas.append)
+    with server.db_context() as db:
+        server.create_item(CreateRequest(name='delta after failure', initial_stock=1, max_checkout=1),
+                           server.Response(), db=db)
+
+    assert subscriptions.publish() == 1
+    assert [item.name for item in deltas[0].added] == ['delta after failure']
+    assert subscriptions.delivered == 1
+    assert 'page gone' in caplog.text
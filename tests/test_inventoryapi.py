@@ -0,0 +1,41 @@
+import requests
+
+from api import inventoryapi
+from api.inventoryapi import APIResponse, ResponseStatus
+from models.response_schemas import MessageResponse
+
+
+def make_response(status_code: int, content: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    return response
+
+
+def test_api_response_status_and_json():
+    response = APIResponse(make_response(201, b'{"message": "created"}'))
+    assert (response.status_code, response.is_success, response.json) == (ResponseStatus.CREATED, True,
+                                                                           {'message': 'created'})
+
+    response = APIResponse(make_response(418, b'teapot'))
+    assert (response.status_code, response.is_success, response.is_json) == (ResponseStatus.UNKNOWN_ERROR, False,
+                                                                              False)
+    assert response.error == 'Failed with status code 418: teapot'
+
+
+def test_adapters_and_clients_are_shared():
+    assert inventoryapi._adapter(MessageResponse) is inventoryapi._adapter(MessageResponse)
+    assert inventoryapi.shared_client('http://example.test') is inventoryapi.shared_client('http://example.test')
+    assert inventoryapi._validate(MessageResponse, APIResponse(make_response(200, b'{"message": "hi"}'))) == \
+        MessageResponse(message='hi')
+
+
+def test_client_reports_connection_errors():
+    with inventoryapi.InventoryClient('http://127.0.0.1:9', retries=0) as client:
+        assert client.get_inventory(timeout=1).status_code == ResponseStatus.CONNECTION_ERROR
+
+
+def test_client_only_retries_connect_failures():
+    with inventoryapi.InventoryClient('http://127.0.0.1:9', retries=2) as client:
+        retry = client.session.get_adapter(client.url).max_retries
+    assert (retry.connect, retry.read, retry.status, retry.other) == (2, 0, 0, 0)
@@ -0,0 +1,42 @@
+from fastapi.testclient import TestClient
+
+import server
+from item_search import ItemSearchIndex, normalize_name
+
+client = TestClient(server.app)
+
+
+def test_names_starting_with_the_query_come_first():
+    index = ItemSearchIndex(['Blue Pen', 'PENCIL', 'pen refill', 'Paper', 'Red  pen', 'Open Sign'])
+    assert index.search('pen') == ['pen refill', 'PENCIL', 'Blue Pen', 'Red  pen']
+    assert index.search('PEN', limit=2) == ['pen refill', 'PENCIL']
+    # every query word has to start a word of the name, in any order
+    assert index.search('pen blu') == ['Blue Pen']
+    assert index.search('red pen') == ['Red  pen']
+    assert index.search('en') == []
+    assert index.search('  ') == []
+
+
+def test_normalize_name_folds_case_and_whitespace():
+    assert normalize_name('  Straße\tKaffee ') == 'strasse kaffee'
+    assert normalize_name('ＡＢＣ') == 'abc'
+
+
+def test_search_endpoint_and_case_insensitive_item_report():
+    client.post('/create', json={'name': 'SEARCH Granola Bar', 'initial_stock': 5, 'max_checkout': 1})
+    client.post('/create', json={'name': 'search granola cereal', 'initial_stock': 5, 'max_checkout': 1})
+
+    response = client.get('/items/search', params={'q': 'search gran'})
+    assert [item['name'] for item in response.json()] == ['SEARCH Granola Bar', 'search granola cereal']
+    assert response.json()[0]['stock'] == 5
+    assert [item['name'] for item in client.get('/items/search', params={'q': 'cereal sea'}).json()] == \
+        ['search granola cereal']
+    assert client.get('/items/search', params={'q': 'search', 'limit': 0}).status_code == 400
+
+    # checkouts keep the index but the results show the new stock
+    client.post('/checkout', json={'name': 'SEARCH Granola Bar', 'quantity': 1})
+    assert client.get('/items/search', params={'q': 'search granola b'}).json()[0]['stock'] == 4
+
+    assert client.get('/analytics/item/search granola bar').json()['item_name'] == 'SEARCH Granola Bar'
+    for name in ('SEARCH Granola Bar', 'search granola cereal'):
+        client.delete(f'/items/{name}')
@@ -0,0 +1,37 @@
+from fastapi.testclient import TestClient
+
+import server
+
+client = TestClient(server.app)
+
+
+def walk_logs(**params) -> list[int]:
+    """Follows X-Next-Cursor through every page of /logs and returns the transaction ids in order."""
+    ids = []
+    cursor = None
+    while True:
+        response = client.get('/logs', params={**params, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200
+        assert len(response.json()) <= params['limit']
+        ids += [log['transaction_id'] for log in response.json()]
+
+        cursor = response.headers.get(server.NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return ids
+
+
+def test_cursor_walks_every_log_once_with_filters():
+    client.post('/create', json={'name': 'paged item', 'initial_stock': 100, 'max_checkout': 1})
+    for n in range(11):
+        client.post('/checkout', json={'name': 'paged item', 'quantity': 1, 'student_id': f'pager {n % 2}'})
+
+    every_log = [log['transaction_id'] for log in client.get('/logs', params={'item_name': 'paged item'}).json()]
+    assert len(every_log) == 11
+    assert walk_logs(item_name='paged item', limit=3) == every_log
+    assert walk_logs(item_name='paged item', limit=11) == every_log
+    assert walk_logs(student_id='pager 1', action='checkout', limit=2) == every_log[1::2]
+
+
+def test_invalid_cursor_and_limit():
+    assert client.get('/logs', params={'limit': 5, 'cursor': 'not a cursor'}).status_code == 400
+    assert client.get('/logs', params={'limit': 0}).status_code == 400
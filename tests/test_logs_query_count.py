@@ -0,0 +1,46 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+import server
+from models.request_schemas import ItemRequest, MultiItemRequest, CreateRequest
+
+
+@contextmanager
+def count_queries():
+    """Counts the statements run on the read engine inside the with block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(server.read_engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(server.read_engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def logs_query_count(student_id: str, transactions: int, **filters) -> int:
+    with server.db_context() as db:
+        server.create_item(CreateRequest(name=f'{student_id} item', initial_stock=1000, max_checkout=10),
+                           server.Response(), db=db)
+        for _ in range(transactions):
+            server.checkout_item(MultiItemRequest(student_id=student_id, items=[
+                ItemRequest(name=f'{student_id} item', quantity=2)]), db=db)
+
+    with server.read_db_context() as db, count_queries() as statements:
+        logs = server.get_logs(db=db, student_id=student_id, **filters)
+        assert len(logs) == min(transactions, filters.get('limit', transactions))
+        assert all(len(log.items) == 1 for log in logs)
+
+    return len(statements)
+
+
+@pytest.mark.parametrize('filters', [{}, {'limit': 1000}], ids=['all', 'paged'])
+def test_logs_query_count_is_constant(filters):
+    few = logs_query_count(f'few {len(filters)}', 3, **filters)
+    many = logs_query_count(f'many {len(filters)}', 40, **filters)
+
+    assert few == many
@@ -0,0 +1,54 @@
+import datetime
+import re
+from itertools import combinations
+
+import pytest
+
+import server
+from models.request_schemas import WeekdayModel, ActionTypeModel
+
+LOG_FILTERS = {
+    'day_of_week': WeekdayModel.MONDAY,
+    'student_id': 'ABC123',
+    'item_name': 'foo',
+    'start_date': datetime.date(2025, 1, 1),
+    'end_date': datetime.date(2025, 5, 31),
+    'action': ActionTypeModel.CHECKOUT,
+}
+FULL_SCAN = re.compile(r'^SCAN (transactions|transaction_items)\b')
+
+
+def query_plan(query) -> list[str]:
+    compiled = query.statement.compile(bind=server.engine)
+    # only the plan is needed, so dates are passed the way SQLite stores them rather than through SQLAlchemy
+    params = tuple(str(value) if isinstance(value, datetime.date) else value
+                   for value in (compiled.params[name] for name in compiled.positiontup))
+    with server.engine.connect() as connection:
+        return [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params)]
+
+
+@pytest.mark.parametrize('filters', [combination for size in range(1, len(LOG_FILTERS) + 1)
+                                     for combination in combinations(LOG_FILTERS, size)],
+                         ids=lambda filters: '+'.join(filters))
+def test_logs_filters_use_indexes(filters):
+    with server.read_db_context() as db:
+        plan = query_plan(server._logs_query(db, **{name: LOG_FILTERS[name] for name in filters}))
+
+    assert not [step for step in plan if FULL_SCAN.match(step)], plan
+
+
+def test_delete_item_log_rename_uses_index():
+    with server.engine.connect() as connection:
+        plan = [row[-1] for row in connection.exec_driver_sql(
+            'EXPLAIN QUERY PLAN UPDATE transaction_items SET item_name = ? WHERE item_name = ?', ('x', 'y'))]
+
+    assert not [step for step in plan if FULL_SCAN.match(step)], plan
+
+
+def test_migration_is_idempotent():
+    server.migrate_database(server.engine)
+    server.migrate_database(server.engine)
+
+    with server.engine.connect() as connection:
+        indexes = {row[0] for row in connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {index.name for table in server.Base.metadata.sorted_tables for index in table.indexes} <= indexes
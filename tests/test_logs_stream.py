@@ -0,0 +1,53 @@
+import io
+import json
+
+import requests
+from fastapi.testclient import TestClient
+
+import server
+from api import inventoryapi
+from models.request_schemas import ActionTypeModel
+from models.response_schemas import TransactionResponse
+
+client = TestClient(server.app)
+
+
+def test_stream_logs_ndjson_format_and_filters():
+    client.post('/create', json={'name': 'streamed item', 'initial_stock': 5, 'max_checkout': 5})
+    client.post('/checkout', json={'student_id': 'streamer', 'items': [{'name': 'streamed item', 'quantity': 2}]})
+    client.post('/restock', json={'name': 'streamed item', 'quantity': 1})
+
+    response = client.get('/logs/stream', params={'item_name': 'streamed item'})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == server.NDJSON_MEDIA_TYPE
+    assert response.text.endswith('\n')
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    # one complete log per line, in the same form and order as /logs
+    assert lines == client.get('/logs', params={'item_name': 'streamed item'}).json()
+    assert [(line['action'], line['items']) for line in lines] == [
+        ('checkout', [{'item_name': 'streamed item', 'item_quantity': 2}]),
+        ('restock', [{'item_name': 'streamed item', 'item_quantity': 1}])]
+
+    response = client.get('/logs/stream', params={'item_name': 'streamed item', 'action': 'checkout'})
+    assert [json.loads(line)['student_id'] for line in response.text.splitlines()] == ['streamer']
+
+
+def test_client_stream_logs_yields_parsed_logs(monkeypatch):
+    def send_to_app(method, url, timeout=None, stream=False, params=None, **kwargs):
+        app_response = client.request(method, url, params=params)
+        response = requests.Response()
+        response.status_code = app_response.status_code
+        response.raw = io.BytesIO(app_response.content)
+        return response
+
+    url = 'http://stream.test'
+    monkeypatch.setattr(inventoryapi.shared_client(url).session, 'request', send_to_app)
+    client.post('/create', json={'name': 'client streamed', 'initial_stock': 5, 'max_checkout': 5})
+    client.post('/checkout', json={'student_id': 'client streamer',
+                                   'items': [{'name': 'client streamed', 'quantity': 1}]})
+
+    response = inventoryapi.stream_logs(item_name='client streamed', type=ActionTypeModel.CHECKOUT, url=url)
+    assert response.is_success
+    logs = list(response.model)
+    assert all(isinstance(log, TransactionResponse) for log in logs)
+    assert [(log.student_id, log.items[0].item_quantity) for log in logs] == [('client streamer', 1)]
@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+
+import server
+from report_cache import ReportCache
+
+client = TestClient(server.app)
+
+
+def popular(name: str) -> dict:
+    return {row['item_name']: row for row in client.get('/analytics/popular').json()}.get(name)
+
+
+def test_report_cache_folds_new_checkouts_and_clears_on_delete(monkeypatch):
+    cache = ReportCache()
+    monkeypatch.setattr(server, 'report_cache', cache)
+    client.post('/create', json={'name': 'cached item', 'initial_stock': 100, 'max_checkout': 10})
+    client.post('/checkout', json={'name': 'cached item', 'quantity': 2})
+
+    assert popular('cached item') == {'item_name': 'cached item', 'frequency': 1, 'quantity': 2}
+    assert popular('cached item') == {'item_name': 'cached item', 'frequency': 1, 'quantity': 2}
+    assert (cache.misses, cache.hits, cache.folds) == (1, 1, 0)
+
+    client.post('/checkout', json={'name': 'cached item', 'quantity': 3})
+    assert popular('cached item') == {'item_name': 'cached item', 'frequency': 2, 'quantity': 5}
+    assert (cache.misses, cache.hits, cache.folds) == (1, 1, 1)
+
+    # deleting renames the logs, so the recreated item starts from zero
+    client.delete('/items/cached item')
+    client.post('/create', json={'name': 'cached item', 'initial_stock': 100, 'max_checkout': 10})
+    client.post('/checkout', json={'name': 'cached item', 'quantity': 1})
+    assert popular('cached item') == {'item_name': 'cached item', 'frequency': 1, 'quantity': 1}
+    assert cache.misses == 2
+
+
+def test_report_cache_lru_limits():
+    cache = ReportCache(max_entries=2, max_rows=3)
+    compute = {'a': lambda: {1: (1,)}, 'b': lambda: {1: (1,), 2: (1,)}, 'c': lambda: {1: (1,)}}
+    for key in 'abc':
+        cache.get(key, lambda: 1, compute[key], None)
+
+    # c pushed the cache over max_rows, so the least recently used report (a) was evicted
+    assert cache.evictions == 1
+    cache.get('b', lambda: 1, compute['b'], None)
+    cache.get('a', lambda: 1, compute['a'], None)
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_reports_share_a_session():
+    client.post('/create', json={'name': 'session report item', 'initial_stock': 10, 'max_checkout': 5})
+    client.post('/checkout', json={'name': 'session report item', 'quantity': 2})
+    with server.read_db_context() as db:
+        db.query(server.Item).count()
+        popular = server.get_popular_items(db=db)
+        # the second report reuses the snapshot the first one opened instead of beginning another
+        assert server.get_peak_days(db=db)
+        assert server.get_popular_items(db=db) == popular
@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+import server
+from settings import Settings, _env_bool
+
+
+def test_env_bool(monkeypatch):
+    assert _env_bool('INVENTORY_TEST_FLAG', True) is True
+    for value, expected in [('1', True), (' TRUE ', True), ('yes', True), ('on', True), ('0', False),
+                            ('false', False), ('', False), ('nope', False)]:
+        monkeypatch.setenv('INVENTORY_TEST_FLAG', value)
+        assert _env_bool('INVENTORY_TEST_FLAG', True) is expected
+
+
+def test_settings_read_overrides_from_the_environment(monkeypatch):
+    monkeypatch.setenv('INVENTORY_DATABASE_POOL_SIZE', '7')
+    monkeypatch.setenv('INVENTORY_SQLITE_CACHE_SIZE', '-1024')
+    monkeypatch.setenv('INVENTORY_GROUP_COMMIT', 'yes')
+    monkeypatch.setenv('INVENTORY_GROUP_COMMIT_MAX_WAIT_MS', '2.5')
+    monkeypatch.delenv('INVENTORY_SQLITE_BUSY_TIMEOUT_MS', raising=False)
+    settings = Settings()
+    assert (settings.database_pool_size, settings.sqlite_cache_size) == (7, -1024)
+    assert (settings.group_commit, settings.group_commit_max_wait_ms) == (True, 2.5)
+    assert settings.sqlite_busy_timeout_ms == 5000
+
+    monkeypatch.setenv('INVENTORY_DATABASE_POOL_SIZE', 'many')
+    with pytest.raises(ValueError):
+        Settings()
+
+
+def pragmas(engine, *names: str) -> dict:
+    with engine.connect() as connection:
+        return {name: connection.execute(text(f'PRAGMA {name}')).scalar() for name in names}
+
+
+def test_connections_are_configured_on_connect():
+    # dispose the pool so the pragmas are read from a newly opened connection
+    server.engine.dispose()
+    assert pragmas(server.engine, 'journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'temp_store',
+                   'query_only') == {
+        'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': server.settings.sqlite_busy_timeout_ms,
+        'cache_size': server.settings.sqlite_cache_size, 'temp_store': 2, 'query_only': 0}
+
+    server.read_engine.dispose()
+    assert pragmas(server.read_engine, 'query_only', 'synchronous') == {'query_only': 1, 'synchronous': 1}
+
+
+def test_read_engine_cannot_write():
+    with server.read_db_context() as db:
+        with pytest.raises(OperationalError, match='readonly'):
+            db.execute(text("INSERT INTO items (name, stock, max_checkout) VALUES ('read only item', 1, 1)"))
@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+
+import server
+
+client = TestClient(server.app)
+
+
+def item_names(response) -> list[str]:
+    assert response.status_code == 200
+    return [item['name'] for item in response.json()]
+
+
+def test_items_by_tags_match_all_or_any():
+    for name in ('tagged apple', 'tagged bread', 'tagged candy'):
+        client.post('/create', json={'name': name, 'initial_stock': 1, 'max_checkout': 1})
+    assert client.post('/tags', json={'name': 'tag food', 'items': ['tagged apple', 'tagged bread']}).status_code == 201
+    assert client.post('/tags', json={'name': 'tag sweet', 'items': ['tagged candy']}).status_code == 201
+    assert client.post('/tags', json={'name': 'tag food'}).status_code == 409
+    assert client.post('/tags', json={'name': 'tag bad', 'items': ['missing item']}).status_code == 404
+    assert client.post('/tags/tag sweet/items', json={'items': ['tagged apple', 'tagged candy']}).status_code == 200
+
+    tags = {tag['name']: tag['items'] for tag in client.get('/tags').json()}
+    assert tags['tag food'] == ['tagged apple', 'tagged bread']
+    assert tags['tag sweet'] == ['tagged apple', 'tagged candy']
+    assert 'tag bad' not in tags
+
+    both = {'tags': ['tag food', 'tag sweet']}
+    assert item_names(client.get('/items/by-tags', params=both)) == ['tagged apple']
+    assert item_names(client.get('/items/by-tags', params={**both, 'match': 'any'})) == \
+        ['tagged apple', 'tagged bread', 'tagged candy']
+    assert item_names(client.get('/items', params={**both, 'limit': 10})) == ['tagged apple']
+    assert server.inventory_snapshot().tags_by_item['tagged apple'] == ('tag food', 'tag sweet')
+
+    # removing a tag from an item, deleting an item and deleting a tag all remove the item's tags
+    assert client.delete('/tags/tag sweet/items/tagged apple').status_code == 200
+    assert client.delete('/tags/tag sweet/items/tagged apple').status_code == 404
+    client.delete('/items/tagged bread')
+    assert item_names(client.get('/items/by-tags', params={'tags': ['tag food']})) == ['tagged apple']
+    assert client.delete('/tags/tag food').status_code == 200
+    assert server.inventory_snapshot().tags_by_item.get('tagged apple') is None
+
+    client.delete('/tags/tag sweet')
+    for name in ('tagged apple', 'tagged candy'):
+        client.delete(f'/items/{name}')
+
+
+def test_import_tags_skips_missing_items():
+    client.post('/create', json={'name': 'imported item', 'initial_stock': 1, 'max_checkout': 1})
+    with server.db_context() as db:
+        assert server.import_tags(db, {'tag imported': ['imported item', 'missing item']}) == 1
+        db.commit()
+    server.bump_inventory_version()
+    assert server.inventory_snapshot().tags_by_item['imported item'] == ('tag imported',)
+
+    client.delete('/tags/tag imported')
+    client.delete('/items/imported item')